@@ -51,6 +51,20 @@ export default function HomePage() {
       if (!response.ok) {
         const error = await response.text();
         console.error(error);
+        return;
+      }
+
+      // The build runs as a background job; wait for it to finish.
+      const { job_id } = await response.json();
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const job = await fetch(`${API_BASE}/jobs/${job_id}`).then((r) =>
+          r.json(),
+        );
+        if (!["queued", "running"].includes(job.status)) {
+          if (job.status !== "succeeded") console.error(job.error ?? job);
+          break;
+        }
       }
     } catch (error) {
       console.error(error);
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import (
     FastAPI,
@@ -7,7 +8,8 @@ from fastapi.middleware.cors import (
     CORSMiddleware,
 )
 
-from api.routes import graph, ingest, llm, logs, process
+from api.routes import graph, ingest, jobs, llm, logs, process, transcription
+from ingestion.transcription import WHISPER_PRELOAD, get_transcription_service
 
 origins = [
     "http://localhost:3000",
@@ -20,7 +22,19 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
 
-app = FastAPI(title="Pokemon Starter RAG API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    service = get_transcription_service()
+    if WHISPER_PRELOAD:
+        # Workers load and warm up the model in the background; audio
+        # requests arriving meanwhile wait in the queue.
+        service.start()
+    yield
+    service.stop(timeout=5)
+
+
+app = FastAPI(title="Pokemon Starter RAG API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +49,8 @@ app.include_router(process.router)
 app.include_router(llm.router)
 app.include_router(graph.router)
 app.include_router(logs.router)
+app.include_router(jobs.router)
+app.include_router(transcription.router)
 
 
 @app.get("/health")
@@ -1,8 +1,8 @@
-import json
 import logging
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from processing.graph_store import get_graph_snapshot, resolve_graph_path
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +14,12 @@ GRAPH_JSON = GRAPH_DIR / "graph.json"
 
 @router.get("/graph")
 async def get_graph():
-    if not GRAPH_JSON.exists():
+    if not resolve_graph_path(GRAPH_JSON).exists():
         raise HTTPException(status_code=404, detail="Graph not built yet")
 
     try:
-        graph = json.loads(GRAPH_JSON.read_text(encoding="utf-8"))
+        snapshot = get_graph_snapshot(GRAPH_JSON)
     except Exception as e:
         logger.exception("Failed to read graph.json")
         raise HTTPException(status_code=500, detail=str(e))
-    return graph
+    return Response(content=snapshot.json_bytes(), media_type="application/json")
@@ -7,6 +7,7 @@ from fastapi import (
     HTTPException,
     UploadFile,
 )
+from processing.jobs import get_job_runner
 from scripts.ingest import main as run_full_ingest
 from scripts.ingest_audio_corpus import add_audio as run_add_audio
 from scripts.ingest_images_corpus import add_image as run_add_image
@@ -84,19 +85,19 @@ async def add_text(file: UploadFile = File(...)) -> dict:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/ingest")
+@router.post("/ingest", status_code=202)
 def ingest_corpus() -> dict:
     """
-    Run the full ingestion pipeline:
+    Queue the full ingestion pipeline as a background job:
     - ingest_text_corpus.main()
     - ingest_images_corpus.main()
     - ingest_audio_corpus.main()
+    Poll GET /jobs/{job_id} for progress.
     """
-    try:
-        logger.info("API: starting full ingestion via /ingest")
-        run_full_ingest()
-        logger.info("API: ingestion completed")
-        return {"message": "Ingestion process completed."}
-    except Exception as e:
-        logger.exception("Error during ingestion")
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("API: queueing full ingestion via /ingest")
+    job = get_job_runner().submit("ingest", run_full_ingest)
+    return {
+        "message": "Ingestion process queued.",
+        "job_id": job.id,
+        "status": job.status,
+    }
@@ -0,0 +1,30 @@
+import logging
+
+from fastapi import APIRouter, HTTPException
+from processing.jobs import get_job_runner
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.get("/jobs")
+def list_jobs() -> list:
+    return [job.to_dict() for job in get_job_runner().list_jobs()]
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str) -> dict:
+    job = get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str) -> dict:
+    """Cancel a queued or running job; running jobs stop at their next checkpoint."""
+    job = get_job_runner().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
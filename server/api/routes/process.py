@@ -1,9 +1,8 @@
 import logging
 
-from fastapi import (
-    APIRouter,
-    HTTPException,
-)
+from fastapi import APIRouter
+from processing.graph_store import invalidate_graph
+from processing.jobs import get_job_runner
 from scripts.process import main as run_build_graph
 
 logger = logging.getLogger(__name__)
@@ -11,17 +10,22 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["process"])
 
 
-@router.post("/process")
+def _build_graph() -> None:
+    run_build_graph()
+    invalidate_graph()
+    logger.info("API: graph built and exported")
+
+
+@router.post("/process", status_code=202)
 def process_graph() -> dict:
     """
-    Run the graph-building pipeline:
-    - build_graph_and_export_to_csv_and_json()
+    Queue the graph-building pipeline (build_graph_and_export_to_csv_and_json)
+    as a background job. Poll GET /jobs/{job_id} for progress.
     """
-    try:
-        logger.info("API: starting graph build via /process")
-        run_build_graph()
-        logger.info("API: graph built and exported")
-        return {"message": "Graph built and exported to CSV and JSON successfully."}
-    except Exception as e:
-        logger.exception("Error during graph processing")
-        raise HTTPException(status_code=500, detail=str(e))
+    logger.info("API: queueing graph build via /process")
+    job = get_job_runner().submit("process", _build_graph)
+    return {
+        "message": "Graph build queued.",
+        "job_id": job.id,
+        "status": job.status,
+    }
@@ -0,0 +1,14 @@
+import logging
+
+from fastapi import APIRouter
+from ingestion.transcription import get_transcription_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["transcription"])
+
+
+@router.get("/transcription/stats")
+def transcription_stats() -> dict:
+    """Queue depth, throughput and real-time factor of the Whisper workers."""
+    return get_transcription_service().stats()
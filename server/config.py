@@ -1,9 +1,11 @@
 import os
+import threading
 from typing import Any, Dict, List, Optional
 
+import httpx
 from dotenv import load_dotenv
 from openai import OpenAI
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qm
 
 load_dotenv()
@@ -17,9 +19,53 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "pokemon_corpus")
 EMBED_DIM = 1536
 
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+QDRANT_KEEPALIVE_SECONDS = float(os.getenv("QDRANT_KEEPALIVE_SECONDS", "60"))
 
-def get_qdrant_client() -> QdrantClient:
-    return QdrantClient(
-        url=QDRANT_URL,
-        api_key=QDRANT_API_KEY,
+_qdrant_client: Optional[QdrantClient] = None
+_async_qdrant_client: Optional[AsyncQdrantClient] = None
+_qdrant_lock = threading.Lock()
+
+
+def _qdrant_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=QDRANT_POOL_SIZE,
+        max_keepalive_connections=QDRANT_POOL_SIZE,
+        keepalive_expiry=QDRANT_KEEPALIVE_SECONDS,
     )
+
+
+def get_qdrant_client() -> QdrantClient:
+    """
+    Process-wide Qdrant client. The underlying HTTP connection pool is
+    shared by every caller and keeps connections alive between requests.
+    """
+    global _qdrant_client
+
+    if _qdrant_client is None:
+        with _qdrant_lock:
+            if _qdrant_client is None:
+                _qdrant_client = QdrantClient(
+                    url=QDRANT_URL,
+                    api_key=QDRANT_API_KEY,
+                    timeout=QDRANT_TIMEOUT,
+                    limits=_qdrant_limits(),
+                )
+    return _qdrant_client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Async counterpart of get_qdrant_client, for use from event-loop code."""
+    global _async_qdrant_client
+
+    if _async_qdrant_client is None:
+        with _qdrant_lock:
+            if _async_qdrant_client is None:
+                _async_qdrant_client = AsyncQdrantClient(
+                    url=QDRANT_URL,
+                    api_key=QDRANT_API_KEY,
+                    timeout=QDRANT_TIMEOUT,
+                    limits=_qdrant_limits(),
+                )
+    return _async_qdrant_client
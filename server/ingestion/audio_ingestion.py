@@ -1,48 +1,84 @@
 import json
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 import whisper
+from ingestion import audio_segments, transcription
+from ingestion.media_cache import cached_extraction
+from ingestion.transcription_backends import backend_fingerprint
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
 
 logger = logging.getLogger(__name__)
 
 AUDIO_JSONL = Path("data/processed/audio.jsonl")
-_model = None
 
 
-def _get_whisper_model():
-    global _model
-
-    if _model is None:
-        logger.info(
-            "_get_whisper_model loading model",
-            extra={"model_name": "small"},
-        )
-        _model = whisper.load_model("small")
-        logger.info(
-            "_get_whisper_model finished loading",
-            extra={"model_name": "small"},
-        )
-
-    return _model
+def extract_transcript_from_audio(path: str) -> Dict[str, Any]:
+    """
+    {"text", "duration", "segments"} for an audio file, transcribed segment
+    by segment by the resident Whisper service; see transcription.
+    """
+    version = "-".join(
+        [
+            f"whisper-{whisper.__version__}",
+            transcription.WHISPER_MODEL,
+            backend_fingerprint(transcription.WHISPER_BACKEND),
+            audio_segments.segmentation_fingerprint(),
+        ]
+    )
+    blob = cached_extraction(
+        "whisper-transcript",
+        version,
+        path,
+        lambda p: json.dumps(_transcribe_file(p), ensure_ascii=False),
+    )
+    return json.loads(blob)
 
 
 def extract_text_from_audio(
     path: str, model=None
 ) -> str:  # test purposes: fake model can be passed to avoid loading whisper on tests
+    if model is not None:
+        # An explicitly passed model has no known version to cache under.
+        return _transcribe(path, model)
+    return extract_transcript_from_audio(path)["text"]
+
+
+def _transcribe_file(path: str) -> Dict[str, Any]:
     logger.info(
         "extract_text_from_audio started",
         extra={"path": str(path)},
     )
+    try:
+        transcript = transcription.get_transcription_service().transcribe_file(path)
+    except Exception:
+        logger.exception(
+            "Error during audio transcription",
+            extra={"path": str(path)},
+        )
+        raise
 
-    if model is None:
-        model = _get_whisper_model()
+    logger.info(
+        "extract_text_from_audio finished",
+        extra={
+            "path": str(path),
+            "chars": len(transcript["text"]),
+            "segments": len(transcript["segments"]),
+        },
+    )
+    return transcript
+
+
+def _transcribe(path: str, model) -> str:
+    logger.info(
+        "extract_text_from_audio started",
+        extra={"path": str(path)},
+    )
 
     try:
-        result = model.transcribe(path, fp16=False)
+        raw_text = model.transcribe(path, fp16=False)["text"]
     except Exception:
         logger.exception(
             "Error during audio transcription",
@@ -50,7 +86,7 @@ def extract_text_from_audio(
         )
         raise
 
-    text = result["text"].strip() or ""
+    text = raw_text.strip() or ""
 
     if not text:
         logger.debug(
@@ -69,6 +105,29 @@ def extract_text_from_audio(
     return text
 
 
+def build_audio_record(
+    path: Path,
+    text: str,
+    pokemon: str,
+    generation: int,
+    types: list[str],
+    segments: Optional[List[Dict[str, Any]]] = None,
+) -> Dict:
+    record: Dict[str, Any] = {
+        "id": path.stem,
+        "modality": "audio",
+        "source_path": str(path),
+        "text": text,
+        "pokemon": pokemon,
+        "generation": generation,
+        "types": types,
+        "tags": ["starter", "audio", pokemon.lower()],
+    }  # dataset is all starter pokemon, default tag "starter"
+    if segments is not None:
+        record["segments"] = segments
+    return record
+
+
 def ingest_audio(
     audio_path_string: str, pokemon: str, generation: int, types: list[str], model=None
 ) -> Dict[str, str]:
@@ -79,18 +138,15 @@ def ingest_audio(
         extra={"path": str(audio_path)},
     )
 
-    text = extract_text_from_audio(str(audio_path), model)
-
-    record: Dict = {
-        "id": audio_path.stem,
-        "modality": "audio",
-        "source_path": str(audio_path),
-        "text": text,
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": ["starter", "audio", pokemon.lower()],
-    }  # dataset is all starter pokemon, default tag "starter"
+    segments = None
+    if model is None:
+        transcript = extract_transcript_from_audio(str(audio_path))
+        text, segments = transcript["text"], transcript["segments"]
+    else:
+        text = extract_text_from_audio(str(audio_path), model)
+    record = build_audio_record(
+        audio_path, text, pokemon, generation, types, segments=segments
+    )
 
     vector = embed_text(record["text"])
     metadata = {
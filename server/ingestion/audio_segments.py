@@ -0,0 +1,119 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+AUDIO_VAD_ENABLED = os.getenv("AUDIO_VAD_ENABLED", "1") == "1"
+AUDIO_VAD_FRAME_MS = int(os.getenv("AUDIO_VAD_FRAME_MS", "30"))
+# A frame is speech when louder than both the floor (dBFS) and the loudest
+# frame minus the relative margin.
+AUDIO_VAD_FLOOR_DB = float(os.getenv("AUDIO_VAD_FLOOR_DB", "-50"))
+AUDIO_VAD_RELATIVE_DB = float(os.getenv("AUDIO_VAD_RELATIVE_DB", "-35"))
+# Shorter gaps are treated as part of the speech around them.
+AUDIO_MIN_SILENCE_MS = int(os.getenv("AUDIO_MIN_SILENCE_MS", "400"))
+AUDIO_SEGMENT_PAD_MS = int(os.getenv("AUDIO_SEGMENT_PAD_MS", "150"))
+# Whisper decodes 30 s windows; a segment holds at most this much speech.
+AUDIO_MAX_SEGMENT_SECONDS = float(os.getenv("AUDIO_MAX_SEGMENT_SECONDS", "30"))
+
+# (start sample, end sample), end exclusive
+Span = Tuple[int, int]
+# Speech spans transcribed together, their samples joined end to end.
+Segment = List[Span]
+
+
+def frame_levels(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS level in dBFS of each whole `frame`-sample frame."""
+    n_frames = len(audio) // frame
+    frames = audio[: n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames**2, axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def speech_regions(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Span]:
+    """
+    Spans of `audio` that hold speech according to a frame-energy VAD.
+    Gaps shorter than AUDIO_MIN_SILENCE_MS are bridged and every span is
+    padded by AUDIO_SEGMENT_PAD_MS so word edges are not clipped.
+    """
+    frame = max(1, sample_rate * AUDIO_VAD_FRAME_MS // 1000)
+    if len(audio) < frame:
+        return [(0, len(audio))] if len(audio) else []
+
+    levels = frame_levels(audio, frame)
+    peak = float(levels.max())
+    if peak < AUDIO_VAD_FLOOR_DB:
+        return []
+    voiced = levels > max(AUDIO_VAD_FLOOR_DB, peak + AUDIO_VAD_RELATIVE_DB)
+
+    # Frame indices where voicing switches on or off.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(int), [0]))))
+    frame_spans = list(zip(edges[::2], edges[1::2]))
+
+    min_gap = AUDIO_MIN_SILENCE_MS * sample_rate // 1000
+    pad = AUDIO_SEGMENT_PAD_MS * sample_rate // 1000
+    regions: List[Span] = []
+    for start_frame, end_frame in frame_spans:
+        start = max(0, int(start_frame) * frame - pad)
+        end = min(len(audio), int(end_frame) * frame + pad)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def split_segments(
+    regions: List[Span], sample_rate: int = SAMPLE_RATE
+) -> List[Segment]:
+    """
+    Pack consecutive speech regions into segments of at most
+    AUDIO_MAX_SEGMENT_SECONDS of speech. Only the regions' samples are
+    joined, so the pauses between them are not transcribed. A single region
+    longer than the limit is cut into equal windows.
+    """
+    max_len = max(1, int(AUDIO_MAX_SEGMENT_SECONDS * sample_rate))
+    segments: List[Segment] = []
+    speech = 0
+    for start, end in regions:
+        if segments and speech + (end - start) <= max_len:
+            segments[-1].append((start, end))
+            speech += end - start
+            continue
+        for cut in range(start, end, max_len):
+            segments.append([(cut, min(end, cut + max_len))])
+            speech = min(end, cut + max_len) - cut
+    return segments
+
+
+def segment_audio(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Segment]:
+    """Speech segments to transcribe; silence between speech regions is left out."""
+    if not AUDIO_VAD_ENABLED:
+        return split_segments([(0, len(audio))] if len(audio) else [], sample_rate)
+    return split_segments(speech_regions(audio, sample_rate), sample_rate)
+
+
+def segment_samples(audio: np.ndarray, segment: Segment) -> np.ndarray:
+    """The samples of a segment's spans, joined end to end."""
+    if len(segment) == 1:
+        start, end = segment[0]
+        return audio[start:end]
+    return np.concatenate([audio[start:end] for start, end in segment])
+
+
+def segmentation_fingerprint() -> str:
+    """Changes with any setting that changes how audio is segmented."""
+    if not AUDIO_VAD_ENABLED:
+        return f"novad-{AUDIO_MAX_SEGMENT_SECONDS:g}"
+    return "vadjoin-" + "-".join(
+        f"{v:g}"
+        for v in (
+            AUDIO_VAD_FRAME_MS,
+            AUDIO_VAD_FLOOR_DB,
+            AUDIO_VAD_RELATIVE_DB,
+            AUDIO_MIN_SILENCE_MS,
+            AUDIO_SEGMENT_PAD_MS,
+            AUDIO_MAX_SEGMENT_SECONDS,
+        )
+    )
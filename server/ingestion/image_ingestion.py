@@ -1,8 +1,10 @@
 import json
 import logging
 from pathlib import Path
+from typing import Optional
 
 import pytesseract
+from ingestion.media_cache import cached_extraction
 from PIL import Image
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
@@ -14,7 +16,29 @@ IMAGES_JSONL = PROCESSED_DIR / "images.jsonl"
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
+_ocr_version: Optional[str] = None
+
+
+def _get_ocr_version() -> str:
+    """OCR output depends on the tesseract binary, not just the wrapper."""
+    global _ocr_version
+
+    if _ocr_version is None:
+        try:
+            binary = str(pytesseract.get_tesseract_version())
+        except Exception:
+            binary = "unknown"
+        _ocr_version = f"tesseract-{binary}"
+    return _ocr_version
+
+
 def extract_text_from_image(image_path_string: str) -> str:
+    return cached_extraction(
+        "ocr", _get_ocr_version(), image_path_string, _extract_text_from_image
+    )
+
+
+def _extract_text_from_image(image_path_string: str) -> str:
     image_path = Path(image_path_string)
     logger.info(
         "extract_text_from_image started", extra={"image_path": str(image_path)}
@@ -50,6 +74,25 @@ def extract_text_from_image(image_path_string: str) -> str:
     return text
 
 
+def build_image_record(
+    path: Path, text: str, pokemon: str, generation: int, types: list[str]
+) -> dict:
+    return {
+        "id": path.stem,
+        "modality": "image",
+        "source_path": str(path),
+        "text": text,
+        "pokemon": pokemon,
+        "generation": generation,
+        "types": types,
+        "tags": [
+            "starter",
+            "image",
+            pokemon.lower(),
+        ],
+    }  # dataset is all starter pokemon, default tag "starter"
+
+
 def ingest_image(
     image_path_string: str, pokemon: str, generation: int, types: list[str]
 ):
@@ -65,21 +108,7 @@ def ingest_image(
     )
 
     text = extract_text_from_image(image_path_string)
-
-    record = {
-        "id": image_path.stem,
-        "modality": "image",
-        "source_path": str(image_path),
-        "text": text,
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": [
-            "starter",
-            "image",
-            pokemon.lower(),
-        ],
-    }  # dataset is all starter pokemon, default tag "starter"
+    record = build_image_record(image_path, text, pokemon, generation, types)
 
     vector = embed_text(record["text"])
     metadata = {
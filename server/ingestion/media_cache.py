@@ -0,0 +1,74 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from processing.cache import SqliteCache
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_ENABLED = os.getenv("MEDIA_CACHE_ENABLED", "1") == "1"
+MEDIA_CACHE_PATH = Path(os.getenv("MEDIA_CACHE_PATH", "data/cache/media_text.sqlite"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(256 * 1024**2)))
+
+_READ_CHUNK = 1024 * 1024
+
+_media_cache: Optional[SqliteCache] = None
+_media_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> Optional[SqliteCache]:
+    global _media_cache
+
+    if not MEDIA_CACHE_ENABLED:
+        return None
+    if _media_cache is None:
+        with _media_cache_lock:
+            if _media_cache is None:
+                _media_cache = SqliteCache(MEDIA_CACHE_PATH, MEDIA_CACHE_MAX_BYTES)
+    return _media_cache
+
+
+def media_cache_stats() -> Dict[str, int]:
+    cache = get_media_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_extraction(
+    extractor: str,
+    version: str,
+    path: Union[str, Path],
+    extract: Callable[[str], str],
+) -> str:
+    """
+    Return the text `extract(path)` produces, reusing an earlier result for
+    the same file content, extractor and extractor version. The key is the
+    content hash, so renamed or copied files hit too, and upgrading an
+    extractor or switching models misses as it should.
+    """
+    cache = get_media_cache()
+    if cache is None:
+        return extract(str(path))
+
+    key = f"{extractor}:{version}:{file_digest(path)}"
+    blob = cache.get(key)
+    if blob is not None:
+        logger.info(
+            "Extracted text served from cache",
+            extra={"path": str(path), "extractor": extractor},
+        )
+        return blob.decode("utf-8")
+
+    text = extract(str(path))
+    cache.set(key, text.encode("utf-8"))
+    return text
@@ -0,0 +1,383 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from data.pokemon_mappings import POKEMON_MAPPING
+from ingestion import audio_ingestion, image_ingestion, text_ingestion, transcription
+from processing import embeddings, vector_store
+from processing.jobs import cancel_requested, raise_if_cancelled, report_progress
+
+logger = logging.getLogger(__name__)
+
+# "process" runs PDF and OCR extraction in worker processes so it can use
+# every core; "thread" keeps it in-process (useful for debugging and tests).
+INGEST_EXECUTOR = os.getenv("INGEST_EXECUTOR", "process")
+INGEST_EXTRACT_WORKERS = int(
+    os.getenv("INGEST_EXTRACT_WORKERS", str(os.cpu_count() or 1))
+)
+# Audio is transcribed by the resident Whisper service in this process; these
+# threads only keep its queue fed.
+INGEST_AUDIO_WORKERS = int(
+    os.getenv("INGEST_AUDIO_WORKERS", str(transcription.WHISPER_WORKERS))
+)
+# Items buffered between stages; a full queue stalls the stage before it.
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "64"))
+INGEST_UPSERT_BATCH = int(os.getenv("INGEST_UPSERT_BATCH", "128"))
+
+RAW_DIRS: Dict[str, Path] = {
+    "text": Path("data/raw/text"),
+    "image": Path("data/raw/images"),
+    "audio": Path("data/raw/audio"),
+}
+SUFFIXES: Dict[str, Set[str]] = {
+    "text": {".pdf", ".txt"},
+    "image": {".png", ".jpg"},
+    "audio": {".mp3"},
+}
+
+_DONE = object()
+
+
+class IngestionError(RuntimeError):
+    """Raised after a corpus run in which some files could not be ingested."""
+
+
+@dataclass
+class _Item:
+    seq: int
+    modality: str
+    path: Path
+    pokemon: str
+    generation: int
+    types: List[str]
+    record: Optional[Dict[str, Any]] = None
+    vector: Optional[List[float]] = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    ingested: int = 0
+    failed: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+def resolve_metadata(path: Path) -> Tuple[str, int, List[str]]:
+    for key, (pokemon, gen, types) in POKEMON_MAPPING.items():
+        if key.lower() in path.stem.lower():
+            return pokemon, gen, types
+    raise ValueError(f"Could not resolve metadata for {path}")
+
+
+def extract(modality: str, path: str) -> Dict[str, Any]:
+    """
+    Run the CPU-bound extractor for one raw file; safe to call in a worker.
+    Returns {"text"} plus, for audio, the timestamped "segments".
+    """
+    if modality == "text":
+        if path.lower().endswith(".pdf"):
+            return {"text": text_ingestion.extract_text_from_pdf(path)}
+        return {"text": Path(path).read_text(encoding="utf-8").strip()}
+    if modality == "image":
+        return {"text": image_ingestion.extract_text_from_image(path)}
+    if modality == "audio":
+        return audio_ingestion.extract_transcript_from_audio(path)
+    raise ValueError(f"Unknown modality: {modality}")
+
+
+def build_record(item: _Item, extracted: Dict[str, Any]) -> Dict[str, Any]:
+    args = (item.path, extracted["text"], item.pokemon, item.generation, item.types)
+    if item.modality == "text":
+        return text_ingestion.build_text_record(*args)
+    if item.modality == "image":
+        return image_ingestion.build_image_record(*args)
+    return audio_ingestion.build_audio_record(*args, segments=extracted.get("segments"))
+
+
+def _write_record(record: Dict[str, Any]) -> None:
+    writers: Dict[str, Callable[[Dict[str, Any]], None]] = {
+        "text": text_ingestion.write_text_record,
+        "image": image_ingestion.write_image_record,
+        "audio": audio_ingestion.write_audio_record,
+    }
+    writers[record["modality"]](record)
+
+
+def discover(sources: Mapping[str, Path]) -> List[_Item]:
+    """List every raw file to ingest, modality by modality in directory order."""
+    items: List[_Item] = []
+    for modality, raw_dir in sources.items():
+        if not raw_dir.exists():
+            logger.warning(
+                "Raw directory does not exist",
+                extra={"modality": modality, "path": str(raw_dir)},
+            )
+            continue
+        for path in raw_dir.iterdir():
+            if not path.is_file() or path.suffix.lower() not in SUFFIXES[modality]:
+                continue
+            pokemon, generation, types = resolve_metadata(path)
+            items.append(
+                _Item(len(items), modality, path, pokemon, generation, list(types))
+            )
+    return items
+
+
+def _make_executor(workers: int, name: str) -> Executor:
+    if INGEST_EXECUTOR == "process":
+        # spawn: forking a process that is running stage threads is unsafe.
+        return ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=name)
+
+
+def _start(target: Callable[[], None], name: str) -> threading.Thread:
+    # Each stage thread gets a copy of the caller's context, so progress and
+    # cancellation reach the job that started the run.
+    thread = threading.Thread(target=copy_context().run, args=(target,), name=name)
+    thread.start()
+    return thread
+
+
+def _take_batch(inbox: "queue.Queue[Any]", size: int) -> Tuple[List[_Item], bool]:
+    """Block for one item, then take whatever else is ready, up to `size`."""
+    batch: List[_Item] = []
+    first = inbox.get()
+    if first is _DONE:
+        return batch, True
+    batch.append(first)
+    while len(batch) < size:
+        try:
+            item = inbox.get_nowait()
+        except queue.Empty:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class _Stage:
+    """
+    One pipeline stage: a thread taking batches from `inbox`, handing them
+    to `fn` and passing every item on to `outbox`. A batch that fails marks
+    its items failed; the stage keeps draining so upstream never blocks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[List[_Item]], None],
+        inbox: "queue.Queue[Any]",
+        outbox: "queue.Queue[Any]",
+        batch_size: int,
+    ):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.seconds = 0.0
+        self.thread = _start(self._run, f"ingest-{name}")
+
+    def _run(self) -> None:
+        done = False
+        while not done:
+            batch, done = _take_batch(self.inbox, self.batch_size)
+            live = [item for item in batch if item.error is None]
+            if live:
+                started = time.perf_counter()
+                try:
+                    self.fn(live)
+                except Exception as e:
+                    logger.exception(
+                        "Ingestion stage failed",
+                        extra={"stage": self.name, "items": len(live)},
+                    )
+                    for item in live:
+                        item.error = e
+                self.seconds += time.perf_counter() - started
+            for item in batch:
+                self.outbox.put(item)
+        self.outbox.put(_DONE)
+
+
+def _embed(batch: List[_Item]) -> None:
+    vectors = embeddings.embed_texts([item.record["text"] for item in batch])
+    for item, vector in zip(batch, vectors):
+        item.vector = vector
+
+
+def _upsert(batch: List[_Item]) -> None:
+    vector_store.upsert_documents(
+        [
+            {
+                "id": item.record["id"],
+                "vector": item.vector,
+                "payload": {
+                    "media_id": item.record["id"],
+                    "media_type": "text",
+                    "pokemon": item.record.get("pokemon"),
+                    "source_path": str(item.path),
+                },
+            }
+            for item in batch
+        ],
+        batch_size=INGEST_UPSERT_BATCH,
+    )
+
+
+def _extract_all(
+    items: List[_Item], outbox: "queue.Queue[Any]", pools: Mapping[str, Executor]
+) -> None:
+    """
+    Submit extraction for every item, keeping at most INGEST_QUEUE_SIZE in
+    flight, and pass finished items on as they complete. A full outbox
+    stops further submissions: backpressure from the embed stage.
+    """
+    in_flight: Dict[Future, _Item] = {}
+
+    def drain(block: bool) -> None:
+        if not in_flight:
+            return
+        finished, _ = wait(
+            list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED
+        )
+        for future in finished:
+            item = in_flight.pop(future)
+            try:
+                item.record = build_record(item, future.result())
+            except Exception as e:
+                logger.exception(
+                    "Extraction failed",
+                    extra={"path": str(item.path), "modality": item.modality},
+                )
+                item.error = e
+            outbox.put(item)
+
+    try:
+        for item in items:
+            if cancel_requested():
+                break
+            while len(in_flight) >= INGEST_QUEUE_SIZE:
+                drain(block=True)
+            pool = pools["audio" if item.modality == "audio" else "default"]
+            in_flight[pool.submit(extract, item.modality, str(item.path))] = item
+            drain(block=False)
+        while in_flight:
+            drain(block=True)
+    finally:
+        outbox.put(_DONE)
+
+
+def ingest_corpus(sources: Optional[Mapping[str, Path]] = None) -> IngestStats:
+    """
+    Ingest every raw file under `sources` (modality -> raw directory,
+    default RAW_DIRS), all modalities at once.
+
+    Files flow through discover -> extract -> embed -> upsert -> write.
+    Extraction runs on worker pools, with audio going to the resident
+    Whisper service (ingestion.transcription); embedding and upserts are
+    batched across files and modalities. Stages are joined
+    by bounded queues, so the CPU-bound and network-bound work overlap
+    without the run buffering the whole corpus. Records are appended to the
+    processed JSONL files in discovery order, as the serial scripts did.
+    A file that fails is logged and skipped; IngestionError is raised at
+    the end if any did.
+    """
+    sources = RAW_DIRS if sources is None else sources
+    items = discover(sources)
+    stats = IngestStats(files=len(items))
+    report_progress(0, len(items), stage="ingest")
+    logger.info("Ingestion started", extra={"files": len(items)})
+
+    embed_queue: "queue.Queue[Any]" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    upsert_queue: "queue.Queue[Any]" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    write_queue: "queue.Queue[Any]" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    failures: List[_Item] = []
+
+    pools = {
+        "default": _make_executor(INGEST_EXTRACT_WORKERS, "ingest-extract"),
+        "audio": ThreadPoolExecutor(
+            max_workers=max(1, INGEST_AUDIO_WORKERS), thread_name_prefix="ingest-audio"
+        ),
+    }
+    started = time.perf_counter()
+    try:
+        stages = [
+            _Stage("embed", _embed, embed_queue, upsert_queue, INGEST_EMBED_BATCH),
+            _Stage("upsert", _upsert, upsert_queue, write_queue, INGEST_UPSERT_BATCH),
+        ]
+        extractor = _start(
+            lambda: _extract_all(items, embed_queue, pools), "ingest-extract"
+        )
+
+        # Records are written here, in discovery order.
+        pending: Dict[int, _Item] = {}
+        next_seq = 0
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                break
+            pending[item.seq] = item
+            while next_seq in pending:
+                ready = pending.pop(next_seq)
+                next_seq += 1
+                if ready.error is None:
+                    try:
+                        _write_record(ready.record)
+                        stats.ingested += 1
+                    except Exception as e:
+                        logger.exception(
+                            "Writing record failed", extra={"path": str(ready.path)}
+                        )
+                        ready.error = e
+                if ready.error is not None:
+                    failures.append(ready)
+                report_progress(next_seq, len(items))
+
+        extractor.join()
+        for stage in stages:
+            stage.thread.join()
+            stats.stage_seconds[stage.name] = round(stage.seconds, 3)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    stats.failed = len(failures)
+    logger.info(
+        "Ingestion finished",
+        extra={
+            "files": stats.files,
+            "ingested": stats.ingested,
+            "failed": stats.failed,
+            "seconds": round(time.perf_counter() - started, 3),
+            **{f"{k}_seconds": v for k, v in stats.stage_seconds.items()},
+        },
+    )
+    raise_if_cancelled()
+    if failures:
+        raise IngestionError(
+            f"{len(failures)} of {len(items)} files failed to ingest: "
+            + ", ".join(str(item.path) for item in failures[:5])
+        )
+    return stats
@@ -2,6 +2,8 @@ import json
 import logging
 from pathlib import Path
 
+import pypdf
+from ingestion.media_cache import cached_extraction
 from processing.embeddings import embed_text
 from processing.vector_store import upsert_document
 from pypdf import PdfReader
@@ -12,7 +14,16 @@ TEXT_JSONL = PROCESSED_DIR / "text.jsonl"
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
+PDF_EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}"
+
+
 def extract_text_from_pdf(pdf_path: str) -> str:
+    return cached_extraction(
+        "pdf", PDF_EXTRACTOR_VERSION, pdf_path, _extract_text_from_pdf
+    )
+
+
+def _extract_text_from_pdf(pdf_path: str) -> str:
     logger.info("extract_text_from_pdf started", extra={"path": str(pdf_path)})
 
     try:
@@ -51,6 +62,24 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     return text
 
 
+def build_text_record(
+    path: Path, text: str, pokemon: str, generation: int, types: list[str]
+) -> dict:
+    return {
+        "id": path.stem,
+        "modality": "text",
+        "source_path": str(path),
+        "text": text,
+        "pokemon": pokemon,
+        "generation": generation,
+        "types": types,
+        "tags": [
+            "starter",
+            pokemon.lower(),
+        ],  # dataset is all starter pokemon, default tag "starter"
+    }
+
+
 def ingest_pdf(
     pdf_path_string: str, pokemon: str, generation: int, types: list[str]
 ) -> dict:
@@ -65,20 +94,7 @@ def ingest_pdf(
     )
 
     text = extract_text_from_pdf(str(pdf_path))
-
-    record = {
-        "id": pdf_path.stem,
-        "modality": "text",
-        "source_path": str(pdf_path),
-        "text": text,
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": [
-            "starter",
-            pokemon.lower(),
-        ],  # dataset is all starter pokemon, default tag "starter"
-    }
+    record = build_text_record(pdf_path, text, pokemon, generation, types)
 
     vector = embed_text(record["text"])
     metadata = {
@@ -116,17 +132,7 @@ def ingest_txt(
     )
 
     text = txt_path.read_text(encoding="utf-8")
-
-    record = {
-        "id": txt_path.stem,
-        "modality": "text",
-        "source_path": str(txt_path),
-        "text": text.strip(),
-        "pokemon": pokemon,
-        "generation": generation,
-        "types": types,
-        "tags": ["starter", pokemon.lower()],
-    }
+    record = build_text_record(txt_path, text.strip(), pokemon, generation, types)
 
     vector = embed_text(record["text"])
     metadata = {
@@ -0,0 +1,358 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from ingestion.audio_segments import SAMPLE_RATE, segment_audio, segment_samples
+from ingestion.transcription_backends import TranscriptionBackend, load_backend
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+# Inference engine (see transcription_backends.BACKENDS): "whisper" is the
+# float32 reference, "whisper-int8" and "faster-whisper" trade a little
+# accuracy for speed on CPU. scripts/benchmark_transcription.py measures both.
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "whisper")
+# Each worker holds its own model: whisper installs decoding hooks on the
+# model it is running, so one model cannot serve two threads at once. Two
+# workers let the segments of a file decode in parallel at the cost of a
+# second copy of the model in memory; set 1 on small machines.
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", str(min(2, os.cpu_count() or 1))))
+# torch intra-op threads; 0 splits the cores evenly between the workers.
+WHISPER_TORCH_THREADS = int(os.getenv("WHISPER_TORCH_THREADS", "0"))
+# Load the model when the API starts instead of inside the first request.
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "1") == "1"
+# A worker whose model failed to load tries again on a request arriving at
+# least this long after the last attempt; requests in between fail fast.
+WHISPER_LOAD_RETRY_SECONDS = float(os.getenv("WHISPER_LOAD_RETRY_SECONDS", "30"))
+
+WARMUP_SECONDS = 1.0
+
+_STOP = object()
+
+
+def load_audio(path: str) -> np.ndarray:
+    """Decode any ffmpeg-readable file to 16 kHz mono float32."""
+    import whisper
+
+    return whisper.load_audio(path)
+
+
+@dataclass
+class _Request:
+    label: str
+    audio: np.ndarray
+    future: "Future[str]"
+    enqueued_at: float
+
+
+class TranscriptionService:
+    """
+    Resident Whisper workers fed from one queue.
+
+    start() launches the workers; each loads its model and runs a short
+    warmup decode before taking requests, so no request pays the load.
+    transcribe_file() decodes a file once, cuts it into speech segments
+    (see audio_segments), queues every segment so idle workers transcribe
+    them in parallel, and stitches the text back in order with timestamps.
+    stats() reports queue depth and the real-time factor (processing
+    seconds per second of audio), per worker and per file wall time.
+    """
+
+    def __init__(
+        self,
+        workers: int = WHISPER_WORKERS,
+        load_backend: Optional[Callable[[], TranscriptionBackend]] = None,
+        load_audio: Callable[[str], np.ndarray] = load_audio,
+        torch_threads: int = WHISPER_TORCH_THREADS,
+    ):
+        self.workers = max(1, workers)
+        self._load_backend = load_backend or self._default_backend
+        self._load_audio = load_audio
+        self._torch_threads = torch_threads
+        self.threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._ready = threading.Event()
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self.load_error: Optional[str] = None
+        self.completed = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.files = 0
+        self.file_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _default_backend(self) -> TranscriptionBackend:
+        return load_backend(WHISPER_BACKEND, WHISPER_MODEL, cpu_threads=self.threads)
+
+    def _tune_torch(self) -> None:
+        try:
+            import torch
+
+            # Process-wide; sized so the workers together use every core once.
+            torch.set_num_threads(self.threads)
+        except ImportError:
+            return
+        logger.info(
+            "Transcription torch threads set",
+            extra={"threads": self.threads, "workers": self.workers},
+        )
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._tune_torch()
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"whisper-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the workers. Requests already being transcribed finish; those
+        still queued are cancelled, so their callers see CancelledError.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        cancelled = 0
+        stops = []
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                # Left by an earlier stop() whose join timed out.
+                stops.append(request)
+            elif request.future.cancel():
+                cancelled += 1
+        if cancelled:
+            logger.info(
+                "Transcription stopped with requests queued",
+                extra={"cancelled": cancelled},
+            )
+        for sentinel in [*stops, *(_STOP for _ in threads)]:
+            self._queue.put(sentinel)
+        for thread in threads:
+            thread.join(timeout)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _load(self) -> Optional[TranscriptionBackend]:
+        started = time.perf_counter()
+        try:
+            backend = self._load_backend()
+            backend.transcribe(
+                np.zeros(int(SAMPLE_RATE * WARMUP_SECONDS), dtype=np.float32)
+            )
+        except Exception as e:
+            logger.exception("Loading the transcription model failed")
+            with self._lock:
+                self.load_error = f"{type(e).__name__}: {e}"
+            return None
+        logger.info(
+            "Transcription worker ready",
+            extra={
+                "model_name": WHISPER_MODEL,
+                "backend": WHISPER_BACKEND,
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+        )
+        with self._lock:
+            self.load_error = None
+        return backend
+
+    def _worker(self) -> None:
+        backend = self._load()
+        last_attempt = time.monotonic()
+        with self._lock:
+            self._loaded += 1
+            if self._loaded == self.workers:
+                self._ready.set()
+
+        while True:
+            request = self._queue.get()
+            if request is _STOP:
+                return
+            if backend is None and (
+                time.monotonic() - last_attempt >= WHISPER_LOAD_RETRY_SECONDS
+            ):
+                backend = self._load()
+                last_attempt = time.monotonic()
+            if backend is None:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(
+                        RuntimeError(
+                            f"Transcription model failed to load: {self.load_error}"
+                        )
+                    )
+                continue
+            self._handle(backend, request)
+
+    def _handle(self, backend: TranscriptionBackend, request: _Request) -> None:
+        if not request.future.set_running_or_notify_cancel():
+            return
+        started = time.perf_counter()
+        try:
+            text = backend.transcribe(request.audio)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            request.future.set_exception(e)
+            return
+
+        elapsed = time.perf_counter() - started
+        duration = len(request.audio) / SAMPLE_RATE
+        with self._lock:
+            self.completed += 1
+            self.audio_seconds += duration
+            self.processing_seconds += elapsed
+            self.wait_seconds += started - request.enqueued_at
+        logger.debug(
+            "Transcription segment finished",
+            extra={
+                "label": request.label,
+                "audio_seconds": round(duration, 2),
+                "seconds": round(elapsed, 3),
+                "queue_depth": self._queue.qsize(),
+            },
+        )
+        request.future.set_result(text)
+
+    def submit_audio(self, audio: np.ndarray, label: str = "") -> "Future[str]":
+        """Queue 16 kHz samples; the future resolves to their raw text."""
+        self.start()
+        future: "Future[str]" = Future()
+        self._queue.put(_Request(label, audio, future, time.perf_counter()))
+        return future
+
+    def transcribe_file(
+        self, path: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcript of `path`: {"text", "duration", "segments"}, where each
+        segment is {"start", "end", "text"} in seconds from the file start.
+        Only speech is transcribed: silence around and between the speech
+        regions of a segment is left out.
+        """
+        started = time.perf_counter()
+        audio = self._load_audio(path)
+        spans = segment_audio(audio, SAMPLE_RATE)
+        futures = [
+            self.submit_audio(
+                segment_samples(audio, segment),
+                label=f"{path}@{segment[0][0] / SAMPLE_RATE:.1f}",
+            )
+            for segment in spans
+        ]
+
+        segments: List[Dict[str, Any]] = []
+        try:
+            for segment, future in zip(spans, futures):
+                text = future.result(timeout).strip()
+                if text:
+                    segments.append(
+                        {
+                            "start": round(segment[0][0] / SAMPLE_RATE, 2),
+                            "end": round(segment[-1][1] / SAMPLE_RATE, 2),
+                            "text": text,
+                        }
+                    )
+        finally:
+            for future in futures:
+                future.cancel()
+
+        elapsed = time.perf_counter() - started
+        duration = len(audio) / SAMPLE_RATE
+        speech = (
+            sum(end - start for segment in spans for start, end in segment)
+            / SAMPLE_RATE
+        )
+        with self._lock:
+            self.files += 1
+            self.file_seconds += duration
+            self.speech_seconds += speech
+            self.wall_seconds += elapsed
+        logger.info(
+            "Transcription finished",
+            extra={
+                "path": path,
+                "audio_seconds": round(duration, 2),
+                "speech_seconds": round(speech, 2),
+                "segments": len(spans),
+                "seconds": round(elapsed, 3),
+                "rtf": round(elapsed / duration, 3) if duration else None,
+                "queue_depth": self._queue.qsize(),
+            },
+        )
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "duration": round(duration, 2),
+            "segments": segments,
+        }
+
+    def transcribe(self, path: str, timeout: Optional[float] = None) -> str:
+        """Transcription text of `path`, produced by the resident workers."""
+        return self.transcribe_file(path, timeout)["text"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rtf = (
+                self.processing_seconds / self.audio_seconds
+                if self.audio_seconds
+                else None
+            )
+            return {
+                "model": WHISPER_MODEL,
+                "backend": WHISPER_BACKEND,
+                "workers": self.workers,
+                "ready": self._ready.is_set(),
+                "load_error": self.load_error,
+                "queue_depth": self._queue.qsize(),
+                "completed": self.completed,
+                "failed": self.failed,
+                "audio_seconds": round(self.audio_seconds, 2),
+                "processing_seconds": round(self.processing_seconds, 3),
+                "real_time_factor": round(rtf, 3) if rtf is not None else None,
+                "mean_wait_seconds": (
+                    round(self.wait_seconds / self.completed, 3)
+                    if self.completed
+                    else None
+                ),
+                "files": self.files,
+                "file_seconds": round(self.file_seconds, 2),
+                "trimmed_seconds": round(self.file_seconds - self.speech_seconds, 2),
+                "wall_real_time_factor": (
+                    round(self.wall_seconds / self.file_seconds, 3)
+                    if self.file_seconds
+                    else None
+                ),
+            }
+
+
+_service: Optional[TranscriptionService] = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service() -> TranscriptionService:
+    global _service
+
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TranscriptionService()
+    return _service
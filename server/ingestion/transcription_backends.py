@@ -0,0 +1,143 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# CTranslate2 weight type for the faster-whisper backend: int8, int8_float32,
+# float32, ...
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+
+
+class TranscriptionBackend(ABC):
+    """Turns 16 kHz mono float32 samples into text."""
+
+    name = ""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray) -> str:
+        """Raw text of `audio`, as the engine returns it."""
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper in float32 on CPU: the reference, and the slowest."""
+
+    name = "whisper"
+
+    def __init__(self, model_name: str, model: Any = None, cpu_threads: int = 0):
+        if model is None:
+            import whisper
+
+            model = whisper.load_model(model_name, device="cpu")
+        self.model_name = model_name
+        self.model = model
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        return self.model.transcribe(audio, fp16=False)["text"]
+
+
+def quantize_whisper(model: Any) -> Any:
+    """
+    Dynamic int8 quantization of every linear layer of a whisper model
+    (attention projections and MLPs, the bulk of the decoder's work).
+    Weights are stored as int8 and activations quantized on the fly, so no
+    calibration data is needed. whisper's own Linear subclass is swapped
+    for a plain nn.Linear first, as torch only quantizes the exact type.
+    """
+    import torch
+    from torch import nn
+
+    def plain_linears(module: nn.Module) -> None:
+        for name, child in module.named_children():
+            if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+                linear = nn.Linear(
+                    child.in_features, child.out_features, bias=child.bias is not None
+                )
+                linear.weight = child.weight
+                linear.bias = child.bias
+                setattr(module, name, linear)
+            else:
+                plain_linears(child)
+
+    plain_linears(model)
+    return torch.ao.quantization.quantize_dynamic(
+        model.eval(), {nn.Linear}, dtype=torch.qint8
+    )
+
+
+class WhisperInt8Backend(WhisperBackend):
+    """openai-whisper with int8 dynamically quantized linear layers."""
+
+    name = "whisper-int8"
+
+    def __init__(self, model_name: str, model: Any = None, cpu_threads: int = 0):
+        super().__init__(model_name, model)
+        self.model = quantize_whisper(self.model)
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    CTranslate2 engine via the optional faster-whisper package, int8 on CPU
+    by default. Same model names as openai-whisper.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(
+        self,
+        model_name: str,
+        model: Any = None,
+        cpu_threads: int = 0,
+        compute_type: str = FASTER_WHISPER_COMPUTE_TYPE,
+    ):
+        if model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise RuntimeError(
+                    "The faster-whisper backend needs `pip install faster-whisper`"
+                ) from e
+            model = WhisperModel(
+                model_name,
+                device="cpu",
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+            )
+        self.model_name = model_name
+        self.model = model
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        # Greedy decoding, like openai-whisper's default.
+        segments, _ = self.model.transcribe(audio, beam_size=1)
+        return "".join(segment.text for segment in segments)
+
+
+BACKENDS: Dict[str, Callable[..., TranscriptionBackend]] = {
+    WhisperBackend.name: WhisperBackend,
+    WhisperInt8Backend.name: WhisperInt8Backend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def backend_fingerprint(name: str) -> str:
+    """Changes with any backend setting that changes the text produced."""
+    if name == FasterWhisperBackend.name:
+        return f"{name}-{FASTER_WHISPER_COMPUTE_TYPE}"
+    return name
+
+
+def load_backend(
+    name: str, model_name: str, cpu_threads: int = 0, model: Optional[Any] = None
+) -> TranscriptionBackend:
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown transcription backend {name!r}; choose one of {sorted(BACKENDS)}"
+        )
+    logger.info(
+        "Loading transcription backend",
+        extra={"backend": name, "model_name": model_name},
+    )
+    return BACKENDS[name](model_name, model=model, cpu_threads=cpu_threads)
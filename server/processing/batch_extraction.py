@@ -0,0 +1,315 @@
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import openai_client
+
+from processing import entity_extraction
+from processing.fragments import merge_fragments
+from processing.gazetteer import get_gazetteer
+from processing.jobs import raise_if_cancelled
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOB_DIR = Path(os.getenv("EXTRACTION_BATCH_DIR", "data/batches"))
+BATCH_POLL_SECONDS = float(os.getenv("EXTRACTION_BATCH_POLL_SECONDS", "30"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_BATCH_TIMEOUT_SECONDS", "86400"))
+# "openai" for the Batch API, "local" for the offline stand-in (its empty
+# answers are used for the graph being built only, never cached).
+BATCH_EXECUTOR = os.getenv("EXTRACTION_BATCH_EXECUTOR", "openai")
+
+BATCH_ENDPOINT = "/v1/responses"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# (custom_id, response text or None when that request failed)
+BatchResult = Tuple[str, Optional[str]]
+
+
+def write_batch_job(path: Path, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """Write (custom_id, body) pairs as a Batch API input file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        for custom_id, body in requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }
+            f.write(json.dumps(line, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _response_text(body: Dict[str, Any]) -> Optional[str]:
+    for item in body.get("output") or []:
+        for content in item.get("content") or []:
+            if content.get("type", "output_text") == "output_text":
+                return content.get("text")
+    return None
+
+
+def parse_batch_output(lines: Iterable[str]) -> Iterator[BatchResult]:
+    """Read a Batch API output file, yielding (custom_id, response text)."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        text = None
+        if not entry.get("error") and response.get("status_code") == 200:
+            text = _response_text(response.get("body") or {})
+        yield entry["custom_id"], text
+
+
+class BatchExecutor(ABC):
+    """
+    Submits a batch job file and hands back the results once it is done.
+    Results of an executor that is not `cacheable` are not real model
+    output, so they never enter the extraction cache or the graph manifest.
+    """
+
+    cacheable = True
+
+    @abstractmethod
+    def submit(self, job_path: Path) -> str:
+        """Start a batch job for the requests in `job_path`; return its ID."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Batch API status of the job, e.g. "in_progress" or "completed"."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        """(custom_id, response text or None) for each request of a done job."""
+
+
+class OpenAIBatchExecutor(BatchExecutor):
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        self.client = client or openai_client
+        self.completion_window = completion_window
+
+    def submit(self, job_path: Path) -> str:
+        with job_path.open("rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return
+        content = self.client.files.content(batch.output_file_id)
+        yield from parse_batch_output(content.text.splitlines())
+
+
+def empty_response(body: Dict[str, Any]) -> str:
+    """Offline stand-in answer: a schema-valid fragment with nothing in it."""
+    return json.dumps({field: [] for field in entity_extraction.FRAGMENT_KEYS})
+
+
+class LocalBatchExecutor(BatchExecutor):
+    """
+    In-process stand-in for the Batch API, for tests and offline runs
+    (EXTRACTION_BATCH_EXECUTOR=local).
+    submit() answers every request with `respond(body) -> response text` and
+    writes an output file in the Batch API format next to the job, so the
+    whole flow runs offline. Its answers are not cached unless `cacheable`.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[Dict[str, Any]], str] = empty_response,
+        cacheable: bool = False,
+    ):
+        self.respond = respond
+        self.cacheable = cacheable
+        self._outputs: Dict[str, Path] = {}
+
+    def submit(self, job_path: Path) -> str:
+        batch_id = f"local_{uuid.uuid4().hex}"
+        output_path = job_path.with_suffix(".output.jsonl")
+        with job_path.open("r", encoding="utf-8") as src, output_path.open(
+            "w", encoding="utf-8"
+        ) as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                entry: Dict[str, Any] = {"custom_id": request["custom_id"]}
+                try:
+                    text = self.respond(request["body"])
+                    entry["response"] = {
+                        "status_code": 200,
+                        "body": {
+                            "output": [
+                                {
+                                    "type": "message",
+                                    "content": [{"type": "output_text", "text": text}],
+                                }
+                            ]
+                        },
+                    }
+                    entry["error"] = None
+                except Exception as e:
+                    entry["response"] = None
+                    entry["error"] = {"message": str(e)}
+                out.write(json.dumps(entry, ensure_ascii=False))
+                out.write("\n")
+        self._outputs[batch_id] = output_path
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        with self._outputs[batch_id].open("r", encoding="utf-8") as f:
+            yield from parse_batch_output(f)
+
+
+BATCH_EXECUTORS: Dict[str, Callable[[], BatchExecutor]] = {
+    "openai": OpenAIBatchExecutor,
+    "local": LocalBatchExecutor,
+}
+
+
+def get_batch_executor() -> BatchExecutor:
+    if BATCH_EXECUTOR not in BATCH_EXECUTORS:
+        raise ValueError(
+            f"Unknown batch executor {BATCH_EXECUTOR!r}; "
+            f"choose one of {sorted(BATCH_EXECUTORS)}"
+        )
+    return BATCH_EXECUTORS[BATCH_EXECUTOR]()
+
+
+def _wait(executor: BatchExecutor, batch_id: str, poll_seconds: float) -> str:
+    deadline = time.monotonic() + BATCH_TIMEOUT_SECONDS
+    while True:
+        status = executor.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            return status
+        raise_if_cancelled()
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Extraction batch {batch_id} still {status}")
+        logger.info(
+            "Waiting for extraction batch",
+            extra={"batch_id": batch_id, "status": status},
+        )
+        time.sleep(poll_seconds)
+
+
+def extract_entities_batch(
+    records: List[Dict[str, Any]],
+    executor: Optional[BatchExecutor] = None,
+    job_dir: Optional[Path] = None,
+    poll_seconds: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extract processed records through one batch job; returns one fragment
+    per record, in input order.
+
+    Records the gazetteer resolves and chunks already in the extraction
+    cache are not submitted. Each remaining chunk becomes one request line;
+    chunk fragments are merged per record as extract_entities would. Lines
+    the batch failed are retried interactively with extract_entities.
+    """
+    executor = executor or get_batch_executor()
+    job_dir = job_dir or BATCH_JOB_DIR
+    poll_seconds = BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+
+    gazetteer = get_gazetteer()
+    cache = entity_extraction.get_extraction_cache()
+
+    resolved: Dict[int, Dict[str, Any]] = {}
+    chunk_keys: Dict[int, List[str]] = {}
+    bodies: Dict[str, Dict[str, Any]] = {}
+    for i, record in enumerate(records):
+        text, media_id = record.get("text", ""), record["id"]
+        hint = record.get("pokemon")
+        fragment = gazetteer.extract(text, media_id, hint) if gazetteer else None
+        if fragment is not None:
+            resolved[i] = fragment
+            continue
+        requests = entity_extraction.extraction_requests(text, media_id, hint)
+        chunk_keys[i] = [key for key, _ in requests]
+        bodies.update(requests)
+
+    fragments: Dict[str, Dict[str, Any]] = {}
+    if cache is not None and bodies:
+        for key, blob in cache.get_many(bodies).items():
+            fragments[key] = json.loads(blob)
+    pending = {key: body for key, body in bodies.items() if key not in fragments}
+
+    if pending:
+        custom_ids = {f"req-{n}": key for n, key in enumerate(pending)}
+        job_path = job_dir / f"extract-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        write_batch_job(
+            job_path,
+            ((custom_id, pending[key]) for custom_id, key in custom_ids.items()),
+        )
+        batch_id = executor.submit(job_path)
+        logger.info(
+            "Submitted extraction batch",
+            extra={
+                "batch_id": batch_id,
+                "requests": len(pending),
+                "job": str(job_path),
+            },
+        )
+
+        status = _wait(executor, batch_id, poll_seconds)
+        fresh: Dict[str, bytes] = {}
+        for custom_id, text in executor.results(batch_id):
+            key = custom_ids.get(custom_id)
+            if key is None or text is None:
+                continue
+            try:
+                fragment = entity_extraction.parse_fragment(text)
+            except ValueError:
+                continue
+            fragments[key] = fragment
+            fresh[key] = json.dumps(fragment, ensure_ascii=False).encode("utf-8")
+        if cache is not None and executor.cacheable:
+            cache.set_many(fresh)
+
+        logger.info(
+            "Extraction batch finished",
+            extra={
+                "batch_id": batch_id,
+                "status": status,
+                "requests": len(pending),
+                "succeeded": len(fresh),
+            },
+        )
+
+    results: List[Dict[str, Any]] = []
+    for i, record in enumerate(records):
+        if i in resolved:
+            results.append(resolved[i])
+        elif all(key in fragments for key in chunk_keys[i]):
+            results.append(merge_fragments(fragments[k] for k in chunk_keys[i]))
+        else:
+            # Looked up on the module at call time so tests can patch it.
+            results.append(
+                entity_extraction.extract_entities(
+                    text=record.get("text", ""),
+                    media_id=record["id"],
+                    pokemon_hint=record.get("pokemon"),
+                )
+            )
+    return results
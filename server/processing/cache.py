@@ -0,0 +1,147 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters is 999 on older builds.
+_SQL_CHUNK = 500
+
+
+def _chunks(items: List[str], size: int = _SQL_CHUNK) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class SqliteCache:
+    """
+    Small on-disk key/value cache backed by a single SQLite file.
+
+    Values are opaque bytes. The total stored size is kept under max_bytes
+    by evicting the least recently used entries after every write.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, bytes] = {}
+        now = time.time()
+
+        with self._lock:
+            for chunk in _chunks(unique):
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = bytes(value)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE entries SET last_access = ? WHERE key IN ({marks})",
+                        [now, *chunk],
+                    )
+
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+
+        return found
+
+    def set(self, key: str, value: bytes) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        if not items:
+            return
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(k, v, len(v), now) for k, v in items.items()],
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        to_free = total - self.max_bytes
+        victims: List[str] = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ):
+            victims.append(key)
+            to_free -= size
+            if to_free <= 0:
+                break
+
+        for chunk in _chunks(victims):
+            marks = ",".join("?" * len(chunk))
+            self._conn.execute(f"DELETE FROM entries WHERE key IN ({marks})", chunk)
+        self.evictions += len(victims)
+
+        logger.debug(
+            "SqliteCache evicted entries",
+            extra={"path": str(self.path), "evicted": len(victims)},
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
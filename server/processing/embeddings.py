@@ -1,13 +1,210 @@
-from typing import List
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from config import openai_client
+import numpy as np
+from config import EMBED_DIM, openai_client
+
+from processing.cache import SqliteCache
+
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL = "text-embedding-3-small"
+MAX_EMBED_CHARS = 3000
+
+# OpenAI accepts up to 2048 inputs and ~300k tokens per embeddings request.
+# Characters are used as a cheap upper bound on tokens.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_BATCH_MAX_CHARS = int(os.getenv("EMBED_BATCH_MAX_CHARS", "300000"))
+
+# How long embed_text waits for other concurrent callers before sending a
+# request. 0 disables coalescing and sends every call on its own.
+EMBED_COALESCE_WINDOW_MS = float(os.getenv("EMBED_COALESCE_WINDOW_MS", "10"))
+
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", "data/cache/embeddings.sqlite"))
+EMBED_CACHE_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", str(512 * 1024**2)))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_embedding_cache: Optional[SqliteCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def _prepare(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if len(text) > MAX_EMBED_CHARS:
+        text = text[:MAX_EMBED_CHARS]
+    return text
+
+
+def _cache_key(prepared: str) -> str:
+    digest = hashlib.sha256(prepared.encode("utf-8")).hexdigest()
+    return f"{EMBED_MODEL}:{EMBED_DIM}:{digest}"
+
+
+def get_embedding_cache() -> Optional[SqliteCache]:
+    global _embedding_cache
+
+    if not EMBED_CACHE_ENABLED:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = SqliteCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_BYTES)
+    return _embedding_cache
+
+
+def embedding_cache_stats() -> Dict[str, int]:
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _iter_batches(texts: List[str]) -> Iterator[List[str]]:
+    batch: List[str] = []
+    batch_chars = 0
+    for text in texts:
+        if batch and (
+            len(batch) >= EMBED_BATCH_SIZE
+            or batch_chars + len(text) > EMBED_BATCH_MAX_CHARS
+        ):
+            yield batch
+            batch = []
+            batch_chars = 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        yield batch
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed many texts, packing them into as few provider requests as the
+    batch limits allow. Results are returned in input order.
+
+    Texts already in the embedding cache, or repeated within the call, are
+    only sent to the provider once.
+    """
+    prepared = [_prepare(t) for t in texts]
+    keys = [_cache_key(p) for p in prepared]
+
+    cache = get_embedding_cache()
+    found: Dict[str, List[float]] = {}
+    if cache is not None:
+        for key, blob in cache.get_many(keys).items():
+            found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+    missing = {k: p for k, p in zip(keys, prepared) if k not in found}
+    missing_keys = list(missing)
+    missing_texts = list(missing.values())
+    fresh: List[List[float]] = []
+
+    for batch in _iter_batches(missing_texts):
+        resp = openai_client.embeddings.create(
+            model=EMBED_MODEL,
+            input=batch,
+        )
+        ordered = sorted(resp.data, key=lambda d: d.index)
+        fresh.extend(d.embedding for d in ordered)
+
+        logger.debug(
+            "embed_texts batch finished",
+            extra={"batch_size": len(batch)},
+        )
+
+    found.update(zip(missing_keys, fresh))
+    if cache is not None and fresh:
+        cache.set_many(
+            {
+                k: np.asarray(v, dtype=np.float32).tobytes()
+                for k, v in zip(missing_keys, fresh)
+            }
+        )
+
+    return [found[k] for k in keys]
+
+
+class _EmbeddingCoalescer:
+    """
+    Gathers embed_text calls made from different threads within a short
+    window and sends them to the provider as a single embed_texts batch.
+    """
+
+    def __init__(self, window_s: float, max_batch: int):
+        self._window_s = window_s
+        self._max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+
+    def submit(self, text: str) -> "Future[List[float]]":
+        future: "Future[List[float]]" = Future()
+        ready: List[Tuple[str, Future]] = []
+
+        with self._lock:
+            self._pending.append((text, future))
+            if len(self._pending) >= self._max_batch:
+                ready = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._window_s, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if ready:
+            self._run(ready)
+        return future
+
+    def _take(self) -> List[Tuple[str, Future]]:
+        pending = self._pending
+        self._pending = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return pending
+
+    def _flush(self) -> None:
+        with self._lock:
+            ready = self._take()
+        if ready:
+            self._run(ready)
+
+    def _run(self, batch: List[Tuple[str, Future]]) -> None:
+        try:
+            vectors = embed_texts([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+
+_coalescer: Optional[_EmbeddingCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def _get_coalescer() -> _EmbeddingCoalescer:
+    global _coalescer
+
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = _EmbeddingCoalescer(
+                    window_s=EMBED_COALESCE_WINDOW_MS / 1000.0,
+                    max_batch=EMBED_BATCH_SIZE,
+                )
+    return _coalescer
 
 
 def embed_text(text: str) -> List[float]:
-    if len(text) > 3000:
-        text = text[:3000]
-    resp = openai_client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text,
-    )
-    return resp.data[0].embedding
+    if EMBED_COALESCE_WINDOW_MS <= 0:
+        return embed_texts([text])[0]
+    return _get_coalescer().submit(text).result()
@@ -1,13 +1,150 @@
+import hashlib
 import json
 import logging
-from typing import Any, Union, cast
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast
 
 from config import openai_client
 
-from processing.graph_schema import JSON_GRAPH_SCHEMA
+from processing.cache import SqliteCache
+from processing.fragments import merge_fragments
+from processing.graph_schema import JSON_GRAPH_SCHEMA, PACKED_JSON_GRAPH_SCHEMA
+from processing.tokens import TOKENIZER_ENCODING, count_tokens, split_text
 
 logger = logging.getLogger(__name__)
 
+EXTRACTION_MODEL = "gpt-4o-mini"
+EXTRACTION_TEMPERATURE = 0.1
+
+SYSTEM_PROMPT = (
+    "You extract structured Pokémon knowledge graph data from text. "
+    "Return ONLY a single JSON object with the following top-level keys: "
+    "'pokemon_nodes', 'type_nodes', 'pokemon_type_edges', "
+    "'evolution_edges', 'mentions_edges'. "
+    "Do not include explanations, comments, or any text outside the JSON object."
+)
+
+PACKED_SYSTEM_PROMPT = (
+    "You extract structured Pokémon knowledge graph data from several "
+    "independent documents. Return ONLY a single JSON object with a "
+    "'documents' array holding one entry per input document, each with its "
+    "'media_id' and the keys 'pokemon_nodes', 'type_nodes', "
+    "'pokemon_type_edges', 'evolution_edges', 'mentions_edges' for that "
+    "document alone. "
+    "Do not include explanations, comments, or any text outside the JSON object."
+)
+
+FRAGMENT_KEYS = (
+    "pokemon_nodes",
+    "type_nodes",
+    "pokemon_type_edges",
+    "evolution_edges",
+    "mentions_edges",
+)
+
+# Pack short documents into one request, up to this many prompt tokens or
+# documents. Longer documents are always sent on their own.
+EXTRACTION_PACKING = os.getenv("EXTRACTION_PACKING", "0") == "1"
+EXTRACTION_PACK_MAX_TOKENS = int(os.getenv("EXTRACTION_PACK_MAX_TOKENS", "4000"))
+EXTRACTION_PACK_MAX_DOCS = int(os.getenv("EXTRACTION_PACK_MAX_DOCS", "16"))
+
+# Documents longer than this are extracted chunk by chunk, in parallel, and
+# the chunk fragments merged.
+EXTRACTION_CHUNK_TOKENS = int(os.getenv("EXTRACTION_CHUNK_TOKENS", "3000"))
+EXTRACTION_CHUNK_OVERLAP_TOKENS = int(
+    os.getenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", "150")
+)
+EXTRACTION_CHUNK_CONCURRENCY = int(os.getenv("EXTRACTION_CHUNK_CONCURRENCY", "4"))
+
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "1") == "1"
+EXTRACTION_CACHE_PATH = Path(
+    os.getenv("EXTRACTION_CACHE_PATH", "data/cache/extractions.sqlite")
+)
+EXTRACTION_CACHE_MAX_BYTES = int(
+    os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024**2))
+)
+
+_extraction_cache: Optional[SqliteCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def extraction_fingerprint() -> str:
+    """Hash of everything besides the input that shapes a response."""
+    spec = json.dumps(
+        {
+            "model": EXTRACTION_MODEL,
+            "temperature": EXTRACTION_TEMPERATURE,
+            "system": SYSTEM_PROMPT,
+            "packed_system": PACKED_SYSTEM_PROMPT,
+            "schema": JSON_GRAPH_SCHEMA,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+
+
+def fragment_fingerprint() -> str:
+    """
+    extraction_fingerprint plus the settings that decide how a record is cut
+    into requests (chunking and packing). A record's fragment depends on
+    both; a cached response only on the former, as its key covers the text.
+    """
+    spec = json.dumps(
+        [
+            extraction_fingerprint(),
+            EXTRACTION_CHUNK_TOKENS,
+            EXTRACTION_CHUNK_OVERLAP_TOKENS,
+            TOKENIZER_ENCODING,
+            EXTRACTION_PACKING,
+            EXTRACTION_PACK_MAX_TOKENS if EXTRACTION_PACKING else None,
+            EXTRACTION_PACK_MAX_DOCS if EXTRACTION_PACKING else None,
+        ]
+    )
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_key(user_content: str) -> str:
+    # The rendered prompt covers the text, the media ID (which ends up in
+    # mentions_edges) and the hint, plus any change to the prompt template.
+    digest = hashlib.sha256(user_content.encode("utf-8")).hexdigest()
+    return f"{EXTRACTION_MODEL}:{extraction_fingerprint()}:{digest}"
+
+
+def get_extraction_cache() -> Optional[SqliteCache]:
+    global _extraction_cache
+
+    if not EXTRACTION_CACHE_ENABLED:
+        return None
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = SqliteCache(
+                    EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES
+                )
+    return _extraction_cache
+
+
+def extraction_cache_stats() -> Dict[str, int]:
+    cache = get_extraction_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _user_content(text: str, media_id: str, pokemon_hint: Union[str, None]) -> str:
+    user_content = (
+        f"Media ID: {media_id}\n\n"
+        f"Text:\n{text}\n\n"
+        "Extract Pokémon entities, their types, evolutions, and cross-references "
+        "to other Pokémon mentioned in this text."
+    )
+
+    if pokemon_hint:
+        user_content += f"\n\nPrimary Pokémon for this media is: {pokemon_hint}."
+    return user_content
+
 
 def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] = None):
     """
@@ -20,53 +157,207 @@ def extract_entities(text: str, media_id: str, pokemon_hint: Union[str, None] =
     - pokemon_type_edges
     - evolution_edges
     - mentions_edges
+
+    Long texts are split into chunks of about EXTRACTION_CHUNK_TOKENS that
+    are extracted in parallel and merged, so latency is bounded by the
+    slowest chunk. Results are cached on disk per chunk, so unchanged
+    records are not sent again.
     """
-    system_msg = (
-        "You extract structured Pokémon knowledge graph data from text. "
-        "Return ONLY a single JSON object with the following top-level keys: "
-        "'pokemon_nodes', 'type_nodes', 'pokemon_type_edges', "
-        "'evolution_edges', 'mentions_edges'. "
-        "Do not include explanations, comments, or any text outside the JSON object."
+    chunks = split_text(text, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP_TOKENS)
+    if len(chunks) == 1:
+        return _extract_chunk(text, media_id, pokemon_hint)
+
+    workers = max(1, min(EXTRACTION_CHUNK_CONCURRENCY, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk") as pool:
+        fragments = list(
+            pool.map(
+                lambda chunk: _extract_chunk(chunk, media_id, pokemon_hint), chunks
+            )
+        )
+
+    logger.debug(
+        "extract_entities merged chunks",
+        extra={"media_id": media_id, "chunks": len(chunks)},
     )
-    user_content = (
-        f"Media ID: {media_id}\n\n"
-        f"Text:\n{text}\n\n"
-        "Extract Pokémon entities, their types, evolutions, and cross-references "
-        "to other Pokémon mentioned in this text."
+    return merge_fragments(fragments)
+
+
+def _extract_chunk(
+    text: str, media_id: str, pokemon_hint: Union[str, None]
+) -> Dict[str, Any]:
+    user_content = _user_content(text, media_id, pokemon_hint)
+
+    cache = get_extraction_cache()
+    key = _cache_key(user_content)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    data = _fragment(
+        _create_response(
+            SYSTEM_PROMPT, user_content, JSON_GRAPH_SCHEMA, "PokemonGraphExtraction"
+        )
     )
 
-    if pokemon_hint:
-        user_content += f"\n\nPrimary Pokémon for this media is: {pokemon_hint}."
+    if cache is not None:
+        cache.set(key, json.dumps(data, ensure_ascii=False).encode("utf-8"))
 
-    response = openai_client.responses.create(
-        model="gpt-4o-mini",
-        input=[
-            {"role": "system", "content": system_msg},
+    return data
+
+
+def _request_body(
+    system_prompt: str, user_content: str, schema: Dict[str, Any], name: str
+) -> Dict[str, Any]:
+    return {
+        "model": EXTRACTION_MODEL,
+        "input": [
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content},
         ],
-        temperature=0.1,
-        text=cast(
-            Any,
-            {
-                "format": {
-                    "type": "json_schema",
-                    "name": "PokemonGraphExtraction",
-                    "strict": True,
-                    "schema": JSON_GRAPH_SCHEMA,
-                }
-            },
-        ),
+        "temperature": EXTRACTION_TEMPERATURE,
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": name,
+                "strict": True,
+                "schema": schema,
+            }
+        },
+    }
+
+
+def _create_response(
+    system_prompt: str, user_content: str, schema: Dict[str, Any], name: str
+) -> Dict[str, Any]:
+    body = _request_body(system_prompt, user_content, schema, name)
+    response = openai_client.responses.create(**cast(Any, body))
+    return json.loads(response.output[0].content[0].text)
+
+
+def extraction_requests(
+    text: str, media_id: str, pokemon_hint: Union[str, None] = None
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    (cache key, Responses API request body) for each chunk extract_entities
+    would send for this document, for callers that submit requests
+    themselves. Parse each response with parse_fragment and combine the
+    chunk fragments with merge_fragments.
+    """
+    requests = []
+    for chunk in split_text(
+        text, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP_TOKENS
+    ):
+        user_content = _user_content(chunk, media_id, pokemon_hint)
+        body = _request_body(
+            SYSTEM_PROMPT, user_content, JSON_GRAPH_SCHEMA, "PokemonGraphExtraction"
+        )
+        requests.append((_cache_key(user_content), body))
+    return requests
+
+
+def parse_fragment(response_text: str) -> Dict[str, Any]:
+    return _fragment(json.loads(response_text))
+
+
+# Placeholders the model sometimes writes instead of null.
+_NO_TYPE = {"", "none", "null", "n/a"}
+
+
+def _fragment(data: Dict[str, Any]) -> Dict[str, Any]:
+    fragment = {field: data.get(field) or [] for field in FRAGMENT_KEYS}
+    for node in fragment["pokemon_nodes"]:
+        for field in ("primary_type", "secondary_type"):
+            value = node.get(field)
+            if isinstance(value, str) and value.strip().lower() in _NO_TYPE:
+                node[field] = None
+    return fragment
+
+
+def _attributed_to(fragment: Dict[str, Any], media_id: str) -> bool:
+    """Whether every mentions edge of a packed fragment is from `media_id`."""
+    return all(
+        edge.get("from_media_id") == media_id for edge in fragment["mentions_edges"]
     )
 
-    data = json.loads(response.output[0].content[0].text)
 
-    for key in [
-        "pokemon_nodes",
-        "type_nodes",
-        "pokemon_type_edges",
-        "evolution_edges",
-        "mentions_edges",
-    ]:
-        data.setdefault(key, [])
+def document_tokens(document: Dict[str, Any]) -> int:
+    """Prompt tokens one document adds to a packed request."""
+    return count_tokens(
+        _user_content(
+            document.get("text", ""), document["media_id"], document.get("pokemon_hint")
+        )
+    )
 
-    return data
+
+def extract_entities_packed(
+    documents: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Extract several short documents with one Responses API call.
+
+    Each document is a dict with keys text, media_id and optional
+    pokemon_hint. Returns one fragment per document, in input order. Cached
+    documents are not sent; a document the response leaves out, or whose
+    mentions edges name another document, is retried on its own with
+    extract_entities. Callers keep each pack within
+    EXTRACTION_PACK_MAX_TOKENS and EXTRACTION_PACK_MAX_DOCS.
+    """
+    contents = [
+        _user_content(d.get("text", ""), d["media_id"], d.get("pokemon_hint"))
+        for d in documents
+    ]
+    keys = [_cache_key(c) for c in contents]
+
+    cache = get_extraction_cache()
+    found: Dict[str, Dict[str, Any]] = {}
+    if cache is not None:
+        for key, blob in cache.get_many(keys).items():
+            found[key] = json.loads(blob)
+
+    todo = [i for i, key in enumerate(keys) if key not in found]
+    if len(todo) == 1:
+        d = documents[todo[0]]
+        found[keys[todo[0]]] = extract_entities(
+            d.get("text", ""), d["media_id"], d.get("pokemon_hint")
+        )
+    elif todo:
+        user_content = "\n\n".join(
+            f"=== Document {n} ===\n{contents[i]}" for n, i in enumerate(todo, 1)
+        )
+        data = _create_response(
+            PACKED_SYSTEM_PROMPT,
+            user_content,
+            PACKED_JSON_GRAPH_SCHEMA,
+            "PokemonGraphPackedExtraction",
+        )
+        by_media_id = {
+            doc.get("media_id"): _fragment(doc) for doc in data.get("documents", [])
+        }
+
+        fresh: Dict[str, bytes] = {}
+        for i in todo:
+            d = documents[i]
+            fragment = by_media_id.get(d["media_id"])
+            if fragment is None or not _attributed_to(fragment, d["media_id"]):
+                logger.warning(
+                    "Packed extraction omitted or misattributed a document, "
+                    "retrying alone",
+                    extra={"media_id": d["media_id"]},
+                )
+                found[keys[i]] = extract_entities(
+                    d.get("text", ""), d["media_id"], d.get("pokemon_hint")
+                )
+                continue
+            found[keys[i]] = fragment
+            fresh[keys[i]] = json.dumps(fragment, ensure_ascii=False).encode("utf-8")
+
+        if cache is not None:
+            cache.set_many(fresh)
+
+        logger.debug(
+            "extract_entities_packed request finished",
+            extra={"documents": len(todo), "returned": len(by_media_id)},
+        )
+
+    return [found[key] for key in keys]
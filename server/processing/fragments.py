@@ -0,0 +1,52 @@
+from typing import Any, Dict, Iterable
+
+
+def merge_fragments(fragments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge extraction fragments into one graph. Later fragments win for node
+    attributes, except that a null attribute does not clear a known one;
+    edges are deduplicated and kept in first-seen order.
+    """
+    pokemon_nodes: Dict[str, Dict[str, Any]] = {}
+    type_nodes: Dict[str, Dict[str, Any]] = {}
+
+    # Dicts rather than sets: deduplicated, but iterated in insertion order.
+    pokemon_type_edges: Dict[tuple[str, str], None] = {}
+    evolution_edges: Dict[tuple[str, str], None] = {}
+    mentions_edges: Dict[tuple[str, str], None] = {}
+
+    for fragment in fragments:
+        for p in fragment["pokemon_nodes"]:
+            name = p["name"]
+            known = pokemon_nodes.get(name, {})
+            pokemon_nodes[name] = {
+                **p,
+                **{k: v for k, v in known.items() if p.get(k) is None},
+            }
+
+        for t in fragment["type_nodes"]:
+            type_name = t["name"]
+            type_nodes[type_name] = t
+
+        for e in fragment["pokemon_type_edges"]:
+            pokemon_type_edges[(e["from_pokemon"], e["to_type"])] = None
+
+        for e in fragment["evolution_edges"]:
+            evolution_edges[(e["from_pokemon"], e["to_pokemon"])] = None
+
+        for e in fragment["mentions_edges"]:
+            mentions_edges[(e["from_media_id"], e["to_pokemon"])] = None
+
+    return {
+        "pokemon_nodes": list(pokemon_nodes.values()),
+        "type_nodes": list(type_nodes.values()),
+        "pokemon_type_edges": [
+            {"from_pokemon": src, "to_type": dst} for (src, dst) in pokemon_type_edges
+        ],
+        "evolution_edges": [
+            {"from_pokemon": src, "to_pokemon": dst} for (src, dst) in evolution_edges
+        ],
+        "mentions_edges": [
+            {"from_media_id": src, "to_pokemon": dst} for (src, dst) in mentions_edges
+        ],
+    }
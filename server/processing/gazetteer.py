@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from data.pokemon_mappings import POKEMON_MAPPING
+from processing.name_matcher import NameMatcher, name_aliases, normalize_name
+
+GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "1") == "1"
+
+# Longer texts (e.g. whole PDFs) are likely to hold facts the mapping does
+# not cover, so they always go to the LLM.
+GAZETTEER_MAX_CHARS = int(os.getenv("GAZETTEER_MAX_CHARS", "2000"))
+
+# Wording that signals evolution facts, which the mapping does not hold.
+EVOLUTION_CUE_RE = re.compile(
+    r"\b(evolv\w*|evolution\w*|devolv\w*|pre-?evolution|level(?:s|ed)? up)\b",
+    re.IGNORECASE,
+)
+
+# Capitalized words of two or more letters: candidate names in a text.
+CAPITALIZED_WORD_RE = re.compile(r"\b[^\W\d_][^\W_]+")
+
+# Capitalized words that are not names: sentence openers, type names and
+# domain vocabulary. Any other capitalized word the mapping does not know
+# may be a Pokémon it cannot describe, so the text goes to the LLM.
+COMMON_WORDS = frozenset("""
+    a all also an and any are as at be but by can did do does each for from
+    has have he her here his how i if in is it its may more most my new no
+    not of on one only or our she so some that the their then there these
+    they this those to two was we were what when where which while who why
+    will with you your
+    pokémon pokemon pokédex pokedex type types generation gen region card
+    trainer wild ability abilities move moves attack level stats hp cry
+    normal fire water electric grass ice fighting poison ground flying
+    psychic bug rock ghost dragon dark steel fairy
+    """.split())
+
+MappingEntry = Tuple[str, int, Sequence[str]]
+
+
+def _type_name(raw: str) -> str:
+    return raw.strip().capitalize()
+
+
+class Gazetteer:
+    """
+    Deterministic extractor backed by the static Pokémon mapping.
+
+    For a record whose hint is a known Pokémon, extract() builds the same
+    fragment shape as extract_entities from the mapping plus a name scan of
+    the text: nodes and type edges for the hint and every known Pokémon
+    mentioned, and a mentions edge from the media to each of them. It
+    returns None when the text may hold facts the mapping cannot supply
+    (evolution wording, a missing or unknown hint, a capitalized word that
+    may be an unknown Pokémon, or a long text), and the caller falls back
+    to the LLM.
+    """
+
+    def __init__(self, mapping: Mapping[str, MappingEntry]):
+        self._entries: Dict[str, MappingEntry] = {}
+        for key, entry in mapping.items():
+            self._entries[normalize_name(key)] = entry
+            self._entries[normalize_name(entry[0])] = entry
+        self._matcher: NameMatcher[str] = NameMatcher(
+            (entry[0], entry[0]) for entry in mapping.values()
+        )
+        self._known_words = set(COMMON_WORDS)
+        for key, (name, _, types) in mapping.items():
+            for alias in name_aliases(key) | name_aliases(name):
+                self._known_words.update(alias.split())
+            self._known_words.update(normalize_name(t) for t in types)
+        spec = json.dumps(
+            {
+                "mapping": {k: [v[0], v[1], list(v[2])] for k, v in mapping.items()},
+                "max_chars": GAZETTEER_MAX_CHARS,
+                "cues": EVOLUTION_CUE_RE.pattern,
+                "common_words": sorted(COMMON_WORDS),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        self._fingerprint = hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes with the mapping or the fallback rules."""
+        return self._fingerprint
+
+    def lookup(self, name: Optional[str]) -> Optional[MappingEntry]:
+        if not name:
+            return None
+        return self._entries.get(normalize_name(name))
+
+    def unknown_names(self, text: str) -> List[str]:
+        """Capitalized words in `text` that are neither known names nor common."""
+        return [
+            word
+            for word in CAPITALIZED_WORD_RE.findall(text)
+            if word[0].isupper() and normalize_name(word) not in self._known_words
+        ]
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def extract(
+        self, text: str, media_id: str, pokemon_hint: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        primary = self.lookup(pokemon_hint)
+        if (
+            primary is None
+            or len(text) > GAZETTEER_MAX_CHARS
+            or EVOLUTION_CUE_RE.search(text)
+            or self.unknown_names(text)
+        ):
+            self._count(hit=False)
+            return None
+
+        names: List[str] = [primary[0]]
+        for name in self._matcher.find_all(text):
+            if name not in names:
+                names.append(name)
+
+        fragment: Dict[str, Any] = {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [],
+        }
+        seen_types: List[str] = []
+        for name in names:
+            entry = self.lookup(name)
+            assert entry is not None
+            _, generation, raw_types = entry
+            types = [_type_name(t) for t in raw_types]
+            fragment["pokemon_nodes"].append(
+                {
+                    "name": name,
+                    "generation": generation,
+                    "primary_type": types[0] if types else None,
+                    "secondary_type": types[1] if len(types) > 1 else None,
+                }
+            )
+            for type_name in types:
+                fragment["pokemon_type_edges"].append(
+                    {"from_pokemon": name, "to_type": type_name}
+                )
+                if type_name not in seen_types:
+                    seen_types.append(type_name)
+            fragment["mentions_edges"].append(
+                {"from_media_id": media_id, "to_pokemon": name}
+            )
+        fragment["type_nodes"] = [{"name": t} for t in seen_types]
+
+        self._count(hit=True)
+        return fragment
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    global _gazetteer
+
+    if not GAZETTEER_ENABLED:
+        return None
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(POKEMON_MAPPING)
+    return _gazetteer
@@ -0,0 +1,191 @@
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from processing.graph_index import EDGE_FIELDS
+
+# Layout (little-endian):
+#   magic (8 bytes) | version u32 | section count u32
+#   section table: (offset u64, nbytes u64) per section, in SECTIONS order
+#   section payloads, each aligned to 8 bytes
+MAGIC = b"PKDXGRPH"
+VERSION = 1
+
+SECTIONS = (
+    ("string_offsets", np.int64),
+    ("string_data", np.uint8),
+    ("pokemon_nodes", np.int32),  # rows of (name, generation, primary, secondary)
+    ("type_nodes", np.int32),
+    *((key, np.int32) for key in EDGE_FIELDS),  # rows of (source, target)
+)
+
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<QQ")
+_ALIGN = 8
+
+# Stored in place of a missing string id or generation.
+NULL = -1
+
+
+class GraphBinaryError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class BinaryGraph:
+    names: List[str]
+    pokemon_nodes: List[Dict[str, Any]]
+    type_nodes: List[Dict[str, Any]]
+    edges: Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+    def to_graph(self) -> Dict[str, Any]:
+        """Rebuild the graph.json shaped dict."""
+        graph: Dict[str, Any] = {
+            "pokemon_nodes": list(self.pokemon_nodes),
+            "type_nodes": list(self.type_nodes),
+        }
+        for key, (src_field, dst_field) in EDGE_FIELDS.items():
+            src, dst = self.edges[key]
+            graph[key] = [
+                {src_field: self.names[s], dst_field: self.names[d]}
+                for s, d in zip(src.tolist(), dst.tolist())
+            ]
+        return graph
+
+
+class _Interner:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __call__(self, name: Optional[str]) -> int:
+        if name is None:
+            return NULL
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return node_id
+
+
+def _encode(graph: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    intern = _Interner()
+
+    pokemon = np.asarray(
+        [
+            (
+                intern(p["name"]),
+                NULL if p.get("generation") is None else int(p["generation"]),
+                intern(p.get("primary_type")),
+                intern(p.get("secondary_type")),
+            )
+            for p in graph.get("pokemon_nodes", [])
+        ],
+        dtype=np.int32,
+    ).reshape(-1, 4)
+    types = np.asarray(
+        [intern(t["name"]) for t in graph.get("type_nodes", [])], dtype=np.int32
+    )
+
+    sections: Dict[str, np.ndarray] = {"pokemon_nodes": pokemon, "type_nodes": types}
+    for key, (src_field, dst_field) in EDGE_FIELDS.items():
+        sections[key] = np.asarray(
+            [(intern(e[src_field]), intern(e[dst_field])) for e in graph.get(key, [])],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+
+    encoded = [name.encode("utf-8") for name in intern.names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    sections["string_offsets"] = offsets
+    sections["string_data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return sections
+
+
+def write_graph_binary(graph: Mapping[str, Any], path: Path) -> None:
+    """Serialize `graph` to `path`, replacing any previous file atomically."""
+    sections = _encode(graph)
+    payloads = [sections[name].astype(dtype).tobytes() for name, dtype in SECTIONS]
+
+    table_end = _HEADER.size + _SECTION.size * len(SECTIONS)
+    offset = -(-table_end // _ALIGN) * _ALIGN
+    table: List[Tuple[int, int]] = []
+    for payload in payloads:
+        table.append((offset, len(payload)))
+        offset += -(-len(payload) // _ALIGN) * _ALIGN
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(SECTIONS)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for (start, _), payload in zip(table, payloads):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_graph_binary(path: Path) -> BinaryGraph:
+    """
+    Memory-map a file written by write_graph_binary. Edge arrays are views
+    into the mapping; only names and node records are decoded.
+    """
+    if path.stat().st_size < _HEADER.size:
+        raise GraphBinaryError(f"{path} is too short to be a graph file")
+    with path.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise GraphBinaryError(f"{path} is not a graph file")
+    if version != VERSION or count != len(SECTIONS):
+        raise GraphBinaryError(f"{path} has unsupported version {version}")
+
+    arrays: Dict[str, np.ndarray] = {}
+    for i, (name, dtype) in enumerate(SECTIONS):
+        start, nbytes = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+        if start + nbytes > len(mm):
+            raise GraphBinaryError(f"{path} is truncated")
+        itemsize = np.dtype(dtype).itemsize
+        arrays[name] = np.frombuffer(
+            mm, dtype=dtype, count=nbytes // itemsize, offset=start
+        )
+
+    offsets = arrays["string_offsets"].tolist()
+    data = arrays["string_data"].tobytes()
+    names = [
+        data[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+
+    def name_of(node_id: int) -> Optional[str]:
+        return None if node_id == NULL else names[node_id]
+
+    pokemon_nodes = [
+        {
+            "name": names[name_id],
+            "generation": None if generation == NULL else generation,
+            "primary_type": name_of(primary),
+            "secondary_type": name_of(secondary),
+        }
+        for name_id, generation, primary, secondary in arrays["pokemon_nodes"]
+        .reshape(-1, 4)
+        .tolist()
+    ]
+    type_nodes = [{"name": names[i]} for i in arrays["type_nodes"].tolist()]
+
+    edges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for key in EDGE_FIELDS:
+        pairs = arrays[key].reshape(-1, 2)
+        edges[key] = (pairs[:, 0], pairs[:, 1])
+
+    return BinaryGraph(
+        names=names, pokemon_nodes=pokemon_nodes, type_nodes=type_nodes, edges=edges
+    )
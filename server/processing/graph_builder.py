@@ -1,53 +1,107 @@
-import csv
+import hashlib
 import json
+import logging
+import os
+import shutil
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterator
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from processing.entity_extraction import extract_entities
+from processing import batch_extraction, entity_extraction
+from processing.fragments import merge_fragments
+from processing.gazetteer import get_gazetteer
+from processing.graph_binary import write_graph_binary
+from processing.graph_export import export_graph
+from processing.graph_store import binary_path, current_pointer, versions_dir
+from processing.jobs import cancel_requested, raise_if_cancelled, report_progress
+
+logger = logging.getLogger(__name__)
 
 TEXT_JSONL = Path("data/processed/text.jsonl")
 IMAGES_JSONL = Path("data/processed/images.jsonl")
 AUDIO_JSONL = Path("data/processed/audio.jsonl")
 
 GRAPH_DIR = Path("graph")
-NODES_DIR = GRAPH_DIR / "nodes"
-EDGES_DIR = GRAPH_DIR / "edges"
 GRAPH_JSON = GRAPH_DIR / "graph.json"
+GRAPH_MANIFEST = GRAPH_DIR / "manifest.json"
+GRAPH_CHECKPOINT = GRAPH_DIR / "checkpoint.jsonl"
+MANIFEST_VERSION = 1
 
+# Published versions kept on disk, including the live one.
+GRAPH_KEEP_VERSIONS = int(os.getenv("GRAPH_KEEP_VERSIONS", "3"))
 
-def build_graph_and_export_to_csv_and_json() -> Dict[str, Any]:
-    graph = build_graph()
-
-    GRAPH_DIR.mkdir(parents=True, exist_ok=True)
-    NODES_DIR.mkdir(parents=True, exist_ok=True)
-    EDGES_DIR.mkdir(parents=True, exist_ok=True)
+# Extracted records between checkpoints of an in-progress build.
+GRAPH_CHECKPOINT_EVERY = int(os.getenv("GRAPH_CHECKPOINT_EVERY", "100"))
 
-    with (NODES_DIR / "pokemon_nodes.csv").open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["name", "generation", "primary_type", "secondary_type"],
-        )
-        writer.writeheader()
-        writer.writerows(graph["pokemon_nodes"])
+# Reuse fragments of unchanged records from the previous build.
+GRAPH_BUILD_INCREMENTAL = os.getenv("GRAPH_BUILD_INCREMENTAL", "1") == "1"
 
-    with (NODES_DIR / "type_nodes.csv").open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["name"])
-        writer.writeheader()
-        writer.writerows(graph["type_nodes"])
+# Submit extraction as one batch job instead of interactive calls.
+GRAPH_BUILD_BATCH = os.getenv("GRAPH_BUILD_BATCH", "0") == "1"
 
-    with (EDGES_DIR / "mentions_edges.csv").open(
-        "w", newline="", encoding="utf-8"
-    ) as f:
-        writer = csv.DictWriter(f, fieldnames=["from_media_id", "to_pokemon"])
-        writer.writeheader()
-        writer.writerows(graph["mentions_edges"])
+# Number of extract_entities calls in flight at once during a build.
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "8"))
 
-    with GRAPH_JSON.open("w", encoding="utf-8") as f:
-        json.dump(graph, f, indent=2, ensure_ascii=False)
 
+def build_graph_and_export_to_csv_and_json(
+    full: Optional[bool] = None,
+    batch: Optional[bool] = None,
+) -> Dict[str, Any]:
+    graph = build_graph(full=full, batch=batch)
+    publish_graph(graph)
     return graph
 
 
+def _prune_versions(versions: Path, keep: str) -> None:
+    published = sorted(
+        (d for d in versions.iterdir() if d.is_dir() and not d.name.startswith(".")),
+        key=lambda d: d.name,
+    )
+    for old in published[: max(0, len(published) - GRAPH_KEEP_VERSIONS)]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def publish_graph(graph: Dict[str, Any], graph_json: Optional[Path] = None) -> Path:
+    """
+    Export `graph` as a new immutable version and make it the live one.
+
+    Every artifact is written into a hidden staging directory under
+    graph/versions/, which is renamed to its version id once complete. The
+    CURRENT pointer file is then replaced atomically, so readers switch from
+    one complete version to the next and never see a partial graph. Only
+    the newest GRAPH_KEEP_VERSIONS versions are kept. Returns the version
+    directory.
+    """
+    graph_json = graph_json or GRAPH_JSON
+    versions = versions_dir(graph_json)
+    # Sortable by publish time; the suffix keeps concurrent builds apart.
+    version = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+    staging = versions / f".{version}.tmp"
+    target = versions / version
+
+    try:
+        export_graph(graph, staging)
+        # Written after graph.json so readers see it as the newer of the two.
+        write_graph_binary(graph, binary_path(staging / graph_json.name))
+        os.replace(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    pointer = current_pointer(graph_json)
+    tmp_pointer = pointer.with_name(pointer.name + ".tmp")
+    tmp_pointer.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp_pointer, pointer)
+
+    _prune_versions(versions, keep=version)
+    logger.info("Graph published", extra={"version": version, "path": str(target)})
+    return target
+
+
 def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
     if not path.exists():
         return
@@ -60,51 +114,384 @@ def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
             yield obj
 
 
-def build_graph():
-    pokemon_nodes: Dict[str, Dict[str, Any]] = {}
-    type_nodes: Dict[str, Dict[str, Any]] = {}
+def _iter_records() -> Iterator[Dict[str, Any]]:
+    for path in [TEXT_JSONL, IMAGES_JSONL, AUDIO_JSONL]:
+        yield from _iter_jsonl(path)
 
-    pokemon_type_edges: set[tuple[str, str]] = set()
-    evolution_edges: set[tuple[str, str]] = set()
-    mentions_edges: set[tuple[str, str]] = set()
 
-    def merge_fragment(fragment: Dict[str, Any]):
-        for p in fragment["pokemon_nodes"]:
-            name = p["name"]
-            pokemon_nodes[name] = p
+def _document(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "text": record.get("text", ""),
+        "media_id": record["id"],
+        "pokemon_hint": record.get("pokemon"),
+    }
 
-        for t in fragment["type_nodes"]:
-            type_name = t["name"]
-            type_nodes[type_name] = t
 
-        for e in fragment["pokemon_type_edges"]:
-            pokemon_type_edges.add((e["from_pokemon"], e["to_type"]))
+def _extract_llm(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Looked up on the module at call time so tests can patch it.
+    return entity_extraction.extract_entities(
+        text=record.get("text", ""),
+        media_id=record["id"],
+        pokemon_hint=record.get("pokemon"),
+    )
 
-        for e in fragment["evolution_edges"]:
-            evolution_edges.add((e["from_pokemon"], e["to_pokemon"]))
 
-        for e in fragment["mentions_edges"]:
-            mentions_edges.add((e["from_media_id"], e["to_pokemon"]))
+def _extract_gazetteer(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    return gazetteer.extract(
+        record.get("text", ""), record["id"], record.get("pokemon")
+    )
 
-    for path in [TEXT_JSONL, IMAGES_JSONL, AUDIO_JSONL]:
-        for line in _iter_jsonl(path):
-            fragment = extract_entities(
-                text=line.get("text", ""),
-                media_id=line["id"],
-                pokemon_hint=line.get("pokemon"),
-            )
-            merge_fragment(fragment)
 
-    return {
-        "pokemon_nodes": list(pokemon_nodes.values()),
-        "type_nodes": list(type_nodes.values()),
-        "pokemon_type_edges": [
-            {"from_pokemon": src, "to_type": dst} for (src, dst) in pokemon_type_edges
-        ],
-        "evolution_edges": [
-            {"from_pokemon": src, "to_pokemon": dst} for (src, dst) in evolution_edges
-        ],
-        "mentions_edges": [
-            {"from_media_id": src, "to_pokemon": dst} for (src, dst) in mentions_edges
+@dataclass
+class _Unit:
+    """Records extracted together: resolved already, alone, or as one pack."""
+
+    positions: List[int]
+    records: List[Dict[str, Any]]
+    fragments: Optional[List[Dict[str, Any]]] = None
+    try_gazetteer: bool = False
+
+    def run(self) -> List[Dict[str, Any]]:
+        if self.fragments is not None:
+            return self.fragments
+        if len(self.records) == 1:
+            record = self.records[0]
+            fragment = _extract_gazetteer(record) if self.try_gazetteer else None
+            return [fragment if fragment is not None else _extract_llm(record)]
+        return entity_extraction.extract_entities_packed(
+            [_document(r) for r in self.records]
+        )
+
+
+def _iter_units(records: Iterable[Dict[str, Any]]) -> Iterator[_Unit]:
+    """
+    Group records into extraction units. With packing on, records the
+    gazetteer resolves become finished units and short records needing the
+    LLM are packed together up to the token and document limits.
+    """
+    if not entity_extraction.EXTRACTION_PACKING:
+        for position, record in enumerate(records):
+            yield _Unit([position], [record], try_gazetteer=True)
+        return
+
+    max_tokens = entity_extraction.EXTRACTION_PACK_MAX_TOKENS
+    max_docs = entity_extraction.EXTRACTION_PACK_MAX_DOCS
+    pack = _Unit([], [])
+    pack_tokens = 0
+
+    for position, record in enumerate(records):
+        fragment = _extract_gazetteer(record)
+        if fragment is not None:
+            yield _Unit([position], [record], [fragment])
+            continue
+
+        tokens = entity_extraction.document_tokens(_document(record))
+        if tokens > max_tokens // 2:
+            yield _Unit([position], [record])
+            continue
+
+        if pack.records and (
+            pack_tokens + tokens > max_tokens or len(pack.records) >= max_docs
+        ):
+            yield pack
+            pack = _Unit([], [])
+            pack_tokens = 0
+        pack.positions.append(position)
+        pack.records.append(record)
+        pack_tokens += tokens
+
+    if pack.records:
+        yield pack
+
+
+def extract_fragments(
+    records: Iterable[Dict[str, Any]], concurrency: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run extraction for `records` with up to `concurrency` requests in flight
+    and yield the fragments in input order. At most 2 * concurrency units
+    are read ahead, so memory stays bounded for large corpora.
+    """
+    done: Dict[int, Dict[str, Any]] = {}
+    next_position = 0
+
+    def collect(unit: _Unit, fragments: List[Dict[str, Any]]) -> Iterator[Dict]:
+        nonlocal next_position
+        done.update(zip(unit.positions, fragments))
+        while next_position in done:
+            yield done.pop(next_position)
+            next_position += 1
+
+    if concurrency <= 1:
+        for unit in _iter_units(records):
+            yield from collect(unit, unit.run())
+        return
+
+    window = 2 * concurrency
+    pending: Deque[Tuple[_Unit, Future]] = deque()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="extract"
+    ) as pool:
+        try:
+            for unit in _iter_units(records):
+                pending.append((unit, pool.submit(unit.run)))
+                if len(pending) >= window:
+                    head, future = pending.popleft()
+                    yield from collect(head, future.result())
+            while pending:
+                head, future = pending.popleft()
+                yield from collect(head, future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Hash of the record fields and extraction settings a fragment depends on."""
+    gazetteer = get_gazetteer()
+    content = json.dumps(
+        [
+            record.get("text", ""),
+            record.get("pokemon"),
+            entity_extraction.fragment_fingerprint(),
+            gazetteer.fingerprint if gazetteer is not None else None,
         ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """media ID -> {"hash", "fragment"} for every record merged by the last build."""
+    path = path or GRAPH_MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable graph manifest", extra={"path": str(path)})
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["records"]
+
+
+def _write_json_atomic(path: Path, obj: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_manifest(
+    records: Dict[str, Dict[str, Any]], path: Optional[Path] = None
+) -> None:
+    _write_json_atomic(
+        path or GRAPH_MANIFEST, {"version": MANIFEST_VERSION, "records": records}
+    )
+
+
+def load_checkpoint(path: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fragments extracted by an interrupted build, keyed like the manifest.
+
+    The checkpoint is a JSON lines log: a {"version"} header, then one
+    {"id", "hash", "fragment"} entry per record, the last entry winning.
+    A line cut short by a crash mid-write ends the log.
+    """
+    path = path or GRAPH_CHECKPOINT
+    if not path.exists():
+        return {}
+    records: Dict[str, Dict[str, Any]] = {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != MANIFEST_VERSION:
+                return {}
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                records[entry["id"]] = {
+                    "hash": entry["hash"],
+                    "fragment": entry["fragment"],
+                }
+    except (OSError, ValueError):
+        logger.warning(
+            "Ignoring unreadable graph checkpoint", extra={"path": str(path)}
+        )
+        return {}
+    return records
+
+
+def save_checkpoint(
+    records: Dict[str, Dict[str, Any]],
+    path: Optional[Path] = None,
+    append: bool = False,
+) -> None:
+    """
+    Write `records` to the checkpoint log. append=True adds them to the
+    log instead of starting a new one, so each save only costs the records
+    extracted since the last.
+    """
+    path = path or GRAPH_CHECKPOINT
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a" if append else "w", encoding="utf-8") as f:
+        if not append:
+            f.write(json.dumps({"version": MANIFEST_VERSION}))
+            f.write("\n")
+        for media_id, entry in records.items():
+            f.write(json.dumps({"id": media_id, **entry}, ensure_ascii=False))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def build_graph(
+    concurrency: Optional[int] = None,
+    full: Optional[bool] = None,
+    batch: Optional[bool] = None,
+):
+    """
+    Extract the processed records and merge the fragments into one graph.
+
+    In incremental mode (the default, see GRAPH_BUILD_INCREMENTAL) fragments
+    from the previous build are kept in graph/manifest.json together with a
+    hash of the record they came from. Only new or changed records are sent
+    to extract_entities; fragments of changed or deleted media are dropped.
+    full=True ignores the manifest and re-extracts everything.
+
+    Every GRAPH_CHECKPOINT_EVERY extracted records the new fragments are
+    appended to graph/checkpoint.jsonl. A build that crashes or is killed picks up
+    from there on the next run: checkpointed fragments whose record hash
+    still matches are reused, in either mode. The checkpoint is removed
+    once the build completes.
+
+    batch=True (or GRAPH_BUILD_BATCH=1) sends the records that need the LLM
+    as one batch job instead of interactive calls, for nightly rebuilds where
+    throughput matters more than latency; see batch_extraction.
+
+    Extraction runs concurrently, but fragments are merged in record order
+    (text, then images, then audio, file order within each), so the same
+    inputs always produce the same graph, including node and edge order.
+    """
+    concurrency = concurrency or EXTRACTION_CONCURRENCY
+    if full is None:
+        full = not GRAPH_BUILD_INCREMENTAL
+    if batch is None:
+        batch = GRAPH_BUILD_BATCH
+
+    previous = {} if full else load_manifest()
+    checkpoint = load_checkpoint()
+    if checkpoint:
+        logger.info(
+            "build_graph resuming from checkpoint",
+            extra={"checkpointed": len(checkpoint)},
+        )
+        previous.update(checkpoint)
+
+    # A media ID seen twice keeps its first position and its last record.
+    records: Dict[str, Dict[str, Any]] = {}
+    for record in _iter_records():
+        records[record["id"]] = record
+    hashes = {media_id: record_hash(r) for media_id, r in records.items()}
+
+    stale = [
+        media_id
+        for media_id, digest in hashes.items()
+        if previous.get(media_id, {}).get("hash") != digest
+    ]
+    retracted = [media_id for media_id in previous if media_id not in records]
+
+    cache_before = entity_extraction.extraction_cache_stats()
+    gazetteer = get_gazetteer()
+    gazetteer_before = gazetteer.stats() if gazetteer is not None else {}
+
+    fragments = {
+        media_id: entry["fragment"]
+        for media_id, entry in previous.items()
+        if media_id in records
     }
+    # The checkpoint is rewritten once, with only the entries still valid;
+    # after that each save appends the records extracted since the last.
+    save_checkpoint(
+        {
+            media_id: entry
+            for media_id, entry in checkpoint.items()
+            if hashes.get(media_id) == entry["hash"]
+        }
+    )
+    unsaved: Dict[str, Dict[str, Any]] = {}
+
+    report_progress(0, len(stale), stage="extract")
+    stale_records = (records[media_id] for media_id in stale)
+    # Fragments from a stand-in executor are used for this graph only.
+    persist = True
+    if batch and stale:
+        executor = batch_extraction.get_batch_executor()
+        persist = executor.cacheable
+        stale_fragments: Iterable[Dict[str, Any]] = (
+            batch_extraction.extract_entities_batch(list(stale_records), executor)
+        )
+    else:
+        stale_fragments = extract_fragments(stale_records, concurrency)
+
+    for extracted, (media_id, fragment) in enumerate(
+        zip(stale, stale_fragments), start=1
+    ):
+        fragments[media_id] = fragment
+        if persist:
+            unsaved[media_id] = {"hash": hashes[media_id], "fragment": fragment}
+        report_progress(extracted, len(stale), stage="extract")
+        if extracted % GRAPH_CHECKPOINT_EVERY == 0 or cancel_requested():
+            save_checkpoint(unsaved, append=True)
+            unsaved.clear()
+        # A cancelled build resumes from the checkpoint just saved.
+        raise_if_cancelled()
+
+    graph = merge_fragments(fragments[media_id] for media_id in records)
+    unpersisted = set() if persist else set(stale)
+    save_manifest(
+        {
+            media_id: {"hash": hashes[media_id], "fragment": fragments[media_id]}
+            for media_id in records
+            if media_id not in unpersisted
+        }
+    )
+    GRAPH_CHECKPOINT.unlink(missing_ok=True)
+
+    cache_after = entity_extraction.extraction_cache_stats()
+    gazetteer_after = gazetteer.stats() if gazetteer is not None else {}
+    logger.info(
+        "build_graph merged fragments",
+        extra={
+            "records": len(records),
+            "extracted": len(stale),
+            "reused": len(records) - len(stale),
+            "retracted": len(retracted),
+            "full": full,
+            "batch": batch,
+            "concurrency": concurrency,
+            "gazetteer_hits": gazetteer_after.get("hits", 0)
+            - gazetteer_before.get("hits", 0),
+            "llm_fallbacks": gazetteer_after.get("misses", 0)
+            - gazetteer_before.get("misses", 0),
+            "cache_hits": cache_after.get("hits", 0) - cache_before.get("hits", 0),
+            "cache_misses": cache_after.get("misses", 0)
+            - cache_before.get("misses", 0),
+            "cache_evictions": cache_after.get("evictions", 0)
+            - cache_before.get("evictions", 0),
+            "cache_entries": cache_after.get("entries", 0),
+            "cache_bytes": cache_after.get("bytes", 0),
+        },
+    )
+
+    return graph
@@ -0,0 +1,162 @@
+import csv
+import json
+import logging
+import os
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to skip the Parquet copies.
+GRAPH_EXPORT_PARQUET = os.getenv("GRAPH_EXPORT_PARQUET", "1") == "1"
+# Rows per Parquet row group, and per batch handed to the writers.
+GRAPH_EXPORT_BATCH_ROWS = int(os.getenv("GRAPH_EXPORT_BATCH_ROWS", "10000"))
+
+# collection -> (subdirectory, columns), in graph.json key order
+COLLECTIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "pokemon_nodes": (
+        "nodes",
+        ("name", "generation", "primary_type", "secondary_type"),
+    ),
+    "type_nodes": ("nodes", ("name",)),
+    "pokemon_type_edges": ("edges", ("from_pokemon", "to_type")),
+    "evolution_edges": ("edges", ("from_pokemon", "to_pokemon")),
+    "mentions_edges": ("edges", ("from_media_id", "to_pokemon")),
+}
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """Yield a temp path beside `path`; rename it into place on success."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+@contextmanager
+def atomic_writer(path: Path) -> Iterator[IO[str]]:
+    with atomic_path(path) as tmp_path:
+        with tmp_path.open("w", encoding="utf-8", newline="") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_csv(path: Path, columns: Iterable[str], rows: Iterable[Mapping]) -> int:
+    count = 0
+    with atomic_writer(path) as f:
+        writer = csv.DictWriter(f, fieldnames=list(columns), extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _batches(rows: Iterable[Mapping], size: int) -> Iterator[List[Mapping]]:
+    batch: List[Mapping] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def parquet_writer(
+    path: Path, columns: Tuple[str, ...]
+) -> Iterator[Callable[[List[Mapping]], None]]:
+    """Yield a function that appends a batch of rows as one row group."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [pa.field(c, pa.int64() if c == "generation" else pa.string()) for c in columns]
+    )
+    with atomic_path(path) as tmp_path:
+        with pq.ParquetWriter(str(tmp_path), schema) as writer:
+
+            def write(batch: List[Mapping]) -> None:
+                writer.write_table(
+                    pa.Table.from_pylist(
+                        [{c: row.get(c) for c in columns} for row in batch],
+                        schema=schema,
+                    )
+                )
+
+            yield write
+
+
+def _parquet_available() -> bool:
+    if not GRAPH_EXPORT_PARQUET:
+        return False
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        logger.info("pyarrow is not installed; skipping Parquet export")
+        return False
+    return True
+
+
+def export_graph(
+    graph: Mapping[str, Iterable[Mapping]], directory: Path
+) -> Dict[str, int]:
+    """
+    Write every node and edge collection under `directory`:
+    nodes/*.csv, edges/*.csv, graph.json (a JSON object of arrays, one
+    record per line) and, when pyarrow is available, parquet/*.parquet.
+    Each collection is read once, in batches that feed all the files, so it
+    may be any iterable, including a generator. Each file is renamed into
+    place once complete, so readers never see a partial file. Returns row
+    counts.
+    """
+    parquet = _parquet_available()
+    counts: Dict[str, int] = {}
+
+    with atomic_writer(directory / "graph.json") as graph_json:
+        graph_json.write("{")
+        for i, (key, (subdir, columns)) in enumerate(COLLECTIONS.items()):
+            graph_json.write("," if i else "")
+            graph_json.write(f"\n  {json.dumps(key)}: [")
+            count = 0
+            with ExitStack() as files:
+                csv_file = files.enter_context(
+                    atomic_writer(directory / subdir / f"{key}.csv")
+                )
+                csv_out = csv.DictWriter(
+                    csv_file, fieldnames=list(columns), extrasaction="ignore"
+                )
+                csv_out.writeheader()
+                write_parquet_batch = (
+                    files.enter_context(
+                        parquet_writer(
+                            directory / "parquet" / f"{key}.parquet", columns
+                        )
+                    )
+                    if parquet
+                    else None
+                )
+                for batch in _batches(graph.get(key, []), GRAPH_EXPORT_BATCH_ROWS):
+                    for row in batch:
+                        graph_json.write(",\n    " if count else "\n    ")
+                        graph_json.write(json.dumps(row, ensure_ascii=False))
+                        count += 1
+                    csv_out.writerows(batch)
+                    if write_parquet_batch is not None:
+                        write_parquet_batch(batch)
+            graph_json.write("\n  ]")
+            counts[key] = count
+        graph_json.write("\n}\n")
+
+    logger.info(
+        "Graph exported",
+        extra={"path": str(directory), "parquet": parquet, **counts},
+    )
+    return counts
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# graph.json edge list -> (source field, target field)
+EDGE_FIELDS: Dict[str, Tuple[str, str]] = {
+    "pokemon_type_edges": ("from_pokemon", "to_type"),
+    "evolution_edges": ("from_pokemon", "to_pokemon"),
+    "mentions_edges": ("from_media_id", "to_pokemon"),
+}
+
+
+@dataclass(frozen=True)
+class Adjacency:
+    """CSR adjacency: node i points to targets[offsets[i] : offsets[i + 1]]."""
+
+    offsets: np.ndarray
+    targets: np.ndarray
+
+    @classmethod
+    def build(cls, src: np.ndarray, dst: np.ndarray, node_count: int) -> "Adjacency":
+        order = np.argsort(src, kind="stable")
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=node_count), out=offsets[1:])
+        return cls(offsets=offsets, targets=dst[order].astype(np.int32))
+
+    def of(self, node_id: int) -> np.ndarray:
+        return self.targets[self.offsets[node_id] : self.offsets[node_id + 1]]
+
+
+@dataclass(frozen=True)
+class Relation:
+    src: np.ndarray
+    dst: np.ndarray
+    forward: Adjacency
+    reverse: Adjacency
+
+
+class GraphIndex:
+    """
+    Read-only, interned view of the graph edges.
+
+    Every node name and media ID is stored once in `names`; edges are int32
+    id pairs with forward and reverse CSR adjacency per edge type, so a
+    neighborhood lookup costs O(degree) instead of a scan over every edge.
+    """
+
+    def __init__(
+        self, names: List[str], edges: Mapping[str, Tuple[np.ndarray, np.ndarray]]
+    ):
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.relations: Dict[str, Relation] = {}
+        for key, (src, dst) in edges.items():
+            src = np.asarray(src, dtype=np.int32)
+            dst = np.asarray(dst, dtype=np.int32)
+            self.relations[key] = Relation(
+                src=src,
+                dst=dst,
+                forward=Adjacency.build(src, dst, len(names)),
+                reverse=Adjacency.build(dst, src, len(names)),
+            )
+
+    @classmethod
+    def from_graph(cls, graph: Mapping[str, Any]) -> "GraphIndex":
+        names: List[str] = []
+        ids: Dict[str, int] = {}
+
+        def intern(name: str) -> int:
+            node_id = ids.get(name)
+            if node_id is None:
+                node_id = ids[name] = len(names)
+                names.append(name)
+            return node_id
+
+        for node in graph.get("pokemon_nodes", []):
+            intern(node["name"])
+        for node in graph.get("type_nodes", []):
+            intern(node["name"])
+
+        edges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for key, (src_field, dst_field) in EDGE_FIELDS.items():
+            pairs = [
+                (intern(e[src_field]), intern(e[dst_field])) for e in graph.get(key, [])
+            ]
+            arr = np.asarray(pairs, dtype=np.int32).reshape(-1, 2)
+            edges[key] = (arr[:, 0], arr[:, 1])
+
+        return cls(names, edges)
+
+    def edge_count(self, key: str) -> int:
+        return len(self.relations[key].src)
+
+    def iter_edges(self, key: str) -> Iterable[Tuple[str, str]]:
+        relation = self.relations[key]
+        for s, d in zip(relation.src.tolist(), relation.dst.tolist()):
+            yield self.names[s], self.names[d]
+
+    def _lookup(self, key: str, name: str, reverse: bool) -> List[str]:
+        node_id: Optional[int] = self.ids.get(name)
+        if node_id is None:
+            return []
+        relation = self.relations[key]
+        adjacency = relation.reverse if reverse else relation.forward
+        return [self.names[i] for i in adjacency.of(node_id).tolist()]
+
+    def outgoing(self, key: str, name: str) -> List[str]:
+        return self._lookup(key, name, reverse=False)
+
+    def incoming(self, key: str, name: str) -> List[str]:
+        return self._lookup(key, name, reverse=True)
+
+    def neighborhood(self, pokemon_name: str) -> Dict[str, List[str]]:
+        return {
+            "types": self.outgoing("pokemon_type_edges", pokemon_name),
+            "evolves_to": self.outgoing("evolution_edges", pokemon_name),
+            "evolves_from": self.incoming("evolution_edges", pokemon_name),
+            "mentioned_in": self.incoming("mentions_edges", pokemon_name),
+        }
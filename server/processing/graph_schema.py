@@ -10,8 +10,9 @@ JSON_GRAPH_SCHEMA: Dict[str, Any] = {
                 "properties": {
                     "name": {"type": "string"},
                     "generation": {"type": "integer"},
-                    "primary_type": {"type": "string"},
-                    "secondary_type": {"type": "string"},
+                    # null for an unknown type or a single-typed Pokémon.
+                    "primary_type": {"type": ["string", "null"]},
+                    "secondary_type": {"type": ["string", "null"]},
                 },
                 "required": ["name", "generation", "primary_type", "secondary_type"],
                 "additionalProperties": False,
@@ -72,3 +73,24 @@ JSON_GRAPH_SCHEMA: Dict[str, Any] = {
     ],
     "additionalProperties": False,
 }
+
+# Several documents extracted in one request; each result names its media ID.
+PACKED_JSON_GRAPH_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "documents": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "media_id": {"type": "string"},
+                    **JSON_GRAPH_SCHEMA["properties"],
+                },
+                "required": ["media_id", *JSON_GRAPH_SCHEMA["required"]],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["documents"],
+    "additionalProperties": False,
+}
@@ -1,83 +1,306 @@
 import json
 import logging
-import re
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from processing.graph_binary import GraphBinaryError, read_graph_binary
+from processing.graph_index import EDGE_FIELDS, GraphIndex
+from processing.name_matcher import NameMatcher
 
 GRAPH_JSON = Path("graph/graph.json")
 
+# Published builds live in versions/<id>/ beside GRAPH_JSON; the CURRENT
+# pointer file names the live one. Without a pointer, GRAPH_JSON is read.
+CURRENT_POINTER = "CURRENT"
+VERSIONS_DIR = "versions"
+
+GRAPH_KEYS = (
+    "pokemon_nodes",
+    "type_nodes",
+    "pokemon_type_edges",
+    "evolution_edges",
+    "mentions_edges",
+)
+
 logger = logging.getLogger(__name__)
 
 
-def load_graph() -> Dict[str, Any]:
-    if not GRAPH_JSON.exists():
-        return {
-            "pokemon_nodes": [],
-            "type_nodes": [],
-            "pokemon_type_edges": [],
-            "evolution_edges": [],
-            "mentions_edges": [],
-        }
-    with GRAPH_JSON.open("r", encoding="utf-8") as f:
+def _empty_graph() -> Dict[str, Any]:
+    return {key: [] for key in GRAPH_KEYS}
+
+
+def load_graph(path: Optional[Path] = None) -> Dict[str, Any]:
+    path = path or GRAPH_JSON
+    if not path.exists():
+        return _empty_graph()
+    with path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def find_related_pokemon(graph: Dict[str, Any], pokemon_name: str) -> Dict[str, Any]:
+FileSignature = Optional[Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    """
+    One fully loaded version of the graph. Snapshots are never modified
+    after creation; a reload builds a new one and swaps the reference.
+
+    Node records are kept as dicts; edges only live in the interned index.
+    """
+
+    pokemon_nodes: Tuple[Dict[str, Any], ...]
+    type_nodes: Tuple[Dict[str, Any], ...]
+    index: GraphIndex
+    matcher: NameMatcher[int]
+    path: Path
+    raw_json: Optional[bytes]
+    signature: Tuple[FileSignature, FileSignature]
+    loaded_at: float
+
+    def json_bytes(self) -> bytes:
+        """The graph as graph.json bytes, without parsing it."""
+        if self.raw_json is not None:
+            return self.raw_json
+        if self.path.exists():
+            return self.path.read_bytes()
+        graph: Dict[str, Any] = {
+            "pokemon_nodes": list(self.pokemon_nodes),
+            "type_nodes": list(self.type_nodes),
+        }
+        for key, (src_field, dst_field) in EDGE_FIELDS.items():
+            graph[key] = [
+                {src_field: src, dst_field: dst}
+                for src, dst in self.index.iter_edges(key)
+            ]
+        return json.dumps(graph, ensure_ascii=False).encode("utf-8")
+
+
+def current_pointer(path: Path) -> Path:
+    return path.parent / CURRENT_POINTER
+
+
+def versions_dir(path: Path) -> Path:
+    return path.parent / VERSIONS_DIR
+
+
+def resolve_graph_path(path: Optional[Path] = None) -> Path:
+    """The graph.json of the published version for `path`, or `path` itself."""
+    path = Path(path or GRAPH_JSON)
+    try:
+        version = current_pointer(path).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return path
+    if not version:
+        return path
+    return versions_dir(path) / version / path.name
+
+
+def binary_path(path: Path) -> Path:
+    """The compact binary graph that sits next to a graph.json file."""
+    return path.with_suffix(".bin")
+
+
+def _file_signature(path: Path) -> FileSignature:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _graph_signature(path: Path) -> Tuple[FileSignature, FileSignature]:
+    return (_file_signature(path), _file_signature(binary_path(path)))
+
+
+def _build_matcher(pokemon_nodes: Tuple[Dict[str, Any], ...]) -> NameMatcher[int]:
+    return NameMatcher((node["name"], i) for i, node in enumerate(pokemon_nodes))
+
+
+def _snapshot_from_binary(
+    path: Path, signature: Tuple[FileSignature, FileSignature]
+) -> GraphSnapshot:
+    binary = read_graph_binary(binary_path(path))
+    pokemon_nodes = tuple(binary.pokemon_nodes)
+    return GraphSnapshot(
+        pokemon_nodes=pokemon_nodes,
+        type_nodes=tuple(binary.type_nodes),
+        index=GraphIndex(binary.names, binary.edges),
+        matcher=_build_matcher(pokemon_nodes),
+        path=path,
+        raw_json=None,
+        signature=signature,
+        loaded_at=time.time(),
+    )
+
+
+def _make_snapshot(
+    path: Path, signature: Tuple[FileSignature, FileSignature]
+) -> GraphSnapshot:
+    json_sig, bin_sig = signature
+
+    # Prefer the binary form unless graph.json was written after it.
+    if bin_sig is not None and (json_sig is None or bin_sig[0] >= json_sig[0]):
+        try:
+            return _snapshot_from_binary(path, signature)
+        except GraphBinaryError:
+            logger.warning(
+                "Unreadable binary graph, falling back to JSON",
+                extra={"path": str(binary_path(path))},
+            )
+
+    if json_sig is None:
+        graph = _empty_graph()
+        raw = json.dumps(graph).encode("utf-8")
+    else:
+        raw = path.read_bytes()
+        graph = json.loads(raw)
+
+    pokemon_nodes = tuple(graph.get("pokemon_nodes", []))
+    return GraphSnapshot(
+        pokemon_nodes=pokemon_nodes,
+        type_nodes=tuple(graph.get("type_nodes", [])),
+        index=GraphIndex.from_graph(graph),
+        matcher=_build_matcher(pokemon_nodes),
+        path=path,
+        raw_json=raw,
+        signature=signature,
+        loaded_at=time.time(),
+    )
+
+
+class GraphHolder:
+    """
+    Keeps the parsed graph for one graph.json path in memory.
+
+    The graph is re-read when the CURRENT pointer moves to a new published
+    version, when the mtime or size of the graph files changes, or after
+    invalidate() is called. Requests that arrive while a reload is running
+    keep getting the previous snapshot instead of waiting for it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._pointer_signature: FileSignature = None
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _current(self) -> Optional[GraphSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None or self._stale:
+            return None
+        if _file_signature(current_pointer(self.path)) != self._pointer_signature:
+            return None
+        if snapshot.signature != _graph_signature(snapshot.path):
+            return None
+        return snapshot
+
+    def get(self) -> GraphSnapshot:
+        current = self._current()
+        if current is not None:
+            return current
+
+        if not self._lock.acquire(blocking=False):
+            # Another request is loading the new version; serve the old one.
+            if self._snapshot is not None:
+                return self._snapshot
+            self._lock.acquire()
+
+        try:
+            current = self._current()
+            if current is not None:
+                return current
+
+            snapshot = self._snapshot
+            pointer_signature = _file_signature(current_pointer(self.path))
+            resolved = resolve_graph_path(self.path)
+            signature = _graph_signature(resolved)
+
+            self._stale = False
+            try:
+                fresh = _make_snapshot(resolved, signature)
+            except (OSError, ValueError):
+                if snapshot is None:
+                    raise
+                logger.exception(
+                    "Failed to reload graph, keeping previous snapshot",
+                    extra={"path": str(resolved)},
+                )
+                return snapshot
+
+            self._snapshot = fresh
+            self._pointer_signature = pointer_signature
+            logger.info(
+                "Graph snapshot loaded",
+                extra={
+                    "path": str(resolved),
+                    "pokemon_nodes": len(fresh.pokemon_nodes),
+                },
+            )
+            return fresh
+        finally:
+            self._lock.release()
+
+
+_holders: Dict[Path, GraphHolder] = {}
+_holders_lock = threading.Lock()
+
+
+def _get_holder(path: Path) -> GraphHolder:
+    holder = _holders.get(path)
+    if holder is None:
+        with _holders_lock:
+            holder = _holders.setdefault(path, GraphHolder(path))
+    return holder
+
+
+def get_graph_snapshot(path: Optional[Path] = None) -> GraphSnapshot:
+    """Current snapshot of the graph at `path` (defaults to GRAPH_JSON)."""
+    return _get_holder(Path(path or GRAPH_JSON)).get()
+
+
+def invalidate_graph(path: Optional[Path] = None) -> None:
+    """Force the next get_graph_snapshot call to re-read the graph file."""
+    _get_holder(Path(path or GRAPH_JSON)).invalidate()
+
+
+GraphLike = Union[GraphSnapshot, Mapping[str, Any]]
+
+
+def find_related_pokemon(graph: GraphLike, pokemon_name: str) -> Dict[str, Any]:
     """Return basic neighborhood: types, evolutions, mentions."""
-    name = pokemon_name
-
-    types = [
-        e["to_type"]
-        for e in graph.get("pokemon_type_edges", [])
-        if e["from_pokemon"] == name
-    ]
-
-    evolves_to = [
-        e["to_pokemon"]
-        for e in graph.get("evolution_edges", [])
-        if e["from_pokemon"] == name
-    ]
-    evolves_from = [
-        e["from_pokemon"]
-        for e in graph.get("evolution_edges", [])
-        if e["to_pokemon"] == name
-    ]
-
-    mentioned_in = [
-        e["from_media_id"]
-        for e in graph.get("mentions_edges", [])
-        if e["to_pokemon"] == name
-    ]
-
-    return {
-        "types": types,
-        "evolves_to": evolves_to,
-        "evolves_from": evolves_from,
-        "mentioned_in": mentioned_in,
-    }
-
-
-def find_pokemon_nodes_by_name(
-    graph: Dict[str, Any], query: str
-) -> List[Dict[str, Any]]:
-    tokens = {t for t in re.split(r"[^a-z0-9]+", query.lower()) if t}
-
-    matches: List[Dict[str, Any]] = []
-    for p in graph.get("pokemon_nodes", []):
-        name = p["name"]
-        name_token = name.lower()
-        if name_token in tokens:
-            matches.append(p)
-            continue
-
-    return matches
+    if isinstance(graph, GraphSnapshot):
+        index = graph.index
+    else:
+        index = GraphIndex.from_graph(graph)
+    return index.neighborhood(pokemon_name)
+
+
+def find_pokemon_nodes_by_name(graph: GraphLike, query: str) -> List[Dict[str, Any]]:
+    """Pokémon nodes mentioned in `query`, in the order they are mentioned."""
+    if isinstance(graph, GraphSnapshot):
+        nodes = graph.pokemon_nodes
+        matcher = graph.matcher
+    else:
+        nodes = tuple(graph.get("pokemon_nodes", []))
+        matcher = _build_matcher(nodes)
+
+    return [nodes[i] for i in matcher.find_all(query)]
 
 
 def build_graph_context(question: str) -> Dict[str, Any]:
     logger.info(f"Building graph context for question: {question}")
 
-    graph = load_graph()
-    if not graph["pokemon_nodes"]:
+    graph = get_graph_snapshot()
+    if not graph.pokemon_nodes:
         logger.warning("No Pokémon data found in graph.json")
         return {"content": "", "node": None}
 
@@ -116,4 +339,4 @@ def build_graph_context(question: str) -> Dict[str, Any]:
 
     logger.info(f"Graph context built for question: {question}")
 
-    return {"context": "\n".join(lines), "node": primary}
+    return {"context": "\n".join(lines), "node": dict(primary)}
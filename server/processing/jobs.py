@@ -0,0 +1,241 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Worker threads for background jobs. One worker runs jobs strictly one at a
+# time, so a graph build never reads the corpus while ingestion rewrites it.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# Finished jobs kept for the status endpoints.
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage: Optional[str] = None
+    done: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+    result: Any = None
+    stage_started_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def throughput(self, now: Optional[float] = None) -> Optional[float]:
+        """Records per second in the current stage."""
+        if self.stage_started_at is None or not self.done:
+            return None
+        end = self.finished_at or now or time.time()
+        elapsed = end - self.stage_started_at
+        return self.done / elapsed if elapsed > 0 else None
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """Estimated time left in the current stage."""
+        if self.finished:
+            return 0.0
+        rate = self.throughput(now)
+        if rate is None or self.total is None:
+            return None
+        return max(0, self.total - self.done) / rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        throughput = self.throughput(now)
+        eta = self.eta_seconds(now)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "throughput_per_s": round(throughput, 3) if throughput else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_event.is_set(),
+            "error": self.error,
+        }
+
+
+_current_job: ContextVar[Optional[Job]] = ContextVar("current_job", default=None)
+
+
+def report_progress(done: int, total: Optional[int] = None, stage: str = "") -> None:
+    """
+    Record progress of the job running in this thread; a no-op outside a
+    job, so pipelines can call it unconditionally. Starting a new `stage`
+    resets the throughput and ETA estimate.
+    """
+    job = _current_job.get()
+    if job is None:
+        return
+    if stage and stage != job.stage:
+        job.stage = stage
+        job.stage_started_at = time.time()
+    elif job.stage_started_at is None:
+        job.stage_started_at = time.time()
+    job.done = done
+    if total is not None:
+        job.total = total
+
+
+def cancel_requested() -> bool:
+    job = _current_job.get()
+    return job is not None and job.cancel_event.is_set()
+
+
+def raise_if_cancelled() -> None:
+    """Stop the running job at a safe point if it has been cancelled."""
+    if cancel_requested():
+        raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Runs long pipelines on a small local worker pool, off the HTTP workers.
+
+    submit() returns a Job immediately; its status, progress, throughput and
+    ETA can be read while it runs. Cancellation is cooperative: a queued job
+    never starts, a running one stops at its next raise_if_cancelled().
+    Only one job of each kind is active at a time; submitting a kind that
+    is already queued or running returns the existing job.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, history: int = JOB_HISTORY):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="job"
+        )
+        self._history = history
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[], Any]) -> Job:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and not job.finished:
+                    return job
+            job = Job(id=uuid.uuid4().hex, kind=kind)
+            self._jobs[job.id] = job
+            self._prune()
+            job.future = self._pool.submit(self._run, job, fn)
+        logger.info("Job queued", extra={"job_id": job.id, "kind": kind})
+        return job
+
+    def _run(self, job: Job, fn: Callable[[], Any]) -> None:
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        logger.info("Job started", extra={"job_id": job.id, "kind": job.kind})
+        token = _current_job.set(job)
+        try:
+            job.result = fn()
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.exception("Job failed", extra={"job_id": job.id, "kind": job.kind})
+            job.error = str(e)
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, SUCCEEDED)
+        finally:
+            _current_job.reset(token)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        logger.info(
+            "Job finished",
+            extra={
+                "job_id": job.id,
+                "kind": job.kind,
+                "status": status,
+                "done": job.done,
+                "seconds": job.finished_at - (job.started_at or job.created_at),
+            },
+        )
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, j in self._jobs.items() if j.finished]
+        for job_id in finished[: max(0, len(finished) - self._history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        logger.info("Job cancellation requested", extra={"job_id": job_id})
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until the job has finished (mainly for scripts and tests)."""
+        job = self.get(job_id)
+        if job is None or job.future is None:
+            return job
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not job.finished:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"Job {job_id} still {job.status}")
+            try:
+                job.future.exception(timeout=remaining)
+            except Exception:
+                # Cancelled futures raise here; the status is already final.
+                pass
+        return job
+
+
+_job_runner: Optional[JobRunner] = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _job_runner
+
+    if _job_runner is None:
+        with _job_runner_lock:
+            if _job_runner is None:
+                _job_runner = JobRunner()
+    return _job_runner
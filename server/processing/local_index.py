@@ -0,0 +1,356 @@
+import heapq
+import json
+import logging
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from config import EMBED_DIM
+from qdrant_client.http import models as qm
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_DIR = Path(os.getenv("LOCAL_INDEX_DIR", "data/index"))
+
+# Approximate search is only worth it once exact matmul stops being cheap.
+LOCAL_INDEX_ANN = os.getenv("LOCAL_INDEX_ANN", "0") == "1"
+LOCAL_INDEX_ANN_MIN_POINTS = int(os.getenv("LOCAL_INDEX_ANN_MIN_POINTS", "20000"))
+LOCAL_INDEX_ANN_M = int(os.getenv("LOCAL_INDEX_ANN_M", "16"))
+LOCAL_INDEX_ANN_EF = int(os.getenv("LOCAL_INDEX_ANN_EF", "64"))
+
+_INITIAL_CAPACITY = 1024
+# Rows are re-linked on load if the saved graph lags behind, so the graph
+# file only needs to be rewritten every so often.
+_GRAPH_SAVE_EVERY = 1024
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _payload_matches(payload: Dict[str, Any], condition: Any) -> bool:
+    if not isinstance(condition, qm.FieldCondition) or condition.match is None:
+        raise ValueError(f"Unsupported filter condition for local index: {condition}")
+
+    value = payload.get(condition.key)
+    match = condition.match
+    if isinstance(match, qm.MatchValue):
+        return value == match.value
+    if isinstance(match, qm.MatchAny):
+        return value in match.any
+    if isinstance(match, qm.MatchExcept):
+        return value not in match.except_
+    raise ValueError(f"Unsupported match for local index: {match}")
+
+
+def _filter_matches(payload: Dict[str, Any], filters: qm.Filter) -> bool:
+    must = filters.must or []
+    should = filters.should or []
+    must_not = filters.must_not or []
+    for group in (must, should, must_not):
+        if not isinstance(group, list):
+            raise ValueError("Local index filters must use lists of conditions")
+
+    if not all(_payload_matches(payload, c) for c in must):
+        return False
+    if should and not any(_payload_matches(payload, c) for c in should):
+        return False
+    return not any(_payload_matches(payload, c) for c in must_not)
+
+
+class NeighborGraph:
+    """
+    Single-layer navigable small-world graph in the style of HNSW.
+
+    Each row holds up to `m` neighbor row numbers (-1 marks an empty slot).
+    Inserts link a new row to the closest rows found by a beam search, and
+    queries walk the graph greedily from a handful of entry points.
+    """
+
+    def __init__(self, m: int, ef: int, neighbors: Optional[np.ndarray] = None):
+        self.m = m
+        self.ef = ef
+        self.neighbors = (
+            neighbors if neighbors is not None else np.full((0, m), -1, dtype=np.int32)
+        )
+
+    def _ensure_rows(self, rows: int) -> None:
+        if rows <= len(self.neighbors):
+            return
+        grown = np.full((max(rows, 2 * len(self.neighbors)), self.m), -1, np.int32)
+        grown[: len(self.neighbors)] = self.neighbors
+        self.neighbors = grown
+
+    def _entry_points(self, count: int) -> List[int]:
+        rng = random.Random(count)
+        return sorted({0, *(rng.randrange(count) for _ in range(3))})
+
+    def search(
+        self, vectors: np.ndarray, query: np.ndarray, count: int, ef: int
+    ) -> List[Tuple[float, int]]:
+        """Return up to ef (similarity, row) pairs, best first."""
+        if count == 0:
+            return []
+
+        entries = self._entry_points(count)
+        visited = set(entries)
+        sims = vectors[entries] @ query
+        candidates = [(-float(s), r) for s, r in zip(sims, entries)]
+        results = [(float(s), r) for s, r in zip(sims, entries)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, row = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+
+            fresh = [
+                int(n)
+                for n in self.neighbors[row]
+                if n >= 0 and n < count and int(n) not in visited
+            ]
+            if not fresh:
+                continue
+            visited.update(fresh)
+
+            for s, n in zip(vectors[fresh] @ query, fresh):
+                s = float(s)
+                if len(results) < ef or s > results[0][0]:
+                    heapq.heappush(candidates, (-s, n))
+                    heapq.heappush(results, (s, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _link(self, vectors: np.ndarray, row: int, target: int) -> None:
+        slots = self.neighbors[row]
+        if target in slots:
+            return
+        empty = np.flatnonzero(slots < 0)
+        if len(empty):
+            slots[empty[0]] = target
+            return
+
+        # Full: keep the m most similar of the current neighbors plus target.
+        pool = np.append(slots, target)
+        sims = vectors[pool] @ vectors[row]
+        self.neighbors[row] = pool[np.argsort(-sims)[: self.m]]
+
+    def insert(self, vectors: np.ndarray, row: int) -> None:
+        self._ensure_rows(row + 1)
+        self.neighbors[row] = -1
+        if row == 0:
+            return
+
+        found = self.search(vectors, vectors[row], row, self.ef)
+        for _, neighbor in found[: self.m]:
+            self._link(vectors, row, neighbor)
+            self._link(vectors, neighbor, row)
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index over a memory-mapped float32 matrix.
+
+    Layout under `directory`:
+    - vectors.npy: one L2-normalized row per point
+    - points.jsonl: append-only log of (row, id, payload); last entry wins
+    - graph.npy: neighbor lists for approximate search (optional)
+    """
+
+    def __init__(self, directory: Path, dim: int = EMBED_DIM):
+        self.directory = Path(directory)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._row_by_id: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._graph: Optional[NeighborGraph] = None
+        self._graph_unsaved = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.npy"
+        self._points_path = self.directory / "points.jsonl"
+        self._graph_path = self.directory / "graph.npy"
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self) -> None:
+        if self._vectors_path.exists():
+            self._vectors = np.lib.format.open_memmap(self._vectors_path, mode="r+")
+        else:
+            self._vectors = np.lib.format.open_memmap(
+                self._vectors_path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(_INITIAL_CAPACITY, self.dim),
+            )
+
+        if self._points_path.exists():
+            with self._points_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = json.loads(line)
+                    self._set_row(entry["row"], entry["id"], entry["payload"])
+
+        if LOCAL_INDEX_ANN:
+            neighbors = None
+            if self._graph_path.exists():
+                neighbors = np.load(self._graph_path)
+            self._graph = NeighborGraph(
+                LOCAL_INDEX_ANN_M, LOCAL_INDEX_ANN_EF, neighbors=neighbors
+            )
+            missing = range(
+                len(self._graph.neighbors) if neighbors is not None else 0, len(self)
+            )
+            for row in missing:
+                self._graph.insert(self._vectors, row)
+
+        logger.info(
+            "LocalVectorIndex loaded",
+            extra={"path": str(self.directory), "points": len(self)},
+        )
+
+    def _set_row(self, row: int, point_id: str, payload: Dict[str, Any]) -> None:
+        if row == len(self._ids):
+            self._ids.append(point_id)
+            self._payloads.append(payload)
+        else:
+            self._ids[row] = point_id
+            self._payloads[row] = payload
+        self._row_by_id[point_id] = row
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = self._vectors.shape[0]
+        if rows <= capacity:
+            return
+
+        new_capacity = max(rows, capacity * 2)
+        tmp_path = self._vectors_path.with_suffix(".tmp.npy")
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, self.dim)
+        )
+        grown[: len(self)] = self._vectors[: len(self)]
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self._vectors_path)
+        self._vectors = np.lib.format.open_memmap(self._vectors_path, mode="r+")
+
+    def upsert(self, points: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        if not points:
+            return
+
+        with self._lock:
+            rows: List[int] = []
+            next_row = len(self)
+            for point_id, _, _ in points:
+                row = self._row_by_id.get(point_id)
+                if row is None:
+                    row = next_row
+                    next_row += 1
+                    self._row_by_id[point_id] = row
+                rows.append(row)
+
+            self._ensure_capacity(next_row)
+            matrix = _normalize(np.asarray([p[1] for p in points], dtype=np.float32))
+            self._vectors[rows] = matrix
+            self._vectors.flush()
+
+            new_rows: List[int] = []
+            with self._points_path.open("a", encoding="utf-8") as f:
+                for row, (point_id, _, payload) in zip(rows, points):
+                    if row == len(self._ids):
+                        new_rows.append(row)
+                    self._set_row(row, point_id, payload)
+                    f.write(
+                        json.dumps(
+                            {"row": row, "id": point_id, "payload": payload},
+                            ensure_ascii=False,
+                        )
+                    )
+                    f.write("\n")
+
+            if self._graph is not None:
+                for row in new_rows:
+                    self._graph.insert(self._vectors, row)
+                self._graph_unsaved += len(new_rows)
+                if self._graph_unsaved >= _GRAPH_SAVE_EVERY:
+                    np.save(self._graph_path, self._graph.neighbors[: len(self)])
+                    self._graph_unsaved = 0
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 5,
+        filters: Optional[qm.Filter] = None,
+    ) -> List[Dict[str, Any]]:
+        # upsert may grow (and so replace) the memmap; search a consistent
+        # snapshot. Rows below count are never removed, and graph search
+        # ignores neighbors at or past count, so the search needs no lock.
+        with self._lock:
+            count = len(self)
+            vectors = self._vectors[:count]
+            graph = self._graph
+        if count == 0:
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+
+        use_ann = (
+            graph is not None
+            and filters is None
+            and count >= LOCAL_INDEX_ANN_MIN_POINTS
+        )
+        if use_ann:
+            assert graph is not None
+            found = graph.search(vectors, query, count, max(graph.ef, limit))[:limit]
+            top = [row for _, row in found]
+            scores = [score for score, _ in found]
+        else:
+            sims = vectors @ query
+            if filters is not None:
+                mask = np.fromiter(
+                    (_filter_matches(p, filters) for p in self._payloads[:count]),
+                    dtype=bool,
+                    count=count,
+                )
+                sims = np.where(mask, sims, -np.inf)
+                limit = min(limit, int(mask.sum()))
+            k = min(limit, count)
+            if k <= 0:
+                return []
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])].tolist()
+            scores = [float(sims[row]) for row in top]
+
+        return [
+            {"id": self._ids[row], "score": score, "payload": self._payloads[row]}
+            for row, score in zip(top, scores)
+        ]
+
+
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalVectorIndex:
+    global _local_index
+
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalVectorIndex(LOCAL_INDEX_DIR)
+    return _local_index
@@ -0,0 +1,116 @@
+import unicodedata
+from collections import deque
+from typing import Dict, Generic, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Symbols that are part of a name rather than punctuation, with the words
+# people type instead of them.
+NAME_SYMBOLS: Dict[str, Tuple[str, ...]] = {
+    "♀": ("f", "female"),
+    "♂": ("m", "male"),
+}
+
+
+def normalize_name(text: str) -> str:
+    """
+    Lower-case, NFKC-normalize and reduce all punctuation and whitespace to
+    single spaces, keeping letters, digits and the symbols in NAME_SYMBOLS.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    chars = [c if c.isalnum() or c in NAME_SYMBOLS else " " for c in text]
+    return " ".join("".join(chars).split())
+
+
+def name_aliases(name: str) -> Set[str]:
+    """Spellings that should match `name`, e.g. "Mr. Mime" -> "mr mime", "mrmime"."""
+    base = normalize_name(name)
+    aliases = {base, base.replace(" ", "")}
+
+    for symbol, words in NAME_SYMBOLS.items():
+        if symbol not in base:
+            continue
+        stem = base.replace(symbol, " ").strip()
+        aliases.add(f"{stem} {symbol}")
+        for word in words:
+            aliases.add(f"{stem} {word}")
+
+    aliases.discard("")
+    return aliases
+
+
+class NameMatcher(Generic[T]):
+    """
+    Aho-Corasick automaton over normalized name aliases.
+
+    find_all scans a text once and returns every value whose alias occurs
+    as whole words, so its cost depends on the text length, not on how many
+    names are known.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, T]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[Tuple[int, T]] = []
+
+        for name, value in entries:
+            for alias in name_aliases(name):
+                self._add(alias, value)
+        self._build()
+
+    def _add(self, pattern: str, value: T) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._patterns))
+        self._patterns.append((len(pattern), value))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[T]:
+        """Values mentioned in `text`, in order of first mention."""
+        padded = f" {normalize_name(text)} "
+        hits: List[Tuple[int, int, int]] = []
+
+        state = 0
+        for end, ch in enumerate(padded):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for pattern_id in self._out[state]:
+                length = self._patterns[pattern_id][0]
+                start = end - length + 1
+                if padded[start - 1] == " " and padded[end + 1] == " ":
+                    hits.append((start, -length, pattern_id))
+
+        # Prefer the longest name at each position and drop overlapping hits,
+        # so "Mr. Mime" is not also reported as a "Mime" mention.
+        hits.sort()
+        found: List[T] = []
+        covered_until = -1
+        for start, neg_length, pattern_id in hits:
+            if start <= covered_until:
+                continue
+            covered_until = start - neg_length - 1
+            value = self._patterns[pattern_id][1]
+            if value not in found:
+                found.append(value)
+        return found
@@ -0,0 +1,104 @@
+import logging
+import os
+import re
+import threading
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# o200k_base is the encoding used by the gpt-4o model family.
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+
+# Used when tiktoken cannot load its encoding (e.g. no network on first use).
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+_encoding: Any = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding() -> Optional[Any]:
+    """The tiktoken encoding, or None if it cannot be loaded."""
+    global _encoding, _encoding_loaded
+
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception:
+                    logger.warning(
+                        "tiktoken encoding unavailable, estimating token counts",
+                        extra={"encoding": TOKENIZER_ENCODING},
+                    )
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _hard_split(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    stride = max(1, max_tokens - overlap_tokens)
+    encoding = get_encoding()
+    if encoding is None:
+        size, step = max_tokens * CHARS_PER_TOKEN, stride * CHARS_PER_TOKEN
+        return [text[i : i + size] for i in range(0, len(text), step)]
+
+    ids = encoding.encode(text, disallowed_special=())
+    return [
+        encoding.decode(ids[i : i + max_tokens]) for i in range(0, len(ids), stride)
+    ]
+
+
+def split_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Split `text` into chunks of at most about `max_tokens` tokens.
+
+    Chunks are built from whole paragraphs where possible; a paragraph that
+    is too long on its own is cut into token windows. Consecutive chunks
+    share up to `overlap_tokens` of context, so a fact spanning a boundary
+    is seen whole by at least one chunk.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces: List[Tuple[str, int]] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            pieces.append((paragraph, tokens))
+        else:
+            pieces.extend(
+                (part, count_tokens(part))
+                for part in _hard_split(paragraph, max_tokens, overlap_tokens)
+            )
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(p for p, _ in current))
+            tail = current[-1]
+            if tail[1] <= overlap_tokens and tail[1] + tokens <= max_tokens:
+                current, current_tokens = [tail], tail[1]
+            else:
+                current, current_tokens = [], 0
+        current.append((piece, tokens))
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(p for p, _ in current))
+    return chunks
@@ -1,47 +1,144 @@
+import logging
 import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
-from config import get_qdrant_client
+from config import (
+    COLLECTION_NAME,
+    EMBED_DIM,
+    get_async_qdrant_client,
+    get_qdrant_client,
+)
 from qdrant_client.http import models as qm
 
 from processing.embeddings import embed_text
+from processing.local_index import get_local_index
 
-QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
-COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "pokemon_corpus")
-EMBED_DIM = 1536
+logger = logging.getLogger(__name__)
 
-import logging
+# Fixed namespace so point IDs are identical across processes and runs.
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2e0a-5d7b-5c1e-9a43-0b8f3c2d7e15")
 
-logger = logging.getLogger(__name__)
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "128"))
+UPSERT_PARALLELISM = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
 
+# "qdrant" (default) or "local" for the in-process memory-mapped index.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
 
-def ensure_collection() -> None:
-    client = get_qdrant_client()
-    if COLLECTION_NAME in [c.name for c in client.get_collections().collections]:
-        return
-    client.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=qm.VectorParams(
-            size=EMBED_DIM,
-            distance=qm.Distance.COSINE,
-        ),
+_collection_ready = False
+_collection_lock = threading.Lock()
+
+
+def _vectors_config() -> qm.VectorParams:
+    return qm.VectorParams(
+        size=EMBED_DIM,
+        distance=qm.Distance.COSINE,
     )
 
 
-def upsert_document(doc_id: str, vector: List[float], metadata: Dict[str, Any]) -> None:
+def ensure_collection(force: bool = False) -> None:
+    """
+    Make sure the collection exists. The check runs once per process; later
+    calls return immediately unless force is set.
+    """
+    global _collection_ready
+
+    if _collection_ready and not force:
+        return
+
+    with _collection_lock:
+        if _collection_ready and not force:
+            return
+        client = get_qdrant_client()
+        if not client.collection_exists(COLLECTION_NAME):
+            client.create_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=_vectors_config(),
+            )
+            logger.info(
+                "ensure_collection created collection",
+                extra={"collection": COLLECTION_NAME},
+            )
+        _collection_ready = True
+
+
+def point_id(media_id: str, chunk_index: int = 0) -> str:
+    """Stable point ID for a media item chunk, so re-ingests overwrite in place."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{media_id}:{chunk_index}"))
+
+
+def upsert_documents(
+    documents: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    parallelism: Optional[int] = None,
+    wait: bool = True,
+) -> int:
+    """
+    Upsert many documents in batches, sending up to `parallelism` batches
+    at once. Each document is a dict with keys:
+    - id: media ID
+    - vector
+    - payload
+    - chunk_index (optional, defaults to 0)
+
+    With wait=False Qdrant acknowledges a batch before it is indexed.
+    Returns the number of points written.
+    """
+    if not documents:
+        return 0
+
+    ids = [point_id(doc["id"], doc.get("chunk_index", 0)) for doc in documents]
+
+    if VECTOR_BACKEND == "local":
+        get_local_index().upsert(
+            [(pid, doc["vector"], doc["payload"]) for pid, doc in zip(ids, documents)]
+        )
+        return len(documents)
+
+    batch_size = batch_size or UPSERT_BATCH_SIZE
+    parallelism = parallelism or UPSERT_PARALLELISM
+
+    points = [
+        qm.PointStruct(id=pid, vector=doc["vector"], payload=doc["payload"])
+        for pid, doc in zip(ids, documents)
+    ]
+    batches = [points[i : i + batch_size] for i in range(0, len(points), batch_size)]
+
     ensure_collection()
     client = get_qdrant_client()
-    numeric_id = abs(hash(doc_id))
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=[
-            qm.PointStruct(
-                id=numeric_id,
-                vector=vector,
-                payload=metadata,
-            )
-        ],
+
+    def send(batch: List[qm.PointStruct]) -> None:
+        client.upsert(collection_name=COLLECTION_NAME, points=batch, wait=wait)
+
+    if len(batches) == 1 or parallelism <= 1:
+        for batch in batches:
+            send(batch)
+    else:
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            list(pool.map(send, batches))
+
+    logger.debug(
+        "upsert_documents finished",
+        extra={"points": len(points), "batches": len(batches)},
     )
+    return len(points)
+
+
+def upsert_document(doc_id: str, vector: List[float], metadata: Dict[str, Any]) -> None:
+    upsert_documents([{"id": doc_id, "vector": vector, "payload": metadata}])
+
+
+def _format_hits(points: List[qm.ScoredPoint]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": r.id,
+            "score": r.score,
+            "payload": r.payload,
+        }
+        for r in points
+    ]
 
 
 def search_similar(
@@ -49,23 +146,49 @@ def search_similar(
     limit: int = 5,
     filters: Optional[qm.Filter] = None,
 ) -> List[Dict[str, Any]]:
+    if VECTOR_BACKEND == "local":
+        return get_local_index().search(query_vector, limit=limit, filters=filters)
+
     ensure_collection()
     client = get_qdrant_client()
-    results = client.search(
+    results = client.query_points(
         collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
+        query=query_vector,
         with_payload=True,
         limit=limit,
         query_filter=filters,
     )
-    return [
-        {
-            "id": r.id,
-            "score": r.score,
-            "payload": r.payload,
-        }
-        for r in results
-    ]
+    return _format_hits(results.points)
+
+
+async def search_similar_async(
+    query_vector: List[float],
+    limit: int = 5,
+    filters: Optional[qm.Filter] = None,
+) -> List[Dict[str, Any]]:
+    """Same contract as search_similar, using the shared async client."""
+    global _collection_ready
+
+    if VECTOR_BACKEND == "local":
+        return get_local_index().search(query_vector, limit=limit, filters=filters)
+
+    client = get_async_qdrant_client()
+    if not _collection_ready:
+        if not await client.collection_exists(COLLECTION_NAME):
+            await client.create_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=_vectors_config(),
+            )
+        _collection_ready = True
+
+    results = await client.query_points(
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        with_payload=True,
+        limit=limit,
+        query_filter=filters,
+    )
+    return _format_hits(results.points)
 
 
 def build_vector_context(message: str) -> Dict[str, Any]:
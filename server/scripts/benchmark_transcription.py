@@ -0,0 +1,158 @@
+import argparse
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+from ingestion import transcription
+from ingestion.audio_segments import SAMPLE_RATE, segment_audio, segment_samples
+from ingestion.transcription_backends import (
+    BACKENDS,
+    TranscriptionBackend,
+    load_backend,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
+RAW_AUDIO_DIR = Path("data/raw/audio")
+# Human transcripts of the clips, {file name: text}, beside the audio.
+REFERENCES_FILE = "references.json"
+# Without human transcripts, WER is measured against this backend's output:
+# agreement with the float32 reference rather than accuracy.
+REFERENCE_BACKEND = "whisper"
+
+
+def normalize_words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Levenshtein distance over words, one row at a time.
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(
+                row[j] + 1, row[j - 1] + 1, prev + (ref_word != hyp_word)
+            )
+    return row[-1] / len(ref)
+
+
+def mean_word_error_rate(
+    references: Mapping[str, str], texts: Mapping[str, str]
+) -> Optional[float]:
+    """Mean WER over the clips that have a reference; None when none do."""
+    scores = [
+        word_error_rate(references[clip], text)
+        for clip, text in texts.items()
+        if clip in references
+    ]
+    return sum(scores) / len(scores) if scores else None
+
+
+def _transcribe(backend: TranscriptionBackend, audio: np.ndarray) -> str:
+    # Same segmentation as the service, so the timings match production.
+    return " ".join(
+        backend.transcribe(segment_samples(audio, segment)).strip()
+        for segment in segment_audio(audio, SAMPLE_RATE)
+    ).strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare transcription backends on speed and word error rate."
+    )
+    parser.add_argument(
+        "--backends",
+        default="whisper,whisper-int8",
+        help=f"comma-separated, from {sorted(BACKENDS)}",
+    )
+    parser.add_argument("--model", default=transcription.WHISPER_MODEL)
+    parser.add_argument("--audio-dir", type=Path, default=RAW_AUDIO_DIR)
+    parser.add_argument("--limit", type=int, default=0, help="clips to use, 0 = all")
+    parser.add_argument(
+        "--references",
+        type=Path,
+        help=f"JSON {{file name: transcript}}; default AUDIO_DIR/{REFERENCES_FILE}",
+    )
+    parser.add_argument(
+        "--reference-backend",
+        default=REFERENCE_BACKEND,
+        help="score against this backend's output when there is no references "
+        "file (agreement, not accuracy)",
+    )
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    paths = sorted(args.audio_dir.glob("*.mp3"))
+    if args.limit:
+        paths = paths[: args.limit]
+    if not paths:
+        raise SystemExit(f"No .mp3 clips in {args.audio_dir}")
+
+    clips: Dict[str, np.ndarray] = {
+        p.name: transcription.load_audio(str(p)) for p in paths
+    }
+    audio_seconds = sum(len(a) for a in clips.values()) / SAMPLE_RATE
+    logging.info("Decoded %d clips, %.1fs of audio", len(clips), audio_seconds)
+
+    references: Dict[str, str] = {}
+    reference_backend: Optional[str] = None
+    references_path = args.references or args.audio_dir / REFERENCES_FILE
+    if references_path.exists():
+        references = json.loads(references_path.read_text(encoding="utf-8"))
+        unscored = sorted(set(clips) - set(references))
+        if unscored:
+            logging.warning("No reference transcript for %s", ", ".join(unscored))
+    else:
+        reference_backend = args.reference_backend
+        logging.warning(
+            "%s not found; WER is measured against %s/%s",
+            references_path,
+            reference_backend,
+            args.model,
+        )
+        # Run first, so every later backend is scored against it.
+        if reference_backend in backends:
+            backends.remove(reference_backend)
+        backends.insert(0, reference_backend)
+
+    for name in backends:
+        start = time.perf_counter()
+        backend = load_backend(name, args.model)
+        backend.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        load_seconds = time.perf_counter() - start
+
+        texts: Dict[str, str] = {}
+        start = time.perf_counter()
+        for clip, audio in clips.items():
+            texts[clip] = _transcribe(backend, audio)
+        elapsed = time.perf_counter() - start
+
+        if name == reference_backend:
+            references = texts
+        wer = mean_word_error_rate(references, texts)
+        logging.info(
+            "%s/%s: load %.1fs, %.1fs for %.1fs of audio, RTF %.3f, WER %s",
+            name,
+            args.model,
+            load_seconds,
+            elapsed,
+            audio_seconds,
+            elapsed / audio_seconds,
+            "n/a" if wer is None else f"{wer:.3f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
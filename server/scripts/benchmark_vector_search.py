@@ -0,0 +1,70 @@
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from processing import local_index
+from processing.local_index import LocalVectorIndex
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+
+
+def _time_queries(index: LocalVectorIndex, queries: np.ndarray, k: int):
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append([h["id"] for h in index.search(q.tolist(), limit=k)])
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the local vector index on random vectors."
+    )
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--ann", action="store_true", help="also time ANN search")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.points, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    points = [(str(i), v, {"media_id": str(i)}) for i, v in enumerate(vectors)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local_index.LOCAL_INDEX_ANN = args.ann
+        local_index.LOCAL_INDEX_ANN_MIN_POINTS = 1
+
+        start = time.perf_counter()
+        index = LocalVectorIndex(Path(tmp), dim=args.dim)
+        index.upsert(points)
+        logging.info(
+            "Indexed %d points in %.2fs", args.points, time.perf_counter() - start
+        )
+
+        graph = index._graph
+        index._graph = None
+        exact, exact_ms = _time_queries(index, queries, args.k)
+        logging.info("Exact search: %.3f ms/query", exact_ms)
+
+        if graph is not None:
+            index._graph = graph
+            approx, approx_ms = _time_queries(index, queries, args.k)
+            recall = np.mean(
+                [len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)]
+            )
+            logging.info(
+                "ANN search: %.3f ms/query, recall@%d %.3f", approx_ms, args.k, recall
+            )
+
+
+if __name__ == "__main__":
+    main()
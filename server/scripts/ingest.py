@@ -1,8 +1,11 @@
 import logging
 
-from scripts.ingest_audio_corpus import main as ingest_audio_data
-from scripts.ingest_images_corpus import main as ingest_images_data
-from scripts.ingest_text_corpus import main as ingest_text_data
+from ingestion.media_cache import media_cache_stats
+from ingestion.pipeline import ingest_corpus
+from processing.embeddings import embedding_cache_stats
+from scripts.ingest_audio_corpus import RAW_AUDIO_DIR
+from scripts.ingest_images_corpus import RAW_IMAGE_DIR
+from scripts.ingest_text_corpus import RAW_TEXT_DIR
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -13,13 +16,13 @@ logging.basicConfig(
 
 def main():
     logger.info("Starting ingestion process...")
-    logger.info("Ingesting text data...")
-    ingest_text_data()
-    logger.info("Ingesting image data...")
-    ingest_images_data()
-    logger.info("Ingesting audio data...")
-    ingest_audio_data()
-    logger.info("Ingestion process completed.")
+    # Text, images and audio are ingested concurrently; see ingestion.pipeline.
+    stats = ingest_corpus(
+        {"text": RAW_TEXT_DIR, "image": RAW_IMAGE_DIR, "audio": RAW_AUDIO_DIR}
+    )
+    logger.info("Ingestion process completed: %s", stats)
+    logger.info("Extracted text cache: %s", media_cache_stats())
+    logger.info("Embedding cache: %s", embedding_cache_stats())
 
 
 if __name__ == "__main__":
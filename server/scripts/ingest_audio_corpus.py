@@ -4,6 +4,7 @@ from typing import Dict
 
 from data.pokemon_mappings import POKEMON_MAPPING
 from ingestion.audio_ingestion import ingest_audio, write_audio_record
+from ingestion.pipeline import ingest_corpus
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -41,23 +42,7 @@ def add_audio(path: Path) -> Dict[str, str]:
 
 
 def main() -> None:
-    if not RAW_AUDIO_DIR.exists():
-        logging.warning("Audio directory %s does not exist", RAW_AUDIO_DIR)
-        return
-
-    for path in RAW_AUDIO_DIR.iterdir():
-        if not path.is_file():
-            continue
-
-        if path.suffix.lower() not in {".mp3"}:
-            continue
-
-        pokemon, generation, types = resolve_metadata(path)
-
-        record = ingest_audio(
-            str(path), pokemon=pokemon, generation=generation, types=types
-        )
-        write_audio_record(record)
+    ingest_corpus({"audio": RAW_AUDIO_DIR})
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ from typing import Dict
 
 from data.pokemon_mappings import POKEMON_MAPPING
 from ingestion.image_ingestion import ingest_image, write_image_record
+from ingestion.pipeline import ingest_corpus
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,23 +46,7 @@ def add_image(raw_file: Path) -> Dict[str, str]:
 
 
 def main() -> None:
-    if not RAW_IMAGE_DIR.exists():
-        logging.warning("Image directory %s does not exist", RAW_IMAGE_DIR)
-        return
-
-    for path in RAW_IMAGE_DIR.iterdir():
-        if not path.is_file():
-            continue
-
-        if path.suffix.lower() not in {".png", ".jpg"}:
-            continue
-
-        pokemon, generation, types = resolve_metadata(path)
-
-        record = ingest_image(
-            str(path), pokemon=pokemon, generation=generation, types=types
-        )
-        write_image_record(record)
+    ingest_corpus({"image": RAW_IMAGE_DIR})
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Dict
 
 from data.pokemon_mappings import POKEMON_MAPPING
+from ingestion.pipeline import ingest_corpus
 from ingestion.text_ingestion import ingest_pdf, ingest_txt, write_text_record
 
 logging.basicConfig(
@@ -58,25 +59,7 @@ def add_text(raw_file: Path) -> Dict[str, str]:
 
 
 def main() -> None:
-    for path in RAW_TEXT_DIR.iterdir():
-        if not path.is_file():
-            continue
-
-        if path.suffix.lower() not in {".pdf", ".txt"}:
-            continue
-
-        pokemon, generation, types = resolve_metadata(path)
-
-        if path.suffix.lower() == ".pdf":
-            record = ingest_pdf(
-                str(path), pokemon=pokemon, generation=generation, types=types
-            )
-            write_text_record(record)
-        elif path.suffix.lower() == ".txt":
-            record = ingest_txt(
-                str(path), pokemon=pokemon, generation=generation, types=types
-            )
-            write_text_record(record)
+    ingest_corpus({"text": RAW_TEXT_DIR})
 
 
 if __name__ == "__main__":
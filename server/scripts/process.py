@@ -1,15 +1,30 @@
+import argparse
 import logging
 
+from processing.entity_extraction import extraction_cache_stats
 from processing.graph_builder import build_graph_and_export_to_csv_and_json
 
 logging.basicConfig(level=logging.INFO)
 
 
-def main():
+def main(full: bool = False, batch: bool = False):
     logging.info("Building graph with data...")
-    build_graph_and_export_to_csv_and_json()
+    build_graph_and_export_to_csv_and_json(full=full or None, batch=batch or None)
     logging.info("Graph built and exported to CSV and JSON successfully.")
+    logging.info("Extraction cache: %s", extraction_cache_stats())
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Build the Pokémon graph.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="re-extract every record instead of only new or changed ones",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="extract through one batch job instead of interactive calls",
+    )
+    args = parser.parse_args()
+    main(full=args.full, batch=args.batch)
@@ -0,0 +1,30 @@
+import pytest
+from ingestion import media_cache, transcription
+from processing import embeddings, entity_extraction, graph_builder, jobs
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    # keep on-disk caches out of the working tree and independent per test
+    monkeypatch.setattr(
+        embeddings, "EMBED_CACHE_PATH", tmp_path / "cache" / "embeddings.sqlite"
+    )
+    monkeypatch.setattr(embeddings, "_embedding_cache", None)
+    monkeypatch.setattr(
+        entity_extraction,
+        "EXTRACTION_CACHE_PATH",
+        tmp_path / "cache" / "extractions.sqlite",
+    )
+    monkeypatch.setattr(entity_extraction, "_extraction_cache", None)
+    monkeypatch.setattr(
+        graph_builder, "GRAPH_MANIFEST", tmp_path / "graph" / "manifest.json"
+    )
+    monkeypatch.setattr(
+        graph_builder, "GRAPH_CHECKPOINT", tmp_path / "graph" / "checkpoint.jsonl"
+    )
+    monkeypatch.setattr(jobs, "_job_runner", None)
+    monkeypatch.setattr(
+        media_cache, "MEDIA_CACHE_PATH", tmp_path / "cache" / "media_text.sqlite"
+    )
+    monkeypatch.setattr(media_cache, "_media_cache", None)
+    monkeypatch.setattr(transcription, "_service", None)
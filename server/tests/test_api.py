@@ -1,5 +1,6 @@
 from api.main import app
 from fastapi.testclient import TestClient
+from processing.jobs import get_job_runner
 
 client = TestClient(app)
 
@@ -21,10 +22,18 @@ def test_ingest_endpoint_smoke(monkeypatch):
     monkeypatch.setattr(ingest_routes, "run_full_ingest", fake_ingest, raising=True)
 
     resp = client.post("/ingest")
-    assert resp.status_code == 200
+    assert resp.status_code == 202
     assert resp.json()["message"].startswith("Ingestion process")
+
+    job_id = resp.json()["job_id"]
+    get_job_runner().wait(job_id, timeout=5)
     assert calls["ingest"] is True
 
+    status = client.get(f"/jobs/{job_id}")
+    assert status.status_code == 200
+    assert status.json()["kind"] == "ingest"
+    assert status.json()["status"] == "succeeded"
+
 
 def test_process_endpoint_smoke(monkeypatch):
     calls = {"process": False}
@@ -37,9 +46,18 @@ def test_process_endpoint_smoke(monkeypatch):
     monkeypatch.setattr(process_routes, "run_build_graph", fake_process, raising=True)
 
     resp = client.post("/process")
-    assert resp.status_code == 200
-    assert "Graph built" in resp.json()["message"]
+    assert resp.status_code == 202
+    assert "Graph build" in resp.json()["message"]
+
+    job_id = resp.json()["job_id"]
+    get_job_runner().wait(job_id, timeout=5)
     assert calls["process"] is True
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "succeeded"
+
+
+def test_unknown_job_returns_404():
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.delete("/jobs/missing").status_code == 404
 
 
 def test_chat_endpoint_uses_openai_and_returns_content(monkeypatch):
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from ingestion import audio_segments
+from ingestion.audio_segments import (
+    SAMPLE_RATE,
+    segment_audio,
+    segment_samples,
+    speech_regions,
+)
+
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.float32)
+
+
+def _seconds(spans):
+    return [(round(s / SAMPLE_RATE, 1), round(e / SAMPLE_RATE, 1)) for s, e in spans]
+
+
+def _segment_seconds(segments):
+    return [_seconds(segment) for segment in segments]
+
+
+def test_leading_trailing_and_long_silences_are_trimmed(monkeypatch):
+    monkeypatch.setattr(audio_segments, "AUDIO_SEGMENT_PAD_MS", 0)
+    audio = np.concatenate([_silence(2), _tone(3), _silence(1), _tone(2), _silence(4)])
+
+    assert _seconds(speech_regions(audio)) == [(2.0, 5.0), (6.0, 8.0)]
+
+
+def test_short_pauses_and_faint_noise_stay_inside_speech(monkeypatch):
+    monkeypatch.setattr(audio_segments, "AUDIO_SEGMENT_PAD_MS", 0)
+    rng = np.random.default_rng(0)
+    hiss = (0.0005 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+    audio = np.concatenate([hiss, _tone(2), _silence(0.2), _tone(2), hiss])
+
+    assert _seconds(speech_regions(audio)) == [(1.0, 5.2)]
+
+
+def test_segments_are_bounded_and_cut_at_pauses(monkeypatch):
+    monkeypatch.setattr(audio_segments, "AUDIO_SEGMENT_PAD_MS", 0)
+    monkeypatch.setattr(audio_segments, "AUDIO_MAX_SEGMENT_SECONDS", 10)
+    audio = np.concatenate(
+        [_tone(4), _silence(1), _tone(4), _silence(1), _tone(4), _silence(1), _tone(25)]
+    )
+
+    assert _segment_seconds(segment_audio(audio)) == [
+        [(0.0, 4.0), (5.0, 9.0)],
+        [(10.0, 14.0)],
+        [(15.0, 25.0)],
+        [(25.0, 35.0)],
+        [(35.0, 40.0)],
+    ]
+
+
+def test_pauses_between_regions_are_not_in_the_segment_samples(monkeypatch):
+    monkeypatch.setattr(audio_segments, "AUDIO_SEGMENT_PAD_MS", 0)
+    audio = np.concatenate([_tone(2), _silence(8), _tone(2)])
+
+    segments = segment_audio(audio)
+    samples = segment_samples(audio, segments[0])
+
+    assert _segment_seconds(segments) == [[(0.0, 2.0), (10.0, 12.0)]]
+    # Region edges snap to VAD frames, so allow a frame either way.
+    assert len(samples) / SAMPLE_RATE == pytest.approx(4.0, abs=0.06)
+    assert np.count_nonzero(samples == 0) < 0.06 * SAMPLE_RATE
+
+
+def test_silence_and_disabled_vad():
+    assert segment_audio(_silence(3)) == []
+    assert segment_audio(np.zeros(0, dtype=np.float32)) == []
+
+
+def test_disabled_vad_only_bounds_segment_length(monkeypatch):
+    monkeypatch.setattr(audio_segments, "AUDIO_VAD_ENABLED", False)
+    monkeypatch.setattr(audio_segments, "AUDIO_MAX_SEGMENT_SECONDS", 30)
+
+    assert _segment_seconds(segment_audio(_silence(45))) == [
+        [(0.0, 30.0)],
+        [(30.0, 45.0)],
+    ]
+    assert audio_segments.segmentation_fingerprint().startswith("novad")
@@ -0,0 +1,118 @@
+import json
+from typing import Any, Dict, Union
+
+import pytest
+from processing import batch_extraction, entity_extraction, graph_builder
+from processing.batch_extraction import LocalBatchExecutor, extract_entities_batch
+
+
+def _respond(body: Dict[str, Any]) -> str:
+    prompt = body["input"][1]["content"]
+    media_id = prompt.split("Media ID: ")[1].split("\n")[0]
+    if media_id == "broken":
+        raise RuntimeError("model error")
+    return json.dumps(
+        {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": "Eevee"}],
+        }
+    )
+
+
+def test_extract_entities_batch_runs_one_job(tmp_path, monkeypatch):
+    interactive: list[str] = []
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        interactive.append(media_id)
+        return {key: [] for key in entity_extraction.FRAGMENT_KEYS}
+
+    monkeypatch.setattr(entity_extraction, "extract_entities", fake_extract_entities)
+
+    records = [
+        {"id": "first", "text": "Eevee has many forms."},
+        {"id": "pika", "text": "Pikachu is Electric.", "pokemon": "Pikachu"},
+        {"id": "broken", "text": "Unreadable."},
+        {"id": "last", "text": "Eevee again."},
+    ]
+    executor = LocalBatchExecutor(_respond, cacheable=True)
+
+    fragments = extract_entities_batch(records, executor, tmp_path, poll_seconds=0)
+
+    jobs = sorted(tmp_path.glob("extract-*.jsonl"))
+    job = [p for p in jobs if not p.name.endswith(".output.jsonl")][0]
+    lines = [json.loads(line) for line in job.read_text().splitlines()]
+    # The gazetteer resolves "pika", so only three requests are submitted.
+    assert len(lines) == 3
+    assert all(line["url"] == "/v1/responses" for line in lines)
+
+    assert fragments[0]["mentions_edges"][0]["from_media_id"] == "first"
+    assert fragments[1]["mentions_edges"] == [
+        {"from_media_id": "pika", "to_pokemon": "Pikachu"}
+    ]
+    assert fragments[3]["mentions_edges"][0]["from_media_id"] == "last"
+    # The failed line falls back to an interactive call.
+    assert interactive == ["broken"]
+
+    # Successful results were cached, so a rerun submits only the failure.
+    extract_entities_batch(records, executor, tmp_path / "again", poll_seconds=0)
+    rerun = next((tmp_path / "again").glob("extract-*[0-9].jsonl"))
+    assert len(rerun.read_text().splitlines()) == 1
+
+
+def test_build_graph_batch_mode_with_local_executor(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    text_jsonl.write_text(
+        '{"id": "a", "text": "Eevee"}\n{"id": "b", "text": "Eevee"}\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none")
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none")
+    monkeypatch.setattr(batch_extraction, "BATCH_JOB_DIR", tmp_path / "batches")
+    monkeypatch.setattr(
+        batch_extraction, "get_batch_executor", lambda: LocalBatchExecutor(_respond)
+    )
+
+    def no_interactive_calls(*args, **kwargs):
+        pytest.fail("batch mode should not call extract_entities")
+
+    monkeypatch.setattr(entity_extraction, "extract_entities", no_interactive_calls)
+
+    graph = graph_builder.build_graph(full=True, batch=True)
+
+    assert graph["mentions_edges"] == [
+        {"from_media_id": "a", "to_pokemon": "Eevee"},
+        {"from_media_id": "b", "to_pokemon": "Eevee"},
+    ]
+
+
+def test_stand_in_results_are_not_cached_or_kept_in_the_manifest(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    text_jsonl.write_text('{"id": "a", "text": "Eevee"}\n', encoding="utf-8")
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none")
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none")
+    monkeypatch.setattr(batch_extraction, "BATCH_JOB_DIR", tmp_path / "batches")
+    monkeypatch.setattr(batch_extraction, "BATCH_EXECUTOR", "local")
+
+    graph_builder.build_graph(full=True, batch=True)
+
+    assert graph_builder.load_manifest() == {}
+    key = entity_extraction.extraction_requests("Eevee", "a", None)[0][0]
+    assert entity_extraction.get_extraction_cache().get(key) is None
+
+
+def test_get_batch_executor_selects_by_name(monkeypatch):
+    monkeypatch.setattr(batch_extraction, "BATCH_EXECUTOR", "local")
+    assert isinstance(batch_extraction.get_batch_executor(), LocalBatchExecutor)
+
+    monkeypatch.setattr(batch_extraction, "BATCH_EXECUTOR", "nope")
+    with pytest.raises(ValueError, match="Unknown batch executor"):
+        batch_extraction.get_batch_executor()
+    with pytest.raises(TypeError):
+        batch_extraction.BatchExecutor()  # type: ignore[abstract]
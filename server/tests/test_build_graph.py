@@ -1,7 +1,9 @@
 import json
+import threading
 from pathlib import Path
 from typing import Any, Dict, Union
 
+import pytest
 from processing import entity_extraction, graph_builder
 
 
@@ -104,3 +106,254 @@ def test_build_graph_merges_fragments(tmp_path, monkeypatch):
         "from_media_id": "squirtle_card",
         "to_pokemon": "Squirtle",
     } in graph["mentions_edges"]
+
+
+def test_build_graph_merges_concurrent_fragments_in_record_order(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    records = [
+        {"id": f"doc_{i}", "text": f"text {i}", "pokemon": f"Mon{i}"} for i in range(12)
+    ]
+    _write_jsonl(text_jsonl, records)
+
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl, raising=True)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none", raising=True)
+
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    finished = [threading.Event() for _ in records]
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        # Within each group of four, a record waits for the next one, so
+        # completion order is reversed and at least two run at once.
+        index = int(media_id.split("_")[1])
+        if index % 4 != 3:
+            assert finished[index + 1].wait(5)
+        with lock:
+            in_flight -= 1
+        finished[index].set()
+        return {
+            "pokemon_nodes": [
+                {
+                    "name": pokemon_hint,
+                    "generation": 1,
+                    "primary_type": None,
+                    "secondary_type": None,
+                }
+            ],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": pokemon_hint}],
+        }
+
+    monkeypatch.setattr(
+        entity_extraction, "extract_entities", fake_extract_entities, raising=True
+    )
+
+    graph = graph_builder.build_graph(concurrency=4)
+
+    assert 1 < peak <= 4
+    assert [n["name"] for n in graph["pokemon_nodes"]] == [
+        r["pokemon"] for r in records
+    ]
+    assert [e["from_media_id"] for e in graph["mentions_edges"]] == [
+        r["id"] for r in records
+    ]
+    assert graph == graph_builder.build_graph(concurrency=1, full=True)
+
+
+def test_build_graph_incremental_only_extracts_changes(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl, raising=True)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none", raising=True)
+
+    extracted: list[str] = []
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        extracted.append(media_id)
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [{"name": text}],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": text}],
+        }
+
+    monkeypatch.setattr(
+        entity_extraction, "extract_entities", fake_extract_entities, raising=True
+    )
+
+    _write_jsonl(
+        text_jsonl,
+        [
+            {"id": "a", "text": "Pikachu"},
+            {"id": "b", "text": "Eevee"},
+            {"id": "c", "text": "Onix"},
+        ],
+    )
+    graph_builder.build_graph(concurrency=1)
+    assert extracted == ["a", "b", "c"]
+
+    extracted.clear()
+    _write_jsonl(
+        text_jsonl,
+        [
+            {"id": "a", "text": "Pikachu"},
+            {"id": "b", "text": "Vaporeon"},
+            {"id": "d", "text": "Mew"},
+        ],
+    )
+    graph = graph_builder.build_graph(concurrency=1)
+
+    assert extracted == ["b", "d"]
+    assert graph["mentions_edges"] == [
+        {"from_media_id": "a", "to_pokemon": "Pikachu"},
+        {"from_media_id": "b", "to_pokemon": "Vaporeon"},
+        {"from_media_id": "d", "to_pokemon": "Mew"},
+    ]
+    assert {"name": "Onix"} not in graph["type_nodes"]
+    assert {"name": "Eevee"} not in graph["type_nodes"]
+
+    extracted.clear()
+    graph_builder.build_graph(concurrency=1, full=True)
+    assert extracted == ["a", "b", "d"]
+
+    # Fragments built under other chunking or packing settings are stale.
+    monkeypatch.setattr(
+        entity_extraction,
+        "extract_entities_packed",
+        lambda docs: [fake_extract_entities(d["text"], d["media_id"]) for d in docs],
+    )
+    for setting, value in [
+        ("EXTRACTION_CHUNK_TOKENS", 50),
+        ("EXTRACTION_PACKING", True),
+        ("EXTRACTION_PACK_MAX_TOKENS", 100),
+    ]:
+        monkeypatch.setattr(entity_extraction, setting, value)
+        extracted.clear()
+        graph_builder.build_graph(concurrency=1)
+        assert sorted(extracted) == ["a", "b", "d"]
+
+
+def test_build_graph_resumes_from_checkpoint(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl, raising=True)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(graph_builder, "GRAPH_CHECKPOINT_EVERY", 2, raising=True)
+
+    _write_jsonl(text_jsonl, [{"id": f"doc_{i}", "text": str(i)} for i in range(5)])
+
+    extracted: list[str] = []
+    fail_on = {"doc_3"}
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        if media_id in fail_on:
+            raise RuntimeError("provider outage")
+        extracted.append(media_id)
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": text}],
+        }
+
+    monkeypatch.setattr(
+        entity_extraction, "extract_entities", fake_extract_entities, raising=True
+    )
+
+    with pytest.raises(RuntimeError):
+        graph_builder.build_graph(concurrency=1, full=True)
+    assert graph_builder.GRAPH_CHECKPOINT.exists()
+    checkpoint = graph_builder.load_checkpoint()
+    assert sorted(checkpoint) == ["doc_0", "doc_1"]
+    # A crash mid-append leaves a partial line; the entries before it count.
+    with graph_builder.GRAPH_CHECKPOINT.open("a", encoding="utf-8") as f:
+        f.write('{"id": "doc_2", "ha')
+    assert sorted(graph_builder.load_checkpoint()) == ["doc_0", "doc_1"]
+
+    extracted.clear()
+    fail_on.clear()
+    graph = graph_builder.build_graph(concurrency=1, full=True)
+
+    assert extracted == ["doc_2", "doc_3", "doc_4"]
+    assert len(graph["mentions_edges"]) == 5
+    assert not graph_builder.GRAPH_CHECKPOINT.exists()
+
+
+def test_build_graph_packs_short_records(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl, raising=True)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none", raising=True)
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_PACKING", True, raising=True)
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_PACK_MAX_DOCS", 2, raising=True)
+
+    records = [{"id": f"doc_{i}", "text": f"snippet {i}"} for i in range(5)]
+    records.insert(2, {"id": "long", "text": "word " * 20000})
+    _write_jsonl(text_jsonl, records)
+
+    packs: list[list[str]] = []
+    singles: list[str] = []
+
+    def fragment_for(media_id: str) -> Dict[str, Any]:
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": "X"}],
+        }
+
+    def fake_extract_entities_packed(documents):
+        packs.append([d["media_id"] for d in documents])
+        return [fragment_for(d["media_id"]) for d in documents]
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        singles.append(media_id)
+        return fragment_for(media_id)
+
+    monkeypatch.setattr(
+        entity_extraction, "extract_entities_packed", fake_extract_entities_packed
+    )
+    monkeypatch.setattr(entity_extraction, "extract_entities", fake_extract_entities)
+
+    graph = graph_builder.build_graph(concurrency=2, full=True)
+
+    # The long record and the leftover single are sent on their own.
+    assert packs == [["doc_0", "doc_1"], ["doc_2", "doc_3"]]
+    assert sorted(singles) == ["doc_4", "long"]
+    assert [e["from_media_id"] for e in graph["mentions_edges"]] == [
+        r["id"] for r in records
+    ]
+
+
+def test_checkpoint_saves_append_new_records(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    entry = {"hash": "h", "fragment": {}}
+
+    graph_builder.save_checkpoint({"a": entry}, path)
+    graph_builder.save_checkpoint({"b": entry}, path, append=True)
+    graph_builder.save_checkpoint({"a": {"hash": "h2", "fragment": {}}}, path, True)
+
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
+    assert graph_builder.load_checkpoint(path) == {
+        "a": {"hash": "h2", "fragment": {}},
+        "b": entry,
+    }
@@ -0,0 +1,107 @@
+import threading
+from typing import Any, Dict, List
+
+from processing import embeddings
+
+
+class FakeEmbedding:
+    def __init__(self, index: int, text: str):
+        self.index = index
+        self.embedding = [float(len(text))]
+
+
+class FakeEmbeddingsResponse:
+    def __init__(self, inputs: List[str]):
+        # provider does not guarantee order, so return it reversed
+        self.data = [FakeEmbedding(i, t) for i, t in enumerate(inputs)][::-1]
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls: List[List[str]] = []
+        client = self
+
+        class Embeddings:
+            def create(self, model: str, input: List[str]):
+                client.calls.append(list(input))
+                return FakeEmbeddingsResponse(input)
+
+        self.embeddings = Embeddings()
+
+
+def test_embed_texts_batches_and_keeps_order(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(embeddings, "openai_client", fake, raising=True)
+    monkeypatch.setattr(embeddings, "EMBED_BATCH_SIZE", 2, raising=True)
+
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    vectors = embeddings.embed_texts(texts)
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert fake.calls == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+def test_embed_texts_truncates_long_inputs(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(embeddings, "openai_client", fake, raising=True)
+
+    vectors = embeddings.embed_texts(["x" * 5000])
+
+    assert vectors == [[float(embeddings.MAX_EMBED_CHARS)]]
+
+
+def test_embed_text_coalesces_concurrent_calls(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(embeddings, "openai_client", fake, raising=True)
+
+    coalescer = embeddings._EmbeddingCoalescer(window_s=0.2, max_batch=100)
+    monkeypatch.setattr(embeddings, "_coalescer", coalescer, raising=True)
+
+    results: Dict[str, Any] = {}
+    texts = ["a" * n for n in range(1, 9)]
+
+    def worker(text: str) -> None:
+        results[text] = embeddings.embed_text(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake.calls) == 1
+    assert sorted(fake.calls[0]) == sorted(texts)
+    for text in texts:
+        assert results[text] == [float(len(text))]
+
+
+def test_embed_texts_reuses_cached_vectors(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(embeddings, "openai_client", fake, raising=True)
+
+    first = embeddings.embed_texts(["Bulbasaur  is a\nGrass type", "Squirtle"])
+    second = embeddings.embed_texts(["Bulbasaur is a Grass type", "Squirtle", "Mew"])
+
+    assert second[:2] == first
+    assert fake.calls == [["Bulbasaur is a Grass type", "Squirtle"], ["Mew"]]
+
+    stats = embeddings.embedding_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    from processing.cache import SqliteCache
+
+    cache = SqliteCache(tmp_path / "lru.sqlite", max_bytes=20)
+    cache.set("a", b"x" * 8)
+    cache.set("b", b"x" * 8)
+    assert cache.get("a") is not None  # "b" is now the oldest entry
+
+    cache.set("c", b"x" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
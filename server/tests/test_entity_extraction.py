@@ -1,7 +1,8 @@
 import json
 from typing import Any, Dict
 
-from processing.entity_extraction import extract_entities
+from processing.entity_extraction import extract_entities, parse_fragment
+from processing.fragments import merge_fragments
 
 
 def test_extract_entities_parse_valid_json(monkeypatch):
@@ -98,3 +99,228 @@ def test_extract_entities_parse_valid_json(monkeypatch):
         "from_media_id": "bulbasaur_audio",
         "to_pokemon": "Charmander",
     } in result["mentions_edges"]
+
+
+def test_extract_entities_reuses_cached_fragment(monkeypatch):
+    from processing import entity_extraction
+
+    payload = {
+        "pokemon_nodes": [],
+        "type_nodes": [{"name": "Fire"}],
+        "pokemon_type_edges": [],
+        "evolution_edges": [],
+        "mentions_edges": [],
+    }
+    calls = []
+
+    class FakeResponses:
+        def create(self, *args, **kwargs):
+            calls.append(kwargs)
+            content = type("C", (), {"text": json.dumps(payload)})()
+            item = type("I", (), {"content": [content]})()
+            return type("R", (), {"output": [item]})()
+
+    class FakeClient:
+        responses = FakeResponses()
+
+    monkeypatch.setattr(entity_extraction, "openai_client", FakeClient())
+
+    first = extract_entities("Charmander is Fire.", "charmander_fact", "Charmander")
+    second = extract_entities("Charmander is Fire.", "charmander_fact", "Charmander")
+    assert first == second == payload
+    assert len(calls) == 1
+
+    # A different media ID or a changed prompt fingerprint is a miss.
+    extract_entities("Charmander is Fire.", "other_fact", "Charmander")
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_MODEL", "gpt-4o")
+    extract_entities("Charmander is Fire.", "charmander_fact", "Charmander")
+    assert len(calls) == 3
+
+    stats = entity_extraction.extraction_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 3
+
+
+def test_extract_entities_packed_attributes_fragments_by_media_id(monkeypatch):
+    from processing import entity_extraction
+
+    requests = []
+
+    def fragment_for(media_id: str) -> Dict[str, Any]:
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [{"from_media_id": media_id, "to_pokemon": "Pikachu"}],
+        }
+
+    class FakeResponses:
+        def create(self, *args, **kwargs):
+            requests.append(kwargs)
+            fmt = kwargs["text"]["format"]
+            if fmt["name"] == "PokemonGraphPackedExtraction":
+                # Out of order, and "c" is left out.
+                body = {
+                    "documents": [
+                        {"media_id": "b", **fragment_for("b")},
+                        {"media_id": "a", **fragment_for("a")},
+                    ]
+                }
+            else:
+                body = fragment_for("c")
+            content = type("C", (), {"text": json.dumps(body)})()
+            item = type("I", (), {"content": [content]})()
+            return type("R", (), {"output": [item]})()
+
+    class FakeClient:
+        responses = FakeResponses()
+
+    monkeypatch.setattr(entity_extraction, "openai_client", FakeClient())
+
+    documents = [
+        {"text": "Pikachu A", "media_id": "a"},
+        {"text": "Pikachu B", "media_id": "b", "pokemon_hint": "Pikachu"},
+        {"text": "Pikachu C", "media_id": "c"},
+    ]
+    fragments = entity_extraction.extract_entities_packed(documents)
+
+    assert [f["mentions_edges"][0]["from_media_id"] for f in fragments] == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert [r["text"]["format"]["name"] for r in requests] == [
+        "PokemonGraphPackedExtraction",
+        "PokemonGraphExtraction",
+    ]
+
+    # Every document is cached now, so repeating the pack sends nothing.
+    assert entity_extraction.extract_entities_packed(documents) == fragments
+    assert len(requests) == 2
+
+
+def test_extract_entities_packed_retries_misattributed_documents(monkeypatch):
+    from processing import entity_extraction
+
+    requests = []
+
+    def fragment_for(*media_ids: str) -> Dict[str, Any]:
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [],
+            "mentions_edges": [
+                {"from_media_id": m, "to_pokemon": "Pikachu"} for m in media_ids
+            ],
+        }
+
+    class FakeResponses:
+        def create(self, *args, **kwargs):
+            requests.append(kwargs)
+            if kwargs["text"]["format"]["name"] == "PokemonGraphPackedExtraction":
+                # "b" carries an edge that belongs to "a".
+                body = {
+                    "documents": [
+                        {"media_id": "a", **fragment_for("a")},
+                        {"media_id": "b", **fragment_for("b", "a")},
+                    ]
+                }
+            else:
+                body = fragment_for("b")
+            content = type("C", (), {"text": json.dumps(body)})()
+            item = type("I", (), {"content": [content]})()
+            return type("R", (), {"output": [item]})()
+
+    class FakeClient:
+        responses = FakeResponses()
+
+    monkeypatch.setattr(entity_extraction, "openai_client", FakeClient())
+
+    documents = [
+        {"text": "Pikachu A", "media_id": "a"},
+        {"text": "Pikachu B", "media_id": "b"},
+    ]
+    fragments = entity_extraction.extract_entities_packed(documents)
+
+    assert fragments[1]["mentions_edges"] == [
+        {"from_media_id": "b", "to_pokemon": "Pikachu"}
+    ]
+    assert [r["text"]["format"]["name"] for r in requests] == [
+        "PokemonGraphPackedExtraction",
+        "PokemonGraphExtraction",
+    ]
+    # The misattributed fragment was never cached.
+    assert entity_extraction.extract_entities_packed(documents) == fragments
+    assert len(requests) == 2
+
+
+def test_extract_entities_maps_and_reduces_long_documents(monkeypatch):
+    from processing import entity_extraction
+
+    prompts = []
+
+    class FakeResponses:
+        def create(self, *args, **kwargs):
+            prompt = kwargs["input"][1]["content"]
+            prompts.append(prompt)
+            page = prompt.split("Page ")[1].split(":")[0]
+            body = {
+                "pokemon_nodes": [
+                    {
+                        "name": "Bulbasaur",
+                        "generation": 1,
+                        "primary_type": "Grass",
+                        "secondary_type": "Poison",
+                    }
+                ],
+                "type_nodes": [{"name": "Grass"}],
+                "pokemon_type_edges": [],
+                "evolution_edges": [],
+                "mentions_edges": [
+                    {"from_media_id": "bulbasaur_pdf", "to_pokemon": f"Page{page}"}
+                ],
+            }
+            content = type("C", (), {"text": json.dumps(body)})()
+            item = type("I", (), {"content": [content]})()
+            return type("R", (), {"output": [item]})()
+
+    class FakeClient:
+        responses = FakeResponses()
+
+    monkeypatch.setattr(entity_extraction, "openai_client", FakeClient())
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_CHUNK_TOKENS", 60)
+    monkeypatch.setattr(entity_extraction, "EXTRACTION_CHUNK_OVERLAP_TOKENS", 0)
+
+    text = "\n\n".join(f"Page {i}: " + "Bulbasaur grows. " * 10 for i in range(4))
+    result = extract_entities(text, "bulbasaur_pdf", "Bulbasaur")
+
+    assert len(prompts) == 4
+    assert len(result["pokemon_nodes"]) == 1
+    assert result["type_nodes"] == [{"name": "Grass"}]
+    assert sorted(e["to_pokemon"] for e in result["mentions_edges"]) == [
+        "Page0",
+        "Page1",
+        "Page2",
+        "Page3",
+    ]
+
+
+def test_parse_fragment_reads_type_placeholders_as_null():
+    def node(primary, secondary):
+        return {
+            "name": "Pikachu",
+            "generation": 1,
+            "primary_type": primary,
+            "secondary_type": secondary,
+        }
+
+    typed = parse_fragment(json.dumps({"pokemon_nodes": [node("Electric", "None")]}))
+    untyped = parse_fragment(json.dumps({"pokemon_nodes": [node("", None)]}))
+
+    assert typed["pokemon_nodes"] == [node("Electric", None)]
+    assert untyped["pokemon_nodes"] == [node(None, None)]
+    # A later mention without types keeps the types already known.
+    graph = merge_fragments([typed, untyped])
+    assert graph["pokemon_nodes"] == [node("Electric", None)]
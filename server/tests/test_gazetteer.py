@@ -0,0 +1,106 @@
+from typing import Union
+
+from processing import entity_extraction, graph_builder
+from processing.gazetteer import Gazetteer
+
+MAPPING = {
+    "Bulbasaur": ("Bulbasaur", 1, ["grass", "poison"]),
+    "Ivysaur": ("Ivysaur", 1, ["grass", "poison"]),
+    "Pikachu": ("Pikachu", 1, ["electric"]),
+    "Nidoran♀": ("Nidoran♀", 1, ["poison"]),
+}
+
+
+def test_gazetteer_resolves_known_facts_without_llm():
+    gazetteer = Gazetteer(MAPPING)
+
+    fragment = gazetteer.extract(
+        "Pikachu and Nidoran F were seen near Bulbasaur.", "pikachu_card", "pikachu"
+    )
+
+    assert fragment is not None
+    assert [n["name"] for n in fragment["pokemon_nodes"]] == [
+        "Pikachu",
+        "Nidoran♀",
+        "Bulbasaur",
+    ]
+    assert fragment["pokemon_nodes"][2] == {
+        "name": "Bulbasaur",
+        "generation": 1,
+        "primary_type": "Grass",
+        "secondary_type": "Poison",
+    }
+    # Same shape the LLM path produces for a single-typed Pokémon.
+    assert fragment["pokemon_nodes"][0]["secondary_type"] is None
+    assert fragment["type_nodes"] == [
+        {"name": "Electric"},
+        {"name": "Poison"},
+        {"name": "Grass"},
+    ]
+    assert {"from_pokemon": "Pikachu", "to_type": "Electric"} in fragment[
+        "pokemon_type_edges"
+    ]
+    assert fragment["evolution_edges"] == []
+    assert {"from_media_id": "pikachu_card", "to_pokemon": "Bulbasaur"} in fragment[
+        "mentions_edges"
+    ]
+    assert gazetteer.stats() == {"hits": 1, "misses": 0}
+
+
+def test_gazetteer_defers_to_llm_when_it_cannot_resolve():
+    gazetteer = Gazetteer(MAPPING)
+
+    assert (
+        gazetteer.extract("Bulbasaur evolves into Ivysaur.", "a", "Bulbasaur") is None
+    )
+    assert gazetteer.extract("A new Pokémon.", "b", "Missingno") is None
+    assert gazetteer.extract("Pikachu.", "c", None) is None
+    assert gazetteer.stats() == {"hits": 0, "misses": 3}
+
+
+def test_gazetteer_defers_to_llm_for_unknown_names():
+    gazetteer = Gazetteer(MAPPING)
+
+    assert gazetteer.unknown_names("Bulbasaur met Mewtwo.") == ["Mewtwo"]
+    assert gazetteer.extract("Bulbasaur met Mewtwo.", "a", "Bulbasaur") is None
+    # Sentence openers, type names and known names are not candidates.
+    assert gazetteer.unknown_names("The Grass type. Pikachu and Nidoran F.") == []
+    assert gazetteer.extract("This Pokémon is Electric.", "b", "Pikachu")
+
+
+def test_build_graph_only_calls_llm_for_unresolved_records(tmp_path, monkeypatch):
+    text_jsonl = tmp_path / "text.jsonl"
+    text_jsonl.write_text(
+        '{"id": "pika", "text": "Pikachu is Electric.", "pokemon": "Pikachu"}\n'
+        '{"id": "evo", "text": "Pikachu evolves into Raichu.", "pokemon": "Pikachu"}\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(graph_builder, "TEXT_JSONL", text_jsonl)
+    monkeypatch.setattr(graph_builder, "IMAGES_JSONL", tmp_path / "none")
+    monkeypatch.setattr(graph_builder, "AUDIO_JSONL", tmp_path / "none")
+
+    calls: list[str] = []
+
+    def fake_extract_entities(
+        text: str, media_id: str, pokemon_hint: Union[str, None] = None
+    ):
+        calls.append(media_id)
+        return {
+            "pokemon_nodes": [],
+            "type_nodes": [],
+            "pokemon_type_edges": [],
+            "evolution_edges": [{"from_pokemon": "Pikachu", "to_pokemon": "Raichu"}],
+            "mentions_edges": [],
+        }
+
+    monkeypatch.setattr(entity_extraction, "extract_entities", fake_extract_entities)
+
+    graph = graph_builder.build_graph(concurrency=1, full=True)
+
+    assert calls == ["evo"]
+    assert {"from_pokemon": "Pikachu", "to_type": "Electric"} in graph[
+        "pokemon_type_edges"
+    ]
+    assert graph["evolution_edges"] == [
+        {"from_pokemon": "Pikachu", "to_pokemon": "Raichu"}
+    ]
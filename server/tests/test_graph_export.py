@@ -0,0 +1,96 @@
+import csv
+import json
+
+import pytest
+from processing import graph_export
+from processing.graph_export import export_graph
+
+GRAPH = {
+    "pokemon_nodes": [
+        {
+            "name": "Bulbasaur",
+            "generation": 1,
+            "primary_type": "Grass",
+            "secondary_type": "Poison",
+        },
+        {
+            "name": "Nidoran♀",
+            "generation": 1,
+            "primary_type": "Poison",
+            "secondary_type": None,
+        },
+    ],
+    "type_nodes": [{"name": "Grass"}, {"name": "Poison"}],
+    "pokemon_type_edges": [
+        {"from_pokemon": "Bulbasaur", "to_type": "Grass"},
+        {"from_pokemon": "Bulbasaur", "to_type": "Poison"},
+    ],
+    "evolution_edges": [{"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}],
+    "mentions_edges": [{"from_media_id": "bulbasaur_fact", "to_pokemon": "Bulbasaur"}],
+}
+
+
+def _read_csv(path):
+    with path.open(newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_export_graph_writes_every_collection(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_export, "GRAPH_EXPORT_PARQUET", False)
+
+    counts = export_graph(GRAPH, tmp_path)
+
+    assert counts == {key: len(rows) for key, rows in GRAPH.items()}
+    assert json.loads((tmp_path / "graph.json").read_text(encoding="utf-8")) == GRAPH
+    assert _read_csv(tmp_path / "edges" / "evolution_edges.csv") == [
+        {"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}
+    ]
+    assert len(_read_csv(tmp_path / "edges" / "pokemon_type_edges.csv")) == 2
+    assert _read_csv(tmp_path / "nodes" / "pokemon_nodes.csv")[1]["name"] == "Nidoran♀"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_export_graph_streams_iterables(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(graph_export, "GRAPH_EXPORT_BATCH_ROWS", 300)
+    mentions = (
+        {"from_media_id": f"doc_{i}", "to_pokemon": "Pikachu"} for i in range(1000)
+    )
+    graph = {key: [] for key in GRAPH}
+    graph["mentions_edges"] = mentions
+
+    counts = export_graph(graph, tmp_path)
+
+    # The generator is read once and every file gets all of it.
+    assert counts["mentions_edges"] == 1000
+    loaded = json.loads((tmp_path / "graph.json").read_text(encoding="utf-8"))
+    assert len(loaded["mentions_edges"]) == 1000
+    assert loaded["pokemon_nodes"] == []
+    assert len(_read_csv(tmp_path / "edges" / "mentions_edges.csv")) == 1000
+    parquet_file = pq.ParquetFile(tmp_path / "parquet" / "mentions_edges.parquet")
+    assert parquet_file.metadata.num_rows == 1000
+    assert parquet_file.num_row_groups == 4
+
+
+def test_failed_export_keeps_previous_file(tmp_path):
+    target = tmp_path / "edges" / "mentions_edges.csv"
+    graph_export.write_csv(target, ["from_media_id"], [{"from_media_id": "old"}])
+
+    def broken_rows():
+        yield {"from_media_id": "new"}
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        graph_export.write_csv(target, ["from_media_id"], broken_rows())
+
+    assert _read_csv(target) == [{"from_media_id": "old"}]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_export_graph_writes_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    export_graph(GRAPH, tmp_path)
+
+    table = pq.read_table(tmp_path / "parquet" / "pokemon_nodes.parquet")
+    assert table.to_pylist() == GRAPH["pokemon_nodes"]
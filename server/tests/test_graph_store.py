@@ -0,0 +1,198 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from processing import graph_store
+
+
+def _graph(*names: str) -> Dict[str, Any]:
+    return {
+        "pokemon_nodes": [
+            {
+                "name": n,
+                "generation": 1,
+                "primary_type": "Grass",
+                "secondary_type": "Poison",
+            }
+            for n in names
+        ],
+        "type_nodes": [{"name": "Grass"}, {"name": "Poison"}],
+        "pokemon_type_edges": [{"from_pokemon": n, "to_type": "Grass"} for n in names],
+        "evolution_edges": [{"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"}],
+        "mentions_edges": [
+            {"from_media_id": "bulbasaur_fact", "to_pokemon": "Bulbasaur"}
+        ],
+    }
+
+
+def _write_graph(path: Path, graph: Dict[str, Any]) -> None:
+    path.write_text(json.dumps(graph), encoding="utf-8")
+
+
+def test_snapshot_is_reused_until_file_changes(tmp_path, monkeypatch):
+    graph_json = tmp_path / "graph.json"
+    _write_graph(graph_json, _graph("Bulbasaur"))
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json, raising=True)
+
+    reads = {"count": 0}
+    real_make_snapshot = graph_store._make_snapshot
+
+    def counting_make_snapshot(*args, **kwargs):
+        reads["count"] += 1
+        return real_make_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(graph_store, "_make_snapshot", counting_make_snapshot)
+
+    first = graph_store.get_graph_snapshot()
+    second = graph_store.get_graph_snapshot()
+    assert first is second
+    assert reads["count"] == 1
+
+    _write_graph(graph_json, _graph("Bulbasaur", "Ivysaur"))
+    st = os.stat(graph_json)
+    os.utime(graph_json, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    third = graph_store.get_graph_snapshot()
+    assert third is not first
+    assert [n["name"] for n in third.pokemon_nodes] == ["Bulbasaur", "Ivysaur"]
+    assert [n["name"] for n in first.pokemon_nodes] == ["Bulbasaur"]
+
+    graph_store.invalidate_graph()
+    graph_store.get_graph_snapshot()
+    assert reads["count"] == 3
+
+
+def test_build_graph_context_uses_cached_graph(tmp_path, monkeypatch):
+    graph_json = tmp_path / "graph.json"
+    _write_graph(graph_json, _graph("Bulbasaur", "Ivysaur"))
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json, raising=True)
+
+    result = graph_store.build_graph_context("What type is Bulbasaur?")
+
+    assert result["node"]["name"] == "Bulbasaur"
+    assert "Evolves to: Ivysaur" in result["context"]
+    assert "Mentioned in media IDs: bulbasaur_fact" in result["context"]
+
+
+def test_find_related_pokemon_uses_both_edge_directions():
+    graph = {
+        "pokemon_nodes": [],
+        "type_nodes": [],
+        "pokemon_type_edges": [
+            {"from_pokemon": "Ivysaur", "to_type": "Grass"},
+            {"from_pokemon": "Charmander", "to_type": "Fire"},
+            {"from_pokemon": "Ivysaur", "to_type": "Poison"},
+        ],
+        "evolution_edges": [
+            {"from_pokemon": "Bulbasaur", "to_pokemon": "Ivysaur"},
+            {"from_pokemon": "Ivysaur", "to_pokemon": "Venusaur"},
+        ],
+        "mentions_edges": [
+            {"from_media_id": "ivysaur_card", "to_pokemon": "Ivysaur"},
+            {"from_media_id": "bulbasaur_fact", "to_pokemon": "Ivysaur"},
+            {"from_media_id": "bulbasaur_fact", "to_pokemon": "Bulbasaur"},
+        ],
+    }
+
+    related = graph_store.find_related_pokemon(graph, "Ivysaur")
+
+    assert related == {
+        "types": ["Grass", "Poison"],
+        "evolves_to": ["Venusaur"],
+        "evolves_from": ["Bulbasaur"],
+        "mentioned_in": ["ivysaur_card", "bulbasaur_fact"],
+    }
+    assert graph_store.find_related_pokemon(graph, "Mew") == {
+        "types": [],
+        "evolves_to": [],
+        "evolves_from": [],
+        "mentioned_in": [],
+    }
+
+
+def test_find_pokemon_nodes_by_name_handles_symbols_and_multiword_names():
+    graph = _graph("Bulbasaur", "Mr. Mime", "Nidoran♀", "Nidoran♂", "Mime Jr.")
+
+    def names(question: str):
+        return [
+            n["name"] for n in graph_store.find_pokemon_nodes_by_name(graph, question)
+        ]
+
+    assert names("Is Nidoran♂ stronger than bulbasaur?") == ["Nidoran♂", "Bulbasaur"]
+    assert names("nidoran female vs Nidoran M") == ["Nidoran♀", "Nidoran♂"]
+    assert names("What type is Mr. Mime?") == ["Mr. Mime"]
+    assert names("mr mime and MIME JR") == ["Mr. Mime", "Mime Jr."]
+    assert names("Bulbasaurs are cute") == []
+
+
+def test_binary_graph_round_trips_and_is_preferred(tmp_path, monkeypatch):
+    from processing.graph_binary import read_graph_binary, write_graph_binary
+
+    graph = _graph("Bulbasaur", "Nidoran♀")
+    graph["pokemon_nodes"].append(
+        {
+            "name": "Ivysaur",
+            "generation": None,
+            "primary_type": None,
+            "secondary_type": None,
+        }
+    )
+
+    graph_json = tmp_path / "graph.json"
+    _write_graph(graph_json, _graph("Squirtle"))
+    write_graph_binary(graph, graph_store.binary_path(graph_json))
+
+    assert read_graph_binary(graph_store.binary_path(graph_json)).to_graph() == graph
+
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json, raising=True)
+    snapshot = graph_store.get_graph_snapshot()
+
+    assert [n["name"] for n in snapshot.pokemon_nodes] == [
+        "Bulbasaur",
+        "Nidoran♀",
+        "Ivysaur",
+    ]
+    assert graph_store.find_related_pokemon(snapshot, "Bulbasaur")["evolves_to"] == [
+        "Ivysaur"
+    ]
+
+
+def test_corrupt_binary_graph_falls_back_to_json(tmp_path, monkeypatch):
+    graph_json = tmp_path / "graph.json"
+    _write_graph(graph_json, _graph("Squirtle"))
+    graph_store.binary_path(graph_json).write_bytes(b"not a graph")
+
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json, raising=True)
+    snapshot = graph_store.get_graph_snapshot()
+
+    assert [n["name"] for n in snapshot.pokemon_nodes] == ["Squirtle"]
+
+
+def test_published_versions_swap_in_behind_current_pointer(tmp_path, monkeypatch):
+    from processing import graph_builder
+
+    graph_json = tmp_path / "graph.json"
+    monkeypatch.setattr(graph_store, "GRAPH_JSON", graph_json, raising=True)
+    monkeypatch.setattr(graph_builder, "GRAPH_KEEP_VERSIONS", 2, raising=True)
+
+    first = graph_builder.publish_graph(_graph("Bulbasaur"), graph_json)
+    assert graph_store.resolve_graph_path(graph_json) == first / "graph.json"
+    assert (first / "nodes" / "pokemon_nodes.csv").exists()
+    snapshot = graph_store.get_graph_snapshot()
+    assert [n["name"] for n in snapshot.pokemon_nodes] == ["Bulbasaur"]
+
+    second = graph_builder.publish_graph(_graph("Squirtle"), graph_json)
+    third = graph_builder.publish_graph(_graph("Charmander"), graph_json)
+
+    snapshot = graph_store.get_graph_snapshot()
+    assert [n["name"] for n in snapshot.pokemon_nodes] == ["Charmander"]
+    assert snapshot.path == third / "graph.json"
+
+    versions = graph_store.versions_dir(graph_json)
+    assert sorted(d.name for d in versions.iterdir()) == [second.name, third.name]
+
+
+def test_resolve_graph_path_without_pointer_uses_legacy_file(tmp_path):
+    graph_json = tmp_path / "graph.json"
+    assert graph_store.resolve_graph_path(graph_json) == graph_json
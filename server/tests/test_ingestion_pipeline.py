@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from ingestion import audio_ingestion, image_ingestion, pipeline, text_ingestion
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    raw = {m: tmp_path / "raw" / m for m in ("text", "image", "audio")}
+    for directory in raw.values():
+        directory.mkdir(parents=True)
+    (raw["text"] / "bulbasaur_notes.txt").write_text(" Bulbasaur notes \n")
+    (raw["text"] / "squirtle_notes.txt").write_text("Squirtle notes")
+    (raw["text"] / "readme.md").write_text("ignored")
+    (raw["image"] / "charmander_card.jpg").write_bytes(b"jpg")
+    (raw["audio"] / "squirtle_facts.mp3").write_bytes(b"mp3")
+
+    out = tmp_path / "processed"
+    monkeypatch.setattr(text_ingestion, "TEXT_JSONL", out / "text.jsonl")
+    monkeypatch.setattr(image_ingestion, "IMAGES_JSONL", out / "images.jsonl")
+    monkeypatch.setattr(audio_ingestion, "AUDIO_JSONL", out / "audio.jsonl")
+    monkeypatch.setattr(pipeline, "INGEST_EXECUTOR", "thread")
+    monkeypatch.setattr(pipeline, "INGEST_EXTRACT_WORKERS", 4)
+
+    calls = {"embed": [], "upsert": []}
+
+    def fake_embed_texts(texts):
+        calls["embed"].append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def fake_upsert(documents, **kwargs):
+        calls["upsert"].append(documents)
+        return len(documents)
+
+    monkeypatch.setattr(pipeline.embeddings, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(pipeline.vector_store, "upsert_documents", fake_upsert)
+    return raw, out, calls
+
+
+def _ids(path: Path):
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def test_ingests_all_modalities_in_discovery_order(corpus, monkeypatch):
+    raw, out, calls = corpus
+    text_order = [p.stem for p in raw["text"].iterdir() if p.suffix == ".txt"]
+    real_extract = pipeline.extract
+
+    def fake_extract(modality, path):
+        if modality == "text":
+            # The first text file finishes last.
+            if Path(path).stem == text_order[0]:
+                time.sleep(0.05)
+            return real_extract(modality, path)
+        segments = [{"start": 0.5, "end": 2.0, "text": "audio"}]
+        return {"text": f"{modality} text for {Path(path).stem}", "segments": segments}
+
+    monkeypatch.setattr(pipeline, "extract", fake_extract)
+
+    stats = pipeline.ingest_corpus(raw)
+
+    assert (stats.files, stats.ingested, stats.failed) == (4, 4, 0)
+    assert _ids(out / "text.jsonl") == text_order
+    assert _ids(out / "images.jsonl") == ["charmander_card"]
+    assert _ids(out / "audio.jsonl") == ["squirtle_facts"]
+    audio_record = json.loads((out / "audio.jsonl").read_text(encoding="utf-8"))
+    assert audio_record["segments"] == [{"start": 0.5, "end": 2.0, "text": "audio"}]
+
+    with (out / "text.jsonl").open(encoding="utf-8") as f:
+        records = {r["id"]: r for r in map(json.loads, f)}
+    assert records["bulbasaur_notes"]["text"] == "Bulbasaur notes"
+    assert records["bulbasaur_notes"]["tags"] == ["starter", "bulbasaur"]
+
+    upserted = [doc for batch in calls["upsert"] for doc in batch]
+    assert sorted(d["id"] for d in upserted) == sorted(
+        text_order + ["charmander_card", "squirtle_facts"]
+    )
+    assert all(d["payload"]["media_id"] == d["id"] for d in upserted)
+    assert sum(len(b) for b in calls["embed"]) == 4
+
+
+def test_failed_file_is_skipped_and_reported(corpus, monkeypatch):
+    raw, out, calls = corpus
+
+    def fake_extract(modality, path):
+        if modality == "image":
+            raise RuntimeError("tesseract missing")
+        return {"text": f"{modality} text"}
+
+    monkeypatch.setattr(pipeline, "extract", fake_extract)
+
+    with pytest.raises(pipeline.IngestionError, match="charmander_card"):
+        pipeline.ingest_corpus(raw)
+
+    assert len(_ids(out / "text.jsonl")) == 2
+    assert _ids(out / "audio.jsonl") == ["squirtle_facts"]
+    assert not (out / "images.jsonl").exists()
+
+
+def test_full_queues_hold_back_extraction(corpus, monkeypatch):
+    raw, _, _ = corpus
+    monkeypatch.setattr(pipeline, "INGEST_QUEUE_SIZE", 1)
+    release = threading.Event()
+    embedding = threading.Event()
+    third_extracted = threading.Event()
+    extracted = []
+
+    def fake_extract(modality, path):
+        extracted.append(path)
+        if len(extracted) == 3:
+            third_extracted.set()
+        return {"text": "text"}
+
+    def stalled_embed(texts):
+        embedding.set()
+        release.wait(5)
+        return [[0.0] for _ in texts]
+
+    monkeypatch.setattr(pipeline, "extract", fake_extract)
+    monkeypatch.setattr(pipeline.embeddings, "embed_texts", stalled_embed)
+
+    run = threading.Thread(target=pipeline.ingest_corpus, args=(raw,))
+    run.start()
+    assert embedding.wait(5) and third_extracted.wait(5)
+    # Embedding is stalled on the first item and the queue holds the second,
+    # so the third cannot be handed on and the fourth is never submitted.
+    assert len(extracted) == 3
+    release.set()
+    run.join(5)
+    assert len(extracted) == 4
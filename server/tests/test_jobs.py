@@ -0,0 +1,137 @@
+import threading
+
+from processing import jobs
+from processing.jobs import JobRunner
+
+
+def test_job_reports_progress_and_result():
+    runner = JobRunner(workers=1)
+    submitted = threading.Event()
+    seen = {}
+
+    def work():
+        submitted.wait(5)
+        jobs.report_progress(0, 4, stage="extract")
+        for done in range(1, 5):
+            jobs.report_progress(done)
+        seen["inside"] = runner.get(job.id).to_dict()
+        return "ok"
+
+    job = runner.submit("process", work)
+    submitted.set()
+    runner.wait(job.id, timeout=5)
+
+    assert job.status == jobs.SUCCEEDED
+    assert job.result == "ok"
+    assert seen["inside"]["status"] == jobs.RUNNING
+    assert seen["inside"]["stage"] == "extract"
+    assert (seen["inside"]["done"], seen["inside"]["total"]) == (4, 4)
+    assert job.to_dict()["eta_seconds"] == 0.0
+
+
+def test_eta_follows_throughput():
+    job = jobs.Job(id="j", kind="process", status=jobs.RUNNING)
+    job.stage_started_at = 100.0
+    job.done, job.total = 10, 30
+
+    assert job.throughput(now=105.0) == 2.0
+    assert job.eta_seconds(now=105.0) == 10.0
+
+
+def test_running_job_stops_at_next_cancellation_check():
+    runner = JobRunner(workers=1)
+    started, release = threading.Event(), threading.Event()
+    progressed = []
+
+    def work():
+        started.set()
+        release.wait(5)
+        for done in range(1, 100):
+            jobs.raise_if_cancelled()
+            progressed.append(done)
+
+    job = runner.submit("process", work)
+    assert started.wait(5)
+    runner.cancel(job.id)
+    release.set()
+    runner.wait(job.id, timeout=5)
+
+    assert job.status == jobs.CANCELLED
+    assert progressed == []
+
+
+def test_queued_job_is_cancelled_without_running():
+    runner = JobRunner(workers=1)
+    release = threading.Event()
+    ran = []
+
+    blocker = runner.submit("ingest", lambda: release.wait(5))
+    queued = runner.submit("process", lambda: ran.append(True))
+    runner.cancel(queued.id)
+    release.set()
+    runner.wait(blocker.id, timeout=5)
+    runner.wait(queued.id, timeout=5)
+
+    assert queued.status == jobs.CANCELLED
+    assert ran == []
+
+
+def test_failed_job_records_error_and_active_kind_is_deduplicated():
+    runner = JobRunner(workers=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    first = runner.submit("process", work)
+    assert runner.submit("process", work) is first
+    release.set()
+    runner.wait(first.id, timeout=5)
+
+    assert first.status == jobs.FAILED
+    assert first.error == "boom"
+    assert runner.submit("process", lambda: None) is not first
+
+
+def test_progress_helpers_are_no_ops_outside_a_job():
+    jobs.report_progress(1, 2, stage="extract")
+    assert jobs.cancel_requested() is False
+    jobs.raise_if_cancelled()
+
+
+def test_cancelled_build_keeps_a_checkpoint(tmp_path, monkeypatch):
+    from processing import graph_builder
+
+    records = [{"id": f"m{i}", "text": f"text {i}", "pokemon": None} for i in range(5)]
+    monkeypatch.setattr(
+        graph_builder,
+        "_iter_records",
+        lambda: iter(records),
+    )
+    monkeypatch.setattr(graph_builder, "GRAPH_CHECKPOINT_EVERY", 100)
+    runner = JobRunner(workers=1)
+    submitted = threading.Event()
+    calls = []
+
+    def fake_extract(text, media_id, pokemon_hint=None):
+        calls.append(media_id)
+        if len(calls) == 2:
+            runner.cancel(job.id)
+        return {"mentions_edges": [{"from_media_id": media_id, "to_pokemon": "Mew"}]}
+
+    monkeypatch.setattr(
+        graph_builder.entity_extraction, "extract_entities", fake_extract
+    )
+
+    def build():
+        submitted.wait(5)
+        return graph_builder.build_graph(concurrency=1)
+
+    job = runner.submit("process", build)
+    submitted.set()
+    runner.wait(job.id, timeout=5)
+
+    assert job.status == jobs.CANCELLED
+    checkpoint = graph_builder.load_checkpoint()
+    assert sorted(checkpoint) == ["m0", "m1"]
@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+from processing import local_index
+from processing.local_index import LocalVectorIndex
+from qdrant_client.http import models as qm
+
+
+def _points(vectors: np.ndarray, prefix: str = "p"):
+    return [
+        (
+            f"{prefix}{i}",
+            v.tolist(),
+            {
+                "media_id": f"{prefix}{i}",
+                "pokemon": "Bulbasaur" if i % 2 else "Squirtle",
+            },
+        )
+        for i, v in enumerate(vectors)
+    ]
+
+
+def test_exact_search_returns_cosine_top_k(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+
+    index = LocalVectorIndex(tmp_path / "index", dim=8)
+    index.upsert(_points(vectors))
+
+    hits = index.search(vectors[7].tolist(), limit=3)
+
+    assert hits[0]["id"] == "p7"
+    assert abs(hits[0]["score"] - 1.0) < 1e-5
+    assert len(hits) == 3
+    assert hits[0]["score"] >= hits[1]["score"] >= hits[2]["score"]
+
+
+def test_index_persists_and_overwrites_by_id(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(2000, 4)).astype(np.float32)
+
+    index = LocalVectorIndex(tmp_path / "index", dim=4)
+    index.upsert(_points(vectors))
+    index.upsert([("p3", vectors[5].tolist(), {"media_id": "p3", "pokemon": "Mew"})])
+
+    reloaded = LocalVectorIndex(tmp_path / "index", dim=4)
+
+    assert len(reloaded) == 2000
+    hit = reloaded.search(vectors[1999].tolist(), limit=1)[0]
+    assert hit["id"] == "p1999"
+    top = {h["id"] for h in reloaded.search(vectors[5].tolist(), limit=2)}
+    assert top == {"p3", "p5"}
+
+
+def test_search_applies_payload_filters(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(20, 4)).astype(np.float32)
+
+    index = LocalVectorIndex(tmp_path / "index", dim=4)
+    index.upsert(_points(vectors))
+
+    flt = qm.Filter(
+        must=[qm.FieldCondition(key="pokemon", match=qm.MatchValue(value="Squirtle"))]
+    )
+    hits = index.search(vectors[1].tolist(), limit=20, filters=flt)
+
+    assert len(hits) == 10
+    assert all(h["payload"]["pokemon"] == "Squirtle" for h in hits)
+
+
+def test_ann_search_recalls_exact_neighbors(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index, "LOCAL_INDEX_ANN", True)
+    monkeypatch.setattr(local_index, "LOCAL_INDEX_ANN_MIN_POINTS", 1)
+
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    queries = rng.normal(size=(20, 16)).astype(np.float32)
+
+    index = LocalVectorIndex(tmp_path / "index", dim=16)
+    index.upsert(_points(vectors))
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    recalled = 0
+    for q in queries:
+        exact = set(np.argsort(-(normalized @ q))[:5].tolist())
+        approx = {int(h["id"][1:]) for h in index.search(q.tolist(), limit=5)}
+        recalled += len(exact & approx)
+
+    assert recalled / (5 * len(queries)) > 0.9
+
+
+def test_search_sees_a_consistent_snapshot_during_upsert(tmp_path):
+    rng = np.random.default_rng(3)
+    index = LocalVectorIndex(tmp_path / "index", dim=8)
+    index.upsert(_points(rng.normal(size=(4, 8)).astype(np.float32)))
+
+    # Hold an upsert that also grows the memmap halfway through.
+    entered, release = threading.Event(), threading.Event()
+    set_row = index._set_row
+
+    def paused_set_row(*args):
+        entered.set()
+        release.wait(5)
+        set_row(*args)
+
+    index._set_row = paused_set_row  # type: ignore[method-assign]
+    more = _points(rng.normal(size=(2000, 8)).astype(np.float32), prefix="q")
+    writer = threading.Thread(target=index.upsert, args=(more,))
+    writer.start()
+    assert entered.wait(5)
+
+    results = []
+    reader = threading.Thread(
+        target=lambda: results.append(index.search([1.0] * 8, limit=5000))
+    )
+    reader.start()
+    reader.join(0.2)
+    # The search waits for the swap instead of mixing old and new state.
+    assert reader.is_alive()
+    release.set()
+    writer.join(5)
+    reader.join(5)
+
+    assert len(results[0]) == 2004
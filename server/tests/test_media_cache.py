@@ -0,0 +1,70 @@
+from ingestion import audio_ingestion, media_cache, text_ingestion
+
+
+def test_cached_extraction_is_keyed_by_content_extractor_and_version(tmp_path):
+    calls = []
+
+    def extract(path):
+        calls.append(path)
+        return f"text of {len(calls)}"
+
+    first = tmp_path / "a.pdf"
+    first.write_bytes(b"same bytes")
+    copy = tmp_path / "renamed.pdf"
+    copy.write_bytes(b"same bytes")
+
+    assert media_cache.cached_extraction("pdf", "v1", first, extract) == "text of 1"
+    assert media_cache.cached_extraction("pdf", "v1", copy, extract) == "text of 1"
+    assert len(calls) == 1
+
+    media_cache.cached_extraction("pdf", "v2", first, extract)
+    media_cache.cached_extraction("ocr", "v1", first, extract)
+    first.write_bytes(b"new bytes")
+    media_cache.cached_extraction("pdf", "v1", first, extract)
+    assert len(calls) == 4
+
+
+def test_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_cache, "MEDIA_CACHE_ENABLED", False)
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"x")
+    calls = []
+
+    for _ in range(2):
+        media_cache.cached_extraction("pdf", "v1", path, calls.append)
+    assert len(calls) == 2
+    assert media_cache.media_cache_stats() == {}
+
+
+def test_pdf_and_audio_extractors_reuse_cached_text(tmp_path, monkeypatch):
+    pdf = tmp_path / "bulbasaur.pdf"
+    pdf.write_bytes(b"%PDF fake")
+    pdf_calls = []
+
+    def fake_pdf(path):
+        pdf_calls.append(path)
+        return "Bulbasaur text"
+
+    monkeypatch.setattr(text_ingestion, "_extract_text_from_pdf", fake_pdf)
+    assert text_ingestion.extract_text_from_pdf(str(pdf)) == "Bulbasaur text"
+    assert text_ingestion.extract_text_from_pdf(str(pdf)) == "Bulbasaur text"
+    assert len(pdf_calls) == 1
+
+    audio = tmp_path / "bulbasaur.mp3"
+    audio.write_bytes(b"ID3 fake")
+
+    class FakeService:
+        calls = 0
+
+        def transcribe_file(self, path):
+            FakeService.calls += 1
+            segments = [{"start": 0.0, "end": 1.5, "text": "Bulbasaur audio"}]
+            return {"text": "Bulbasaur audio", "duration": 2.0, "segments": segments}
+
+    monkeypatch.setattr(
+        audio_ingestion.transcription, "get_transcription_service", FakeService
+    )
+    for _ in range(2):
+        assert audio_ingestion.extract_text_from_audio(str(audio)) == "Bulbasaur audio"
+    assert FakeService.calls == 1
+    assert media_cache.media_cache_stats()["hits"] == 2
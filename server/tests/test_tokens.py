@@ -0,0 +1,28 @@
+from processing.tokens import count_tokens, split_text
+
+
+def test_split_text_keeps_short_text_whole():
+    assert split_text("Pikachu is an Electric type.", 100) == [
+        "Pikachu is an Electric type."
+    ]
+
+
+def test_split_text_respects_budget_and_paragraphs():
+    paragraphs = [f"Page {i}: " + "Bulbasaur grows a bulb. " * 8 for i in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = split_text(text, max_tokens=120)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 120 for c in chunks)
+    for paragraph in paragraphs:
+        assert any(paragraph.strip() in c for c in chunks)
+
+
+def test_split_text_cuts_oversized_paragraphs():
+    text = "word " * 2000
+
+    chunks = split_text(text, max_tokens=100, overlap_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 100 for c in chunks)
@@ -0,0 +1,262 @@
+import threading
+from concurrent.futures import CancelledError
+
+import numpy as np
+import pytest
+from ingestion import transcription
+from ingestion.transcription import SAMPLE_RATE, TranscriptionService
+
+
+def _tone(seconds):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+class FakeBackend:
+    def __init__(self):
+        self.inputs = []
+
+    def transcribe(self, audio):
+        self.inputs.append(len(audio))
+        return f" {len(audio) // SAMPLE_RATE} seconds "
+
+
+def _service(loads, audio_seconds=2.0, **kwargs):
+    # One worker unless a test asks for more, so every request hits loads[0].
+    kwargs.setdefault("workers", 1)
+
+    def load_backend():
+        backend = FakeBackend()
+        loads.append(backend)
+        return backend
+
+    def load_audio(path):
+        if path.endswith("broken.mp3"):
+            raise RuntimeError("cannot decode")
+        return _tone(audio_seconds)
+
+    return TranscriptionService(
+        load_backend=load_backend, load_audio=load_audio, torch_threads=1, **kwargs
+    )
+
+
+def test_model_is_loaded_and_warmed_up_before_requests():
+    loads = []
+    service = _service(loads, workers=2)
+    service.start()
+    assert service.wait_ready(5)
+
+    assert len(loads) == 2
+    # Each worker ran one warmup decode of silence.
+    assert [m.inputs for m in loads] == [[SAMPLE_RATE], [SAMPLE_RATE]]
+    service.stop(5)
+
+
+def test_transcribe_reports_queue_and_real_time_factor():
+    loads = []
+    service = _service(loads)
+
+    assert service.transcribe("a.mp3", timeout=5) == "2 seconds"
+    assert service.transcribe("b.mp3", timeout=5) == "2 seconds"
+    stats = service.stats()
+    service.stop(5)
+
+    assert len(loads) == 1
+    assert stats["completed"] == 2
+    assert stats["files"] == 2
+    assert stats["audio_seconds"] == 4.0
+    assert stats["queue_depth"] == 0
+    assert stats["real_time_factor"] is not None
+    assert stats["ready"] is True
+
+
+def test_failed_request_does_not_stop_the_worker():
+    service = _service([])
+
+    with pytest.raises(RuntimeError, match="cannot decode"):
+        service.transcribe("broken.mp3", timeout=5)
+    assert service.transcribe("ok.mp3", timeout=5) == "2 seconds"
+    assert service.stats()["completed"] == 1
+    service.stop(5)
+
+
+def test_requests_queue_behind_a_busy_worker():
+    release = threading.Event()
+
+    class SlowBackend(FakeBackend):
+        def transcribe(self, audio):
+            if len(audio) != SAMPLE_RATE:
+                release.wait(5)
+            return super().transcribe(audio)
+
+    service = TranscriptionService(workers=1, load_backend=SlowBackend, torch_threads=1)
+    futures = [service.submit_audio(_tone(2)) for _ in range(3)]
+    service.wait_ready(5)
+    assert service.stats()["queue_depth"] >= 1
+    release.set()
+    assert [f.result(5) for f in futures] == [" 2 seconds "] * 3
+    service.stop(5)
+
+
+def test_stop_cancels_queued_requests():
+    busy = threading.Event()
+    release = threading.Event()
+
+    class SlowBackend(FakeBackend):
+        def transcribe(self, audio):
+            if len(audio) != SAMPLE_RATE:
+                busy.set()
+                release.wait(5)
+            return super().transcribe(audio)
+
+    service = TranscriptionService(workers=1, load_backend=SlowBackend, torch_threads=1)
+    running, *queued = [service.submit_audio(_tone(2)) for _ in range(3)]
+    assert busy.wait(5)
+
+    stopping = threading.Thread(target=service.stop, args=(5,))
+    stopping.start()
+    for future in queued:
+        with pytest.raises(CancelledError):
+            future.result(5)
+    release.set()
+    stopping.join(5)
+
+    # The request being transcribed when stop() was called still finishes.
+    assert running.result(0) == " 2 seconds "
+    assert service.stats()["queue_depth"] == 0
+
+
+def test_failed_model_load_fails_requests():
+    def broken():
+        raise OSError("no weights")
+
+    service = TranscriptionService(workers=1, load_backend=broken, torch_threads=1)
+    with pytest.raises(RuntimeError, match="failed to load"):
+        service.submit_audio(_tone(1)).result(5)
+    service.stop(5)
+
+
+def test_model_load_is_retried_after_a_failure(monkeypatch):
+    monkeypatch.setattr(transcription, "WHISPER_LOAD_RETRY_SECONDS", 0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights still downloading")
+        return FakeBackend()
+
+    service = TranscriptionService(workers=1, load_backend=flaky, torch_threads=1)
+    service.start()
+    assert service.wait_ready(5)
+    assert "weights still downloading" in service.stats()["load_error"]
+
+    assert service.submit_audio(_tone(2)).result(5) == " 2 seconds "
+    assert len(attempts) == 2
+    assert service.stats()["load_error"] is None
+    service.stop(5)
+
+
+def test_cancelled_request_does_not_kill_a_failed_worker():
+    loading = threading.Event()
+
+    def broken():
+        loading.wait(5)
+        raise OSError("no weights")
+
+    service = TranscriptionService(workers=1, load_backend=broken, torch_threads=1)
+    # Cancelled while queued behind the load, so the failure path sees it.
+    cancelled = service.submit_audio(_tone(1))
+    assert cancelled.cancel()
+    loading.set()
+    with pytest.raises(RuntimeError, match="failed to load"):
+        service.submit_audio(_tone(1)).result(5)
+    service.stop(5)
+
+
+def test_long_audio_is_split_at_pauses_and_stitched_with_timestamps():
+    # 20 s of speech, 3 s of silence, 20 s of speech, trailing silence.
+    silence = lambda s: np.zeros(int(SAMPLE_RATE * s), dtype=np.float32)
+    audio = np.concatenate([silence(1), _tone(20), silence(3), _tone(20), silence(2)])
+    active = []
+    overlap = threading.Event()
+
+    class ParallelBackend(FakeBackend):
+        def transcribe(self, audio):
+            active.append(1)
+            if len(audio) > SAMPLE_RATE and len(active) > 1:
+                overlap.set()
+            overlap.wait(1)
+            try:
+                return super().transcribe(audio)
+            finally:
+                active.pop()
+
+    service = TranscriptionService(
+        workers=2,
+        load_backend=ParallelBackend,
+        load_audio=lambda path: audio,
+        torch_threads=1,
+    )
+    service.start()
+    assert service.wait_ready(5)
+    transcript = service.transcribe_file("long.mp3", timeout=5)
+    stats = service.stats()
+    service.stop(5)
+
+    starts = [s["start"] for s in transcript["segments"]]
+    ends = [s["end"] for s in transcript["segments"]]
+    assert len(transcript["segments"]) == 2
+    assert starts[0] == pytest.approx(1.0, abs=0.2)
+    assert ends[0] == pytest.approx(21.0, abs=0.2)
+    assert starts[1] == pytest.approx(24.0, abs=0.2)
+    assert ends[1] == pytest.approx(44.0, abs=0.2)
+    assert transcript["text"] == "20 seconds 20 seconds"
+    assert transcript["duration"] == 46.0
+    assert overlap.is_set()
+    # 6 s of silence less the padding kept around each segment.
+    assert stats["trimmed_seconds"] == pytest.approx(5.4, abs=0.1)
+
+
+def test_pauses_inside_a_segment_are_not_transcribed():
+    # Speech at 0-2 s and 10-12 s fits one segment; the 8 s pause is cut out.
+    silence = np.zeros(8 * SAMPLE_RATE, dtype=np.float32)
+    audio = np.concatenate([_tone(2), silence, _tone(2)])
+    loads = []
+    service = TranscriptionService(
+        load_backend=lambda: loads.append(FakeBackend()) or loads[-1],
+        load_audio=lambda path: audio,
+        torch_threads=1,
+    )
+    transcript = service.transcribe_file("gap.mp3", timeout=5)
+    stats = service.stats()
+    service.stop(5)
+
+    assert len(transcript["segments"]) == 1
+    assert transcript["segments"][0]["start"] == 0.0
+    assert transcript["segments"][0]["end"] == 12.0
+    # Only the padded speech reached the model, after the warmup decode.
+    speech = loads[0].inputs[1] / SAMPLE_RATE
+    assert speech == pytest.approx(4.3, abs=0.1)
+    assert stats["trimmed_seconds"] == pytest.approx(12 - speech, abs=0.01)
+
+
+def test_silent_audio_is_not_transcribed():
+    loads = []
+    service = TranscriptionService(
+        load_backend=lambda: loads.append(FakeBackend()),
+        load_audio=lambda path: np.zeros(5 * SAMPLE_RATE, dtype=np.float32),
+        torch_threads=1,
+    )
+    transcript = service.transcribe_file("quiet.mp3", timeout=5)
+    service.stop(5)
+
+    assert transcript == {"text": "", "duration": 5.0, "segments": []}
+    # Nothing was queued, so the workers were never even started.
+    assert loads == []
+
+
+def test_service_is_shared():
+    assert transcription.get_transcription_service() is (
+        transcription.get_transcription_service()
+    )
@@ -0,0 +1,142 @@
+import logging
+import sys
+
+import numpy as np
+import pytest
+from ingestion import transcription_backends
+from ingestion.transcription_backends import (
+    TranscriptionBackend,
+    WhisperBackend,
+    WhisperInt8Backend,
+    backend_fingerprint,
+    load_backend,
+)
+from scripts import benchmark_transcription
+from scripts.benchmark_transcription import mean_word_error_rate, word_error_rate
+
+torch = pytest.importorskip("torch")
+whisper_model = pytest.importorskip("whisper.model")
+
+
+class FakeWhisper:
+    def transcribe(self, audio, fp16):
+        assert fp16 is False
+        return {"text": f" {len(audio)} samples"}
+
+
+def _tiny_whisper():
+    torch.manual_seed(0)
+    dims = whisper_model.ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=8,
+        n_audio_state=32,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=100,
+        n_text_ctx=8,
+        n_text_state=32,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    model = whisper_model.Whisper(dims).eval()
+    # Some whisper parameters start as torch.empty; give them real values.
+    with torch.no_grad():
+        for param in model.parameters():
+            param.normal_(0, 0.1)
+    return model
+
+
+def test_load_backend_selects_by_name():
+    backend = load_backend("whisper", "tiny", model=FakeWhisper())
+
+    assert isinstance(backend, WhisperBackend)
+    assert backend.transcribe(np.zeros(160, dtype=np.float32)) == " 160 samples"
+    with pytest.raises(ValueError, match="Unknown transcription backend"):
+        load_backend("nope", "tiny")
+    with pytest.raises(TypeError):
+        TranscriptionBackend()  # type: ignore[abstract]
+
+
+def test_int8_backend_quantizes_every_linear_layer():
+    model = _tiny_whisper()
+    mel = torch.randn(1, 80, 16)
+    tokens = torch.tensor([[1, 2, 3]])
+    with torch.no_grad():
+        expected = model(mel, tokens)
+
+    backend = WhisperInt8Backend("tiny", model=model)
+    quantized = backend.model
+    with torch.no_grad():
+        logits = quantized(mel, tokens)
+
+    linears = [
+        m
+        for m in quantized.modules()
+        if isinstance(m, torch.nn.Linear) or "quantized" in type(m).__module__
+    ]
+    assert linears
+    assert all("quantized" in type(m).__module__ for m in linears)
+    # int8 weights move the logits a little, not the ranking much.
+    assert torch.allclose(logits, expected, atol=0.5)
+    assert (logits.argmax(-1) == expected.argmax(-1)).float().mean() >= 0.6
+
+
+def test_faster_whisper_fingerprint_includes_compute_type(monkeypatch):
+    monkeypatch.setattr(transcription_backends, "FASTER_WHISPER_COMPUTE_TYPE", "int8")
+
+    assert backend_fingerprint("whisper") == "whisper"
+    assert backend_fingerprint("faster-whisper") == "faster-whisper-int8"
+
+
+def test_word_error_rate():
+    assert word_error_rate("Pikachu used Thunderbolt!", "pikachu used thunderbolt") == 0
+    # one substitution and one deletion over four words
+    assert word_error_rate("a b c d", "a x c") == 0.5
+    assert word_error_rate("a b", "a b c d") == 1.0
+    assert word_error_rate("", "") == 0.0
+
+
+def test_mean_word_error_rate_only_scores_clips_with_references():
+    texts = {"a.mp3": "pikachu used thunderbolt", "b.mp3": "anything"}
+
+    assert mean_word_error_rate({"a.mp3": "Pikachu used Thunder"}, texts) == (
+        pytest.approx(1 / 3)
+    )
+    assert mean_word_error_rate({"c.mp3": "unrelated"}, texts) is None
+
+
+def test_benchmark_scores_against_whisper_without_references(
+    tmp_path, monkeypatch, caplog
+):
+    (tmp_path / "a.mp3").write_bytes(b"mp3")
+    outputs = {
+        "whisper": "pikachu used thunderbolt",
+        "whisper-int8": "pikachu used thunder",
+    }
+
+    class Backend(TranscriptionBackend):
+        def __init__(self, name):
+            self.name = name
+
+        def transcribe(self, audio):
+            return outputs[self.name]
+
+    monkeypatch.setattr(
+        benchmark_transcription, "load_backend", lambda name, model: Backend(name)
+    )
+    monkeypatch.setattr(
+        benchmark_transcription.transcription,
+        "load_audio",
+        lambda path: np.full(16000, 0.3, dtype=np.float32),
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["benchmark", "--backends", "whisper-int8", "--audio-dir", str(tmp_path)],
+    )
+
+    with caplog.at_level(logging.INFO):
+        benchmark_transcription.main()
+
+    wer = {r.args[0]: r.args[-1] for r in caplog.records if "RTF" in r.getMessage()}
+    assert wer == {"whisper": "0.000", "whisper-int8": "0.333"}
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from processing import vector_store
+
+
+class FakeQdrantClient:
+    def __init__(self):
+        self.calls: List[str] = []
+        self.points: List[Any] = []
+
+    def collection_exists(self, name: str) -> bool:
+        self.calls.append("collection_exists")
+        return False
+
+    def create_collection(self, collection_name: str, vectors_config: Any) -> None:
+        self.calls.append("create_collection")
+
+    def upsert(self, collection_name: str, points: List[Any], **kwargs) -> None:
+        self.calls.append("upsert")
+        self.points.extend(points)
+
+    def query_points(self, collection_name: str, query: List[float], **kwargs):
+        self.calls.append("query_points")
+        hit = SimpleNamespace(id=1, score=0.9, payload={"text": "Bulbasaur"})
+        return SimpleNamespace(points=[hit])
+
+
+def test_collection_is_checked_once_per_process(monkeypatch):
+    fake = FakeQdrantClient()
+    monkeypatch.setattr(vector_store, "get_qdrant_client", lambda: fake, raising=True)
+    monkeypatch.setattr(vector_store, "_collection_ready", False, raising=True)
+
+    for _ in range(3):
+        hits = vector_store.search_similar([0.0] * 4, limit=1)
+
+    assert hits == [{"id": 1, "score": 0.9, "payload": {"text": "Bulbasaur"}}]
+    assert fake.calls == [
+        "collection_exists",
+        "create_collection",
+        "query_points",
+        "query_points",
+        "query_points",
+    ]
+
+
+def test_qdrant_client_is_shared(monkeypatch):
+    import config
+
+    created: List[Dict[str, Any]] = []
+
+    class RecordingClient:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+
+    monkeypatch.setattr(config, "QdrantClient", RecordingClient, raising=True)
+    monkeypatch.setattr(config, "_qdrant_client", None, raising=True)
+
+    first = config.get_qdrant_client()
+    second = config.get_qdrant_client()
+
+    assert first is second
+    assert len(created) == 1
+    assert created[0]["limits"].max_keepalive_connections == config.QDRANT_POOL_SIZE
+
+
+def test_upsert_documents_batches_with_stable_ids(monkeypatch):
+    fake = FakeQdrantClient()
+    monkeypatch.setattr(vector_store, "get_qdrant_client", lambda: fake, raising=True)
+    monkeypatch.setattr(vector_store, "_collection_ready", True, raising=True)
+
+    docs = [
+        {"id": f"doc_{i}", "vector": [float(i)], "payload": {"media_id": f"doc_{i}"}}
+        for i in range(5)
+    ]
+
+    written = vector_store.upsert_documents(docs, batch_size=2, parallelism=2)
+    vector_store.upsert_documents(docs, batch_size=2, parallelism=2)
+
+    assert written == 5
+    assert fake.calls.count("upsert") == 6
+
+    first_run = sorted(str(p.id) for p in fake.points[:5])
+    second_run = sorted(str(p.id) for p in fake.points[5:])
+    assert first_run == second_run
+    assert len(set(first_run)) == 5
+    assert vector_store.point_id("doc_0") == vector_store.point_id("doc_0", 0)
+    assert vector_store.point_id("doc_0") != vector_store.point_id("doc_0", 1)